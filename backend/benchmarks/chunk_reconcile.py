@@ -0,0 +1,94 @@
+# Checks per-page chunk reconciliation: after each edit the stored chunks must equal a fresh index
+# of the same page, and only changed positions may be re-embedded.
+# Run from backend/: python -m benchmarks.chunk_reconcile --words 3000
+import argparse
+import random
+import sys
+import tempfile
+
+from benchmarks.common import RandomEmbeddingService, build_client
+
+COMPARED_FIELDS = ['source_id', 'source_url', 'title', 'chunk_type', 'chunk_index', 'language', 'content_hash']
+
+
+class CountingEmbeddingService(RandomEmbeddingService):
+    def __init__(self, dim=64):
+        super().__init__(dim)
+        self.encoded = 0
+
+    def generate_embeddings(self, texts, batch_size: int = 32, use_cache: bool = True, use_store: bool = False,
+                            coalesce: bool = False):
+        self.encoded += len(texts)
+        return super().generate_embeddings(texts, batch_size, use_cache, use_store)
+
+
+def snapshot(client, page_id):
+    results = client.collection.get(where={"source_id": page_id}, include=['documents', 'metadatas'])
+    return {
+        chunk_id: (document, tuple(metadata.get(k) for k in COMPARED_FIELDS))
+        for chunk_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+    }
+
+
+def make_page(words, title):
+    return {
+        'id': 'page-1',
+        'url': 'https://www.notion.so/page1',
+        'content': ' '.join(words),
+        'properties': {'title': title}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=3000)
+    parser.add_argument('--backend', choices=['chroma', 'exact'], default='chroma')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = ['project', 'roadmap', 'sprint', 'release', 'backlog', 'estimate', 'risk', 'team', 'review',
+                  'deadline', 'scope', 'budget', 'stakeholder', 'metric', 'goal', 'task']
+    words = [rng.choice(vocabulary) for _ in range(args.words)]
+
+    embeddings = CountingEmbeddingService()
+    client = build_client(tempfile.mkdtemp(), embedding_service=embeddings,
+                          LEXICAL_SEARCH=True, EXACT_TITLE_SCORING=False, PAGE_PREFILTER_PAGES=0,
+                          VECTOR_BACKEND=args.backend)
+
+    middle = len(words) // 2
+    steps = [
+        ('initial index', lambda w, t: (w, t)),
+        ('no change', lambda w, t: (w, t)),
+        ('swap one word', lambda w, t: (w[:middle] + ['budget' if w[middle] != 'budget' else 'scope'] + w[middle + 1:], t)),
+        ('append paragraph', lambda w, t: (w + vocabulary * 2, t)),
+        ('rename page', lambda w, t: (w, t + ' (v2)')),
+        ('truncate to 60%', lambda w, t: (w[:int(len(w) * 0.6)], t)),
+        ('insert at start', lambda w, t: (['kickoff'] + w, t)),
+    ]
+
+    title = 'Project handbook'
+    failures = 0
+    print(f"{'step':>18} {'embedded':>9} {'chunks':>7} {'consistent':>11}")
+    for name, edit in steps:
+        words, title = edit(words, title)
+        document = make_page(words, title)
+        before = embeddings.encoded
+        client.add_documents([document])
+        embedded = embeddings.encoded - before
+
+        fresh = build_client(tempfile.mkdtemp(), embedding_service=CountingEmbeddingService(),
+                             LEXICAL_SEARCH=True, EXACT_TITLE_SCORING=False, PAGE_PREFILTER_PAGES=0,
+                             VECTOR_BACKEND=args.backend)
+        fresh.add_documents([document])
+        stored, expected = snapshot(client, 'page-1'), snapshot(fresh, 'page-1')
+        consistent = stored == expected and len(client.lexical_index) == client.collection.count()
+        if client.vector_index is not None:
+            consistent = consistent and len(client.vector_index) == client.collection.count()
+        failures += not consistent
+        print(f"{name:>18} {embedded:>9} {len(stored):>7} {str(consistent):>11}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
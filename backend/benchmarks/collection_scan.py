@@ -0,0 +1,105 @@
+# Synthetic collections of growing size: paginated scans must see every page (the old limit=10000 reads
+# did not) and scan/delete time per chunk should stay flat as the collection grows.
+# Run from backend/: python -m benchmarks.collection_scan --sizes 10000 50000 100000
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import build_client, load_synthetic_corpus
+
+
+def make_corpus(chunks, chunks_per_page, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((chunks, dim)).astype(np.float32)
+    metadatas = []
+    for i in range(chunks):
+        page = i // chunks_per_page
+        metadatas.append({
+            'source_id': f"page-{page}",
+            'source_url': f"https://www.notion.so/page{page}",
+            'title': f"Page {page}",
+            'language': 'en',
+            'chunk_type': 'title' if i % chunks_per_page == 0 else 'content',
+            'chunk_index': i % chunks_per_page
+        })
+    return vectors, metadatas
+
+
+def legacy_delete(client, page_id):
+    # The previous delete_document: one get + delete and a lexical index save per page
+    results = client.collection.get(where={"source_id": page_id}, include=[], limit=10000)
+    client.page_store.delete([page_id])
+    client.sync_state.delete([page_id])
+    if client.vector_index is not None:
+        client.vector_index.delete_pages([page_id])
+    if client.lexical_index is not None:
+        client.lexical_index.delete_pages([page_id])
+        client.lexical_index.save()
+    if client.page_index is not None:
+        client.page_index.remove_pages([page_id])
+    if results['ids']:
+        client.collection.delete(ids=results['ids'])
+
+
+def timed(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def run(size, chunks_per_page, dim, delete_share):
+    workdir = tempfile.mkdtemp()
+    try:
+        client = build_client(workdir, EXACT_TITLE_SCORING=False, PAGE_PREFILTER_PAGES=0)
+        client.clear_collection()
+        vectors, metadatas = make_corpus(size, chunks_per_page, dim)
+        load_synthetic_corpus(client, vectors, metadatas)
+        pages = size // chunks_per_page + (1 if size % chunks_per_page else 0)
+
+        legacy_pages = len({m['source_id'] for m in client.collection.get(include=['metadatas'], limit=10000)['metadatas']})
+        indexed, scan_seconds, scan_mb = timed(client.get_indexed_pages)
+        documents, _, _ = timed(client.get_all_documents_metadata)
+        assert len(indexed) == pages and len(documents) == pages, (len(indexed), len(documents), pages)
+
+        page_ids = sorted(indexed)
+        count = max(1, int(pages * delete_share))
+        bulk_ids, legacy_ids = page_ids[:count], page_ids[count:2 * count]
+        deleted, bulk_seconds, _ = timed(client.delete_documents, bulk_ids)
+        start = time.perf_counter()
+        for page_id in legacy_ids:
+            legacy_delete(client, page_id)
+        legacy_seconds = time.perf_counter() - start
+        remaining = client.get_indexed_pages()
+        assert not set(bulk_ids) & set(remaining) and len(remaining) == pages - 2 * count
+
+        print(f"{size:>8} {pages:>6} {legacy_pages:>10} {len(indexed):>8} {scan_seconds:>7.2f} "
+              f"{scan_seconds / size * 1e6:>8.1f} {scan_mb:>8.1f} {count:>7} {deleted:>7} "
+              f"{bulk_seconds:>7.2f} {legacy_seconds:>8.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--chunks-per-page', type=int, default=20)
+    parser.add_argument('--dim', type=int, default=32)
+    parser.add_argument('--delete-share', type=float, default=0.05, help='share of pages removed by each delete path')
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'pages':>6} {'limit10k':>10} {'scanned':>8} {'scan s':>7} {'us/chunk':>8} "
+          f"{'peak MB':>8} {'deleted':>7} {'chunks':>7} {'bulk s':>7} {'legacy s':>8}")
+    for size in args.sizes:
+        run(size, args.chunks_per_page, args.dim, args.delete_share)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+import numpy as np
+
+from utils.config import Config
+
+
+class RandomEmbeddingService:
+    # Deterministic pseudo-embeddings so benchmarks run without loading the model
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], 'little')
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+    def generate_embeddings(self, texts, batch_size: int = 32, use_cache: bool = True, use_store: bool = False,
+                            coalesce: bool = False):
+        if isinstance(texts, str):
+            texts = [texts]
+        return [self._embed(t).tolist() for t in texts]
+
+    def detect_language(self, text):
+        return 'unknown'
+
+
+def configure(workdir, **settings):
+    Config.CHROMA_PATH = os.path.join(workdir, 'chroma')
+    Config.PAGE_STORE_PATH = os.path.join(workdir, 'pages.sqlite3')
+    Config.SYNC_STATE_PATH = os.path.join(workdir, 'sync_state.sqlite3')
+    Config.EMBEDDING_STORE_PATH = os.path.join(workdir, 'embeddings.sqlite3')
+    Config.NORMALIZATION_CACHE_PATH = os.path.join(workdir, 'cache.sqlite3')
+    Config.VECTOR_INDEX_PATH = os.path.join(workdir, 'vector_index')
+    Config.LEXICAL_INDEX_PATH = os.path.join(workdir, 'lexical_index.pkl')
+    Config.PAGE_CENTROIDS_PATH = os.path.join(workdir, 'page_centroids.npz')
+    for name, value in settings.items():
+        setattr(Config, name, value)
+
+
+def build_client(workdir, embedding_service=None, **settings):
+    configure(workdir, **settings)
+    from services.chroma_client import ChromaClient
+    return ChromaClient(embedding_service=embedding_service or RandomEmbeddingService())
+
+
+def load_synthetic_corpus(client, vectors, metadatas, documents=None, batch_size=5000):
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        client.collection.add(
+            ids=[f"chunk_{i}" for i in range(start, end)],
+            embeddings=np.asarray(vectors[start:end], dtype=np.float32),
+            metadatas=metadatas[start:end],
+            documents=documents[start:end] if documents else None
+        )
+    client.rebuild_indexes()
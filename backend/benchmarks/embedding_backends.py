@@ -0,0 +1,117 @@
+# Compares the torch SentenceTransformer with the ONNX Runtime backend (fp32 and int8): load time,
+# single-query latency, bulk throughput and RSS. Each backend runs in its own process so imports and
+# RSS do not bleed into each other. Export the model first: python -m scripts.export_onnx
+# Run from backend/: python -m benchmarks.embedding_backends --texts 2000 --queries 200
+import argparse
+import multiprocessing
+import queue
+import random
+import time
+
+import numpy as np
+
+from benchmarks.embedding_pool import VOCABULARY, make_texts
+from utils.config import Config
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_backend(backend, model_dir, texts, queries, batch_size, threads, output):
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    if backend == 'torch':
+        import torch
+        from sentence_transformers import SentenceTransformer
+        from services.embeddings import MODEL_NAME
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(MODEL_NAME, device='cpu')
+    else:
+        from services.onnx_embedder import OnnxEmbedder
+        model = OnnxEmbedder(model_dir, quantized=backend == 'onnx-int8', threads=threads)
+    load_seconds = time.perf_counter() - start
+    load_rss = rss_mb() - base_rss
+
+    model.encode(queries[:8], batch_size=batch_size)
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        model.encode([query], batch_size=1)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size)
+    bulk_seconds = time.perf_counter() - start
+
+    output.put({
+        'backend': backend,
+        'load_s': load_seconds,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'chunks_per_s': len(texts) / bulk_seconds,
+        'load_rss_mb': load_rss,
+        'rss_mb': rss_mb() - base_rss,
+        'embeddings': np.asarray(embeddings, dtype=np.float32)[:200]
+    })
+
+
+def wait_result(process, output):
+    while True:
+        try:
+            return output.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                try:
+                    return output.get(timeout=1)
+                except queue.Empty:
+                    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backends', nargs='+', default=['torch', 'onnx', 'onnx-int8'])
+    parser.add_argument('--model-dir', default=Config.EMBEDDING_ONNX_PATH)
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=70)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=0, help='0 = library default')
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, args.words)
+    rng = random.Random(1)
+    queries = [' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 12))) for _ in range(args.queries)]
+
+    reference = None
+    print(f"{'backend':>10} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'chunks/s':>9} "
+          f"{'load MB':>8} {'RSS MB':>7} {'min cos':>8}")
+    context = multiprocessing.get_context('spawn')
+    for backend in args.backends:
+        output = context.Queue()
+        process = context.Process(
+            target=run_backend,
+            args=(backend, args.model_dir, texts, queries, args.batch_size, args.threads, output)
+        )
+        process.start()
+        r = wait_result(process, output)
+        process.join()
+        if r is None:
+            # e.g. torch or the exported model is missing; the child printed its traceback
+            print(f"{backend:>10} failed (exit code {process.exitcode})")
+            continue
+        embeddings = r['embeddings'] / np.linalg.norm(r['embeddings'], axis=1, keepdims=True)
+        if reference is None:
+            reference = embeddings
+        min_cos = float(np.min(np.sum(reference * embeddings, axis=1)))
+        print(f"{r['backend']:>10} {r['load_s']:>7.1f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} "
+              f"{r['chunks_per_s']:>9.1f} {r['load_rss_mb']:>8.1f} {r['rss_mb']:>7.1f} {min_cos:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
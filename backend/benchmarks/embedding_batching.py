@@ -0,0 +1,126 @@
+# Encode throughput on an ingest-like mix (one short title per page followed by ~100-token chunks, the
+# last chunk of a page shorter) with fixed batches of 32 in arrival order against token-budget batches.
+# --model numpy runs a small numpy transformer that pays for padding like the real one, so the benchmark
+# works without torch; --model service uses the configured model (torch or ONNX).
+# Run from backend/: python -m benchmarks.embedding_batching --pages 150 --model service
+import argparse
+import hashlib
+import random
+import time
+
+import numpy as np
+
+from benchmarks.embedding_pool import VOCABULARY, max_abs_diff
+from services.embedding_batches import fixed_batches, padding_stats, token_budget_batches, token_lengths
+from services.embeddings import EmbeddingService
+from utils.config import Config
+
+
+class NumpyEncoder:
+    # Two self-attention + feed-forward layers over padded batches: cost grows with batch size x longest text
+    max_seq_length = 128
+
+    def __init__(self, dim=384, layers=2, vocab=4096, seed=0):
+        rng = np.random.default_rng(seed)
+        scale = 1 / np.sqrt(dim)
+        self.vocab = vocab
+        self.embeddings = rng.standard_normal((vocab, dim)).astype(np.float32)
+        self.layers = [
+            {name: (rng.standard_normal(shape) * scale).astype(np.float32)
+             for name, shape in [('q', (dim, dim)), ('k', (dim, dim)), ('v', (dim, dim)),
+                                 ('up', (dim, 4 * dim)), ('down', (4 * dim, dim))]}
+            for _ in range(layers)
+        ]
+
+    def _ids(self, text):
+        # About 1.3 tokens per word plus two special tokens, like the multilingual WordPiece vocabulary
+        ids = [0]
+        for word in text.split():
+            digest = hashlib.md5(word.encode()).digest()
+            ids.extend(b % self.vocab for b in digest[:1 + len(word) // 5])
+        return (ids + [1])[:self.max_seq_length]
+
+    def token_lengths(self, texts):
+        return [len(self._ids(text)) for text in texts]
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            ids = [self._ids(text) for text in texts[start:start + batch_size]]
+            longest = max(len(row) for row in ids)
+            mask = np.zeros((len(ids), longest), dtype=np.float32)
+            padded = np.zeros((len(ids), longest), dtype=np.int64)
+            for i, row in enumerate(ids):
+                padded[i, :len(row)] = row
+                mask[i, :len(row)] = 1
+            hidden = self.embeddings[padded]
+            for layer in self.layers:
+                q, k, v = hidden @ layer['q'], hidden @ layer['k'], hidden @ layer['v']
+                scores = q @ k.transpose(0, 2, 1) / np.sqrt(q.shape[-1]) + (mask[:, None, :] - 1) * 1e9
+                scores = np.exp(scores - scores.max(axis=-1, keepdims=True))
+                hidden = hidden + (scores / scores.sum(axis=-1, keepdims=True)) @ v
+                hidden = hidden + np.maximum(hidden @ layer['up'], 0) @ layer['down']
+                hidden = hidden / np.linalg.norm(hidden, axis=-1, keepdims=True)
+            vectors.append((hidden * mask[..., None]).sum(axis=1) / mask.sum(axis=1, keepdims=True))
+        return np.vstack(vectors)
+
+
+def make_ingest_mix(pages, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(pages):
+        texts.append(' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 8))))
+        chunks = rng.randint(1, 8)
+        for i in range(chunks):
+            words = 75 if i < chunks - 1 else rng.randint(5, 75)
+            texts.append(' '.join(rng.choice(VOCABULARY) for _ in range(words)))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=150)
+    parser.add_argument('--model', choices=['numpy', 'service'], default='numpy')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--max-tokens', type=int, nargs='+', default=[2048, 4096, 8192])
+    parser.add_argument('--max-size', type=int, default=Config.EMBEDDING_BATCH_MAX_SIZE)
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    Config.EMBEDDING_WORKERS = 0
+    service = EmbeddingService()
+    if args.model == 'numpy':
+        EmbeddingService._model = NumpyEncoder()
+        EmbeddingService._model_loaded = True
+    texts = make_ingest_mix(args.pages)
+    lengths = token_lengths(service.model, texts)
+    print(f"{len(texts)} texts from {args.pages} pages, {sum(lengths)} tokens, model {args.model}")
+
+    policies = [('fixed', args.batch_size, fixed_batches(len(texts), args.batch_size))]
+    for max_tokens in args.max_tokens:
+        policies.append(('tokens', max_tokens, token_budget_batches(lengths, max_tokens, args.max_size)))
+
+    reference = None
+    print(f"{'policy':>8} {'budget':>7} {'batches':>8} {'padding eff':>12} {'texts/s':>9} {'speedup':>8} {'max diff':>9}")
+    baseline = None
+    for policy, budget, batches in policies:
+        Config.EMBEDDING_BATCH_POLICY = policy
+        Config.EMBEDDING_BATCH_MAX_TOKENS = budget
+        Config.EMBEDDING_BATCH_MAX_SIZE = args.max_size
+        service._encode(texts[:64], args.batch_size)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            embeddings = service._encode(texts, args.batch_size)
+            timings.append(time.perf_counter() - start)
+        throughput = len(texts) / min(timings)
+        baseline = baseline or throughput
+        if reference is None:
+            reference = embeddings
+        stats = padding_stats(lengths, batches)
+        print(f"{policy:>8} {budget:>7} {stats['batches']:>8} {stats['padding_efficiency']:>12.2f} "
+              f"{throughput:>9.1f} {throughput / baseline:>7.2f}x {max_abs_diff(reference, embeddings):>9.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Encodes the same synthetic chunks with the in-process model and with EmbeddingPool at several worker
+# counts, and checks that the pool returns the same vectors in the same order.
+# Needs sentence-transformers and a multi-core CPU to show a speedup.
+# Run from backend/: python -m benchmarks.embedding_pool --texts 4000 --workers 1 2 4 8
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from services.embedding_pool import EmbeddingPool
+from services.embeddings import MODEL_NAME
+
+VOCABULARY = ['project', 'roadmap', 'sprint', 'release', 'backlog', 'estimate', 'risk', 'team', 'review',
+              'deadline', 'scope', 'budget', 'stakeholder', 'metric', 'goal', 'task', 'planning', 'demo',
+              'проект', 'релиз', 'команда', 'оценка', 'риск', 'спринт', 'бюджет', 'цель']
+
+
+def make_texts(count, words, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(VOCABULARY) for _ in range(words)) for _ in range(count)]
+
+
+def max_abs_diff(a, b):
+    return float(np.max(np.abs(np.asarray(a, dtype=np.float32) - np.asarray(b, dtype=np.float32))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--texts', type=int, default=4000)
+    parser.add_argument('--words', type=int, default=70, help='about 100 tokens, the size of a content chunk')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--torch-threads', type=int, default=0, help='per worker, 0 = cores / workers')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--shard-size', type=int, default=64)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, args.words)
+    print(f"{os.cpu_count()} CPUs, {len(texts)} texts of {args.words} words, model {MODEL_NAME}")
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(MODEL_NAME)
+    model.encode(texts[:args.batch_size], batch_size=args.batch_size, show_progress_bar=False)
+    start = time.perf_counter()
+    baseline = model.encode(texts, batch_size=args.batch_size, show_progress_bar=False)
+    baseline_seconds = time.perf_counter() - start
+    baseline_rate = len(texts) / baseline_seconds
+
+    print(f"{'engine':>16} {'threads':>8} {'seconds':>8} {'chunks/s':>9} {'speedup':>8} {'max diff':>9}")
+    print(f"{'in-process':>16} {'-':>8} {baseline_seconds:>8.2f} {baseline_rate:>9.1f} {1.0:>8.2f} {0.0:>9.1e}")
+    for workers in args.workers:
+        pool = EmbeddingPool(MODEL_NAME, workers=workers, torch_threads=args.torch_threads, shard_size=args.shard_size)
+        try:
+            # Worker start-up and model loading are paid once per process and excluded from the timing
+            pool.warm_up()
+            start = time.perf_counter()
+            embeddings = pool.encode(texts, batch_size=args.batch_size)
+            seconds = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        rate = len(texts) / seconds
+        print(f"{f'pool x{workers}':>16} {pool.torch_threads:>8} {seconds:>8.2f} {rate:>9.1f} "
+              f"{rate / baseline_rate:>8.2f} {max_abs_diff(embeddings, baseline):>9.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# Rebuilds the same synthetic workspace twice: once with an empty embedding store and once after
+# clear_collection, when every chunk should come from the store instead of the model.
+# Run from backend/: python -m benchmarks.embedding_store --pages 300 --words 800
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import build_client
+from utils.config import Config
+
+
+def make_documents(pages, words, seed=0):
+    rng = random.Random(seed)
+    vocabulary = ['project', 'roadmap', 'sprint', 'release', 'backlog', 'estimate', 'risk', 'team', 'review',
+                  'deadline', 'scope', 'budget', 'stakeholder', 'metric', 'goal', 'task', 'planning', 'demo']
+    return [{
+        'id': f"page-{i}",
+        'url': f"https://www.notion.so/page{i}",
+        'content': ' '.join(rng.choice(vocabulary) for _ in range(words)),
+        'properties': {'title': f"Page {i}"}
+    } for i in range(pages)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--words', type=int, default=800)
+    parser.add_argument('--simulate-encode-ms', type=float, default=0.0,
+                        help='extra cost per encoded text, for machines where the model is stubbed or on GPU')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    Config.EMBEDDING_STORE_PATH = os.path.join(workdir, 'embeddings.sqlite3')
+    from services.embeddings import EmbeddingService
+    if args.simulate_encode_ms:
+        encode = EmbeddingService._encode
+
+        def slow_encode(self, texts, batch_size=32, coalesce=False):
+            time.sleep(args.simulate_encode_ms / 1000 * len(texts))
+            return encode(self, texts, batch_size, coalesce)
+        EmbeddingService._encode = slow_encode
+    client = build_client(workdir, embedding_service=EmbeddingService(),
+                          EXACT_TITLE_SCORING=False, PAGE_PREFILTER_PAGES=0)
+    documents = make_documents(args.pages, args.words)
+    store = client.embedding_service.store
+
+    print(f"{'run':>16} {'seconds':>8} {'chunks':>7} {'store hits':>11} {'misses':>7}")
+    for name in ('cold rebuild', 'warm rebuild'):
+        client.clear_collection()
+        hits, misses = store.hits, store.misses
+        start = time.perf_counter()
+        chunks = client.add_documents(documents)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>16} {elapsed:>8.1f} {chunks:>7} {store.hits - hits:>11} {store.misses - misses:>7}")
+    print(store.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# Local stand-in for the parts of the Notion API the crawler uses: search and block children.
+# With --nesting every --toggle-every'th block is a toggle whose children sit one level deeper.
+# It enforces its own token-bucket rate limit and answers 429 with Retry-After like Notion does.
+# Run from backend/: python -m benchmarks.fake_notion --pages 500 --port 8765
+# then point the backend at it with NOTION_BASE_URL=http://127.0.0.1:8765
+import argparse
+import math
+import random
+import threading
+import time
+import uuid
+
+from flask import Flask, jsonify, request
+
+
+class ServerLimiter:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        # Returns 0 when the request is allowed, otherwise the seconds until a token is available
+        if self.rate <= 0:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+def make_blocks(rng, children, label, count, nesting, toggle_every, children_per_block):
+    blocks = []
+    for j in range(count):
+        block_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        nested = nesting > 0 and toggle_every and j % toggle_every == 0
+        block_type = 'toggle' if nested else 'paragraph'
+        blocks.append({
+            'object': 'block',
+            'id': block_id,
+            'type': block_type,
+            'has_children': bool(nested),
+            block_type: {'rich_text': [{'plain_text': f"{label}.{j}"}]}
+        })
+        if nested:
+            children[block_id] = make_blocks(
+                rng, children, f"{label}.{j}", children_per_block, nesting - 1, toggle_every, children_per_block
+            )
+    return blocks
+
+
+def make_pages(count, blocks_per_page, nesting=0, toggle_every=5, children_per_block=3, seed=0):
+    # Returns page objects and a map of block id -> children; a page id is also a block id
+    rng = random.Random(seed)
+    pages, children = {}, {}
+    for i in range(count):
+        page_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        pages[page_id] = {
+            'object': 'page',
+            'id': page_id,
+            'last_edited_time': '2024-01-01T00:00:00.000Z',
+            'properties': {'title': {'title': [{'plain_text': f"Page {i}"}]}}
+        }
+        children[page_id] = make_blocks(
+            rng, children, f"Page {i}", blocks_per_page, nesting, toggle_every, children_per_block
+        )
+    return pages, children
+
+
+def create_app(pages=500, blocks_per_page=30, rate=3.0, burst=6.0, latency=0.05, error_rate=0.0,
+               nesting=0, toggle_every=5, children_per_block=3):
+    app = Flask(__name__)
+    data, children = make_pages(pages, blocks_per_page, nesting, toggle_every, children_per_block)
+    page_ids = list(data)
+    limiter = ServerLimiter(rate, burst)
+    stats = {'served': 0, 'rate_limited': 0, 'errors': 0}
+    stats_lock = threading.Lock()
+    app.config['FAKE_NOTION_STATS'] = stats
+    app.config['FAKE_NOTION_PAGES'] = data
+    app.config['FAKE_NOTION_BLOCKS'] = children
+
+    def count(key):
+        with stats_lock:
+            stats[key] += 1
+
+    def error(status, code, message, headers=None):
+        response = jsonify({'object': 'error', 'status': status, 'code': code, 'message': message})
+        response.status_code = status
+        for name, value in (headers or {}).items():
+            response.headers[name] = value
+        return response
+
+    @app.before_request
+    def limit():
+        wait = limiter.take()
+        if wait:
+            count('rate_limited')
+            return error(429, 'rate_limited', 'Rate limited', {'Retry-After': str(math.ceil(wait))})
+        if latency:
+            time.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            count('errors')
+            return error(503, 'service_unavailable', 'Service unavailable')
+        count('served')
+
+    def paginate(items, cursor, page_size):
+        start = int(cursor or 0)
+        end = start + page_size
+        return {
+            'object': 'list',
+            'results': items[start:end],
+            'has_more': end < len(items),
+            'next_cursor': str(end) if end < len(items) else None
+        }
+
+    @app.route('/v1/search', methods=['POST'])
+    def search():
+        body = request.get_json(silent=True) or {}
+        results = [data[p] for p in page_ids]
+        return jsonify(paginate(results, body.get('start_cursor'), int(body.get('page_size', 100))))
+
+    @app.route('/v1/blocks/<block_id>/children', methods=['GET'])
+    def block_children(block_id):
+        blocks = children.get(block_id)
+        if blocks is None:
+            return error(404, 'object_not_found', f"Could not find block with ID: {block_id}")
+        return jsonify(paginate(blocks, request.args.get('start_cursor'), int(request.args.get('page_size', 100))))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--blocks-per-page', type=int, default=30)
+    parser.add_argument('--rate', type=float, default=3.0)
+    parser.add_argument('--burst', type=float, default=6.0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--nesting', type=int, default=0)
+    parser.add_argument('--toggle-every', type=int, default=5)
+    parser.add_argument('--children-per-block', type=int, default=3)
+    args = parser.parse_args()
+    app = create_app(args.pages, args.blocks_per_page, args.rate, args.burst, args.latency, args.error_rate,
+                     args.nesting, args.toggle_every, args.children_per_block)
+    app.run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
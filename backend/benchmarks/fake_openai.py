@@ -0,0 +1,99 @@
+# Local stand-in for the OpenAI embeddings endpoint (POST /v1/embeddings). Vectors are deterministic per
+# text, so callers can check order. Each request sleeps for a fixed latency plus a per-text cost, and a
+# share of requests can fail with 429 or 500 to exercise the client's retries.
+# Run from backend/: python -m benchmarks.fake_openai --port 8766
+# then point the backend at it with EMBEDDING_BACKEND=openai OPENAI_EMBEDDING_BASE_URL=http://127.0.0.1:8766/v1
+import argparse
+import base64
+import hashlib
+import random
+import threading
+import time
+
+import numpy as np
+from flask import Flask, jsonify, request
+
+
+def fake_embedding(text, dimensions):
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def create_app(dimensions=1536, latency=0.15, per_text_latency=0.0005, error_rate=0.0, max_inputs=2048):
+    app = Flask(__name__)
+    stats = {'requests': 0, 'texts': 0, 'errors': 0, 'in_flight': 0, 'max_in_flight': 0}
+    stats_lock = threading.Lock()
+    app.config['FAKE_OPENAI_STATS'] = stats
+    # Vectors are cached so the fake spends its CPU on serving rather than on generating them
+    vectors = {}
+
+    def vector(text, size, encoding):
+        # The SDK asks for base64 (raw float32 bytes) unless the caller picks 'float'
+        key = (text, size, encoding)
+        if key not in vectors:
+            embedding = fake_embedding(text, size)
+            vectors[key] = base64.b64encode(embedding.tobytes()).decode() if encoding == 'base64' else embedding.tolist()
+        return vectors[key]
+
+    def error(status, message, headers=None):
+        response = jsonify({'error': {'message': message, 'type': 'server_error', 'code': None}})
+        response.status_code = status
+        for name, value in (headers or {}).items():
+            response.headers[name] = value
+        return response
+
+    @app.route('/v1/embeddings', methods=['POST'])
+    def embeddings():
+        body = request.get_json(silent=True) or {}
+        inputs = body.get('input') or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not inputs or len(inputs) > max_inputs or any(not text for text in inputs):
+            return error(400, f"input must hold 1 to {max_inputs} non-empty strings")
+        if error_rate and random.random() < error_rate:
+            with stats_lock:
+                stats['errors'] += 1
+            if random.random() < 0.5:
+                return error(429, 'Rate limit reached', {'Retry-After': '0.1'})
+            return error(500, 'The server had an error while processing your request')
+
+        with stats_lock:
+            stats['in_flight'] += 1
+            stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        time.sleep(latency + per_text_latency * len(inputs))
+        size = int(body.get('dimensions') or dimensions)
+        encoding = body.get('encoding_format') or 'float'
+        data = [{'object': 'embedding', 'index': i, 'embedding': vector(text, size, encoding)}
+                for i, text in enumerate(inputs)]
+        # The real API does not promise data in input order, so neither does the fake
+        random.shuffle(data)
+        with stats_lock:
+            stats['in_flight'] -= 1
+            stats['requests'] += 1
+            stats['texts'] += len(inputs)
+        return jsonify({
+            'object': 'list',
+            'data': data,
+            'model': body.get('model'),
+            'usage': {'prompt_tokens': sum(len(text.split()) for text in inputs),
+                      'total_tokens': sum(len(text.split()) for text in inputs)}
+        })
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--dimensions', type=int, default=1536)
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--per-text-latency', type=float, default=0.0005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    app = create_app(args.dimensions, args.latency, args.per_text_latency, args.error_rate)
+    app.run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Compares the old fetch-everything-then-add_documents sync with the streaming IngestPipeline
+# against the local fake Notion server. Embedding is simulated with a fixed cost per text so
+# the overlap between network, encoding and writes shows up in the wall time.
+# Each mode runs in its own process and reports wall time and peak traced memory.
+# Run from backend/: python -m benchmarks.ingest_pipeline --pages 200 --blocks-per-page 60
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import RandomEmbeddingService, build_client
+from benchmarks.fake_notion import create_app
+from benchmarks.notion_crawl import start_server
+from utils.config import Config
+
+
+class SlowEmbeddingService(RandomEmbeddingService):
+    def __init__(self, dim, seconds_per_text):
+        super().__init__(dim)
+        self.seconds_per_text = seconds_per_text
+
+    def generate_embeddings(self, texts, batch_size: int = 32, use_cache: bool = True, use_store: bool = False,
+                            coalesce: bool = False):
+        time.sleep(self.seconds_per_text * len(texts))
+        return super().generate_embeddings(texts, batch_size, use_cache, use_store)
+
+
+async def sync(mode, client):
+    from services.ingest_pipeline import IngestPipeline
+    from services.notion_client import NotionClient
+    async with NotionClient() as notion_client:
+        pages = await notion_client.get_all_pages()
+        if mode == 'batch':
+            documents = await notion_client.get_documents(pages)
+            return len(documents), client.add_documents(documents)
+        pipeline = IngestPipeline(client, notion_client)
+        await pipeline.run(pages)
+        return len(pipeline.documents_seen), pipeline.chunks_added
+
+
+def run_mode(mode, args, port, output):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_app(args.pages, args.blocks_per_page, args.server_rate, args.server_rate * 2, args.latency)
+    server = start_server(app, port)
+    Config.NOTION_API_KEY = 'fake'
+    Config.NOTION_BASE_URL = f"http://127.0.0.1:{port}"
+    Config.NOTION_RATE_LIMIT = args.server_rate
+    Config.NOTION_RATE_BURST = args.server_rate * 2
+    client = build_client(
+        tempfile.mkdtemp(),
+        embedding_service=SlowEmbeddingService(args.dim, args.embed_ms / 1000),
+        LEXICAL_SEARCH=True,
+        EXACT_TITLE_SCORING=False,
+        PAGE_PREFILTER_PAGES=0,
+        VECTOR_BACKEND='chroma'
+    )
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        documents, chunks = asyncio.run(sync(mode, client))
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    output.put({'mode': mode, 'seconds': elapsed, 'peak_mb': peak / 2 ** 20, 'documents': documents, 'chunks': chunks})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--blocks-per-page', type=int, default=60)
+    parser.add_argument('--server-rate', type=float, default=30.0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--embed-ms', type=float, default=2.0, help='simulated encoding cost per text')
+    parser.add_argument('--dim', type=int, default=384)
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} {'seconds':>8} {'peak MB':>8} {'docs':>6} {'chunks':>7}")
+    for mode in ('batch', 'pipeline'):
+        output = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_mode, args=(mode, args, args.port, output))
+        process.start()
+        r = output.get()
+        process.join()
+        print(f"{r['mode']:>9} {r['seconds']:>8.1f} {r['peak_mb']:>8.1f} {r['documents']:>6} {r['chunks']:>7}")
+
+
+if __name__ == '__main__':
+    main()
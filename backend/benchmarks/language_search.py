@@ -0,0 +1,99 @@
+# Compares language-partitioned search with unfiltered search on a synthetic EN/RU/UK corpus.
+# Every topic has a page in each language with nearby embeddings, like translated docs in Notion.
+# Recall@k counts the true top-k pages of the query language found by each mode.
+# Run from backend/: python -m benchmarks.language_search --topics 2000 --queries 200
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import RandomEmbeddingService, build_client, load_synthetic_corpus
+
+LANGUAGES = ['en', 'ru', 'uk']
+
+
+class QueryEmbeddingService(RandomEmbeddingService):
+    def __init__(self, dim):
+        super().__init__(dim)
+        self.queries = {}
+
+    def generate_embeddings(self, texts, batch_size: int = 32, use_cache: bool = True, use_store: bool = False,
+                            coalesce: bool = False):
+        return [self.queries[t.split(' (')[0]].tolist() if t.split(' (')[0] in self.queries else self._embed(t).tolist()
+                for t in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--topics', type=int, default=2000)
+    parser.add_argument('--chunks-per-page', type=int, default=5)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--n-results', type=int, default=10)
+    parser.add_argument('--backend', choices=['chroma', 'exact'], default='chroma')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    embedding_service = QueryEmbeddingService(args.dim)
+    client = build_client(
+        tempfile.mkdtemp(),
+        embedding_service=embedding_service,
+        VECTOR_BACKEND=args.backend,
+        LEXICAL_SEARCH=False,
+        EXACT_TITLE_SCORING=False,
+        PAGE_PREFILTER_PAGES=0,
+        LANGUAGE_PARTITIONED_SEARCH=True
+    )
+
+    topics = rng.standard_normal((args.topics, args.dim)).astype(np.float32)
+    vectors, metadatas, page_vectors, page_languages = [], [], [], []
+    for topic, centre in enumerate(topics):
+        for language in LANGUAGES:
+            source_id = f"page_{topic}_{language}"
+            page = centre + 0.6 * rng.standard_normal(args.dim).astype(np.float32)
+            chunks = page + 0.4 * rng.standard_normal((args.chunks_per_page + 1, args.dim)).astype(np.float32)
+            for i, chunk in enumerate(chunks):
+                vectors.append(chunk)
+                metadatas.append({
+                    'source_id': source_id,
+                    'source_url': f"https://www.notion.so/{source_id}",
+                    'title': source_id,
+                    'chunk_type': 'title' if i == 0 else 'content',
+                    'language': language
+                })
+            chunks /= np.linalg.norm(chunks, axis=1, keepdims=True)
+            page_vectors.append(chunks)
+            page_languages.append(language)
+    load_synthetic_corpus(client, vectors, metadatas)
+
+    page_ids = [m['source_id'] for m in metadatas[::args.chunks_per_page + 1]]
+    queries = []
+    for i in range(args.queries):
+        language = LANGUAGES[i % len(LANGUAGES)]
+        query = topics[rng.integers(args.topics)] + 0.8 * rng.standard_normal(args.dim).astype(np.float32)
+        embedding_service.queries[f"q{i}"] = query
+        unit = query / np.linalg.norm(query)
+        scores = np.array([
+            (chunks @ unit).max() if page_language == language else -np.inf
+            for chunks, page_language in zip(page_vectors, page_languages)
+        ])
+        truth = {page_ids[j] for j in np.argsort(-scores)[:args.n_results]}
+        queries.append((f"q{i}", language, truth))
+
+    for label, language_filter in (('unfiltered', False), ('partitioned', True)):
+        client.search(queries[0][0], n_results=args.n_results, language=queries[0][1] if language_filter else None)
+        timings, recalls = [], []
+        for text, language, truth in queries:
+            start = time.perf_counter()
+            results = client.search(text, n_results=args.n_results, language=language if language_filter else None)
+            timings.append((time.perf_counter() - start) * 1000)
+            found = {r['page_id'] for r in results.get('results', [])}
+            recalls.append(len(found & truth) / len(truth))
+        timings = np.array(timings)
+        print(f"{label:>12}: p50 {np.percentile(timings, 50):7.2f} ms  p95 {np.percentile(timings, 95):7.2f} ms  "
+              f"recall@{args.n_results} {np.mean(recalls):.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Crawls the local fake Notion server with different concurrency and client rate settings
+# and checks that no page is dropped. --nesting adds toggles with nested children, and the block
+# counts show whether nested content was reached. Run from backend/:
+# python -m benchmarks.notion_crawl --pages 200 --concurrency 1 4 8 16 --client-rates 3 0
+# python -m benchmarks.notion_crawl --pages 20 --nesting 3 --concurrency 1 8 --client-rates 0 --server-rate 0
+import argparse
+import asyncio
+import logging
+import threading
+
+from werkzeug.serving import make_server
+
+from benchmarks.fake_notion import create_app
+from utils.config import Config
+
+
+def start_server(app, port):
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+async def crawl():
+    from services.notion_client import NotionClient
+    async with NotionClient() as notion_client:
+        documents = await notion_client.get_all_documents_metadata()
+        return documents, notion_client.get_crawl_report()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--blocks-per-page', type=int, default=150)
+    parser.add_argument('--server-rate', type=float, default=3.0)
+    parser.add_argument('--server-burst', type=float, default=6.0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--nesting', type=int, default=0)
+    parser.add_argument('--client-rates', type=float, nargs='+', default=[3.0, 0.0],
+                        help='client token-bucket rates to compare, 0 disables the client limiter')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    Config.NOTION_API_KEY = Config.NOTION_API_KEY or 'fake'
+    Config.NOTION_BASE_URL = f"http://127.0.0.1:{args.port}"
+    print(f"{'rate':>5} {'conc':>5} {'seconds':>8} {'pages/s':>8} {'req/s':>7} {'retries':>8} "
+          f"{'429s':>6} {'failed':>7} {'docs':>6} {'blocks':>14} {'calls/page':>10} {'s/page':>7}")
+    for client_rate in args.client_rates:
+        for concurrency in args.concurrency:
+            app = create_app(args.pages, args.blocks_per_page, args.server_rate, args.server_burst,
+                             args.latency, args.error_rate, args.nesting)
+            server = start_server(app, args.port)
+            try:
+                Config.NOTION_CONCURRENCY = concurrency
+                Config.NOTION_RATE_LIMIT = client_rate
+                Config.NOTION_RATE_BURST = args.server_burst
+                documents, report = asyncio.run(crawl())
+            finally:
+                server.shutdown()
+            stats = app.config['FAKE_NOTION_STATS']
+            total_blocks = sum(len(blocks) for blocks in app.config['FAKE_NOTION_BLOCKS'].values())
+            page_stats = list(report['page_stats'].values()) or [{'blocks': 0, 'calls': 0, 'seconds': 0.0}]
+            fetched_blocks = sum(p['blocks'] for p in page_stats)
+            calls_per_page = sum(p['calls'] for p in page_stats) / len(page_stats)
+            seconds_per_page = sum(p['seconds'] for p in page_stats) / len(page_stats)
+            print(f"{client_rate:>5g} {concurrency:>5} {report['elapsed_seconds']:>8.1f} "
+                  f"{report['pages_per_second']:>8.2f} {report['requests_per_second']:>7.2f} "
+                  f"{report['retries']:>8} {stats['rate_limited']:>6} {len(report['failed_pages']):>7} "
+                  f"{len(documents):>6}/{args.pages} {fetched_blocks:>7}/{total_blocks:<6} "
+                  f"{calls_per_page:>10.1f} {seconds_per_page:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# Load test for query embeddings: N concurrent clients each send search-style requests (the query and
+# its title variant, as ChromaClient.search does) with the coalescer on and off, and report queries/sec
+# and the p50/p99 latency curve. A single client always runs first: its p50 with the coalescer on minus off
+# is the wait a lone query pays. Ingest batches never go through the coalescer and are not measured here.
+# --model numpy uses the numpy transformer from embedding_batching so it runs without torch;
+# --model service uses the configured model.
+# Run from backend/: python -m benchmarks.query_coalescing --clients 1 4 16 --model service
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.embedding_batching import NumpyEncoder
+from benchmarks.embedding_pool import VOCABULARY
+from services.embeddings import EmbeddingService
+from utils.config import Config
+
+
+def make_queries(count, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 12))) for _ in range(count)]
+
+
+def run_load(service, queries, clients, requests_per_client):
+    latencies = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+
+    def client(index):
+        rng = random.Random(index)
+        barrier.wait()
+        for _ in range(requests_per_client):
+            query = rng.choice(queries)
+            start = time.perf_counter()
+            service.generate_embeddings([query, f"{query} (у назві або темі статті)"], use_cache=False, coalesce=True)
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    timings = [t for client_timings in latencies for t in client_timings]
+    return {
+        'qps': len(timings) / elapsed,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=50, help='per client')
+    parser.add_argument('--model', choices=['numpy', 'service'], default='numpy')
+    parser.add_argument('--wait-ms', type=float, default=Config.EMBEDDING_COALESCE_WAIT_MS)
+    parser.add_argument('--max-batch', type=int, default=Config.EMBEDDING_COALESCE_MAX_BATCH)
+    args = parser.parse_args()
+
+    Config.EMBEDDING_WORKERS = 0
+    Config.EMBEDDING_COALESCE_WAIT_MS = args.wait_ms
+    Config.EMBEDDING_COALESCE_MAX_BATCH = args.max_batch
+    service = EmbeddingService()
+    if args.model == 'numpy':
+        EmbeddingService._model = NumpyEncoder()
+        EmbeddingService._model_loaded = True
+    queries = make_queries(500)
+    service._encode_batches(queries[:16])
+
+    print(f"model {args.model}, {args.requests} requests per client, wait {args.wait_ms} ms, max batch {args.max_batch}")
+    print(f"{'clients':>7} {'coalesce':>9} {'qps':>8} {'p50 ms':>8} {'p99 ms':>8} {'req/batch':>10}")
+    single = {}
+    for clients in [1] + [c for c in args.clients if c != 1]:
+        for coalesce in [False, True]:
+            Config.EMBEDDING_COALESCE = coalesce
+            before = service.batcher.stats()
+            r = run_load(service, queries, clients, args.requests)
+            after = service.batcher.stats()
+            batches = after['batches'] - before['batches']
+            per_batch = (after['requests'] - before['requests']) / batches if batches else 1.0
+            print(f"{clients:>7} {'on' if coalesce else 'off':>9} {r['qps']:>8.1f} {r['p50_ms']:>8.2f} "
+                  f"{r['p99_ms']:>8.2f} {per_batch:>10.2f}")
+            if clients == 1:
+                single[coalesce] = r['p50_ms']
+    print(f"single client: p50 {single[False]:.2f} ms off, {single[True]:.2f} ms on "
+          f"({single[True] - single[False]:+.2f} ms added by the coalescer)")
+
+
+if __name__ == '__main__':
+    main()
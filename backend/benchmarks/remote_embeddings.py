@@ -0,0 +1,96 @@
+# Throughput of the remote (OpenAI-compatible) embedding backend against the local model on an ingest-like
+# title+chunk mix. The remote side is the local fake server, so the numbers show how batching and the
+# concurrency cap hide request latency; every remote vector is checked against the text it belongs to.
+# --model numpy uses the numpy transformer from embedding_batching; --model service the configured model.
+# Run from backend/: python -m benchmarks.remote_embeddings --pages 150 --concurrency 1 4 8 --error-rate 0.05
+import argparse
+import logging
+import threading
+import time
+
+import numpy as np
+from werkzeug.serving import make_server
+
+from benchmarks.embedding_batching import NumpyEncoder, make_ingest_mix
+from benchmarks.fake_openai import create_app, fake_embedding
+from services.embeddings import EmbeddingService
+from services.openai_embedder import OpenAIEmbedder
+from utils.config import Config
+
+
+def start_server(app, port):
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def measure(service, texts, queries):
+    start = time.perf_counter()
+    embeddings = service.generate_embeddings(texts, use_cache=False)
+    bulk_seconds = time.perf_counter() - start
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        service.generate_embeddings([query], use_cache=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return embeddings, len(texts) / bulk_seconds, float(np.percentile(timings, 50))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--pages', type=int, default=150)
+    parser.add_argument('--model', choices=['numpy', 'service'], default='numpy')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--batch-size', type=int, default=Config.OPENAI_EMBEDDING_BATCH_SIZE)
+    parser.add_argument('--dimensions', type=int, default=Config.OPENAI_EMBEDDING_DIMENSIONS)
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--per-text-latency', type=float, default=0.0005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('openai').setLevel(logging.ERROR)
+    logging.getLogger('httpx').setLevel(logging.ERROR)
+    Config.EMBEDDING_WORKERS = 0
+    Config.EMBEDDING_COALESCE = False
+    texts = make_ingest_mix(args.pages)
+    queries = texts[:20]
+    service = EmbeddingService()
+    service.cache = None
+    if args.model == 'numpy':
+        EmbeddingService._model = NumpyEncoder()
+        EmbeddingService._model_loaded = True
+    service.model.encode(texts[:8])
+
+    print(f"{len(texts)} texts from {args.pages} pages; server latency {args.latency * 1000:.0f} ms "
+          f"+ {args.per_text_latency * 1000:.1f} ms/text, error rate {args.error_rate:.0%}")
+    print(f"{'backend':>8} {'conc':>5} {'texts/s':>9} {'query p50 ms':>13} {'requests':>9} {'errors':>7} "
+          f"{'in flight':>10} {'order':>6}")
+    _, throughput, p50 = measure(service, texts, queries)
+    print(f"{args.model:>8} {'-':>5} {throughput:>9.1f} {p50:>13.2f} {'-':>9} {'-':>7} {'-':>10} {'-':>6}")
+
+    expected = np.vstack([fake_embedding(text, args.dimensions) for text in texts])
+    for run, concurrency in enumerate(args.concurrency):
+        port = args.port + run
+        app = create_app(args.dimensions, args.latency, args.per_text_latency, args.error_rate)
+        server = start_server(app, port)
+        embedder = OpenAIEmbedder(
+            'text-embedding-3-small', api_key='fake', base_url=f"http://127.0.0.1:{port}/v1",
+            dimensions=args.dimensions, batch_size=args.batch_size, concurrency=concurrency, max_retries=8
+        )
+        try:
+            EmbeddingService._model = embedder
+            embeddings, throughput, p50 = measure(service, texts, queries)
+            ordered = np.allclose(np.asarray(embeddings, dtype=np.float32), expected, atol=1e-5)
+            stats = app.config['FAKE_OPENAI_STATS']
+            print(f"{'remote':>8} {concurrency:>5} {throughput:>9.1f} {p50:>13.2f} {stats['requests']:>9} "
+                  f"{stats['errors']:>7} {stats['max_in_flight']:>10} {'ok' if ordered else 'FAIL':>6}")
+        finally:
+            embedder.close()
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
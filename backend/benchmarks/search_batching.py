@@ -0,0 +1,180 @@
+# Compares ChromaClient.search with one batched query against the old two-query path, and the vectorized
+# page grouping against the per-chunk loop it replaced (copied below as baseline_group_results_by_page).
+# Run from backend/: python -m benchmarks.search_batching --chunks 20000 --queries 200
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import build_client, load_synthetic_corpus
+
+
+def baseline_group_results_by_page(raw_results, max_pages=10):
+    # ChromaClient._group_results_by_page before batching: one merged row, scored chunk by chunk in Python
+    pages = {}
+    distances = raw_results.get('distances', [[]])[0]
+    metadatas = raw_results.get('metadatas', [[]])[0]
+    documents = raw_results.get('documents', [[]])[0]
+
+    for i, metadata in enumerate(metadatas):
+        if i >= len(distances) or i >= len(documents):
+            continue
+        source_id = metadata.get('source_id')
+        if not source_id:
+            continue
+        similarity = 1.0 / (1.0 + float(distances[i]))
+        chunk_type = metadata.get('chunk_type', 'content')
+        if source_id not in pages:
+            pages[source_id] = {
+                'url': metadata.get('source_url', ''),
+                'title': metadata.get('title', 'Untitled'),
+                'page_id': source_id,
+                'title_similarity': 0.0,
+                'content_similarities': [],
+                'language': metadata.get('language', 'unknown'),
+                'full_content': metadata.get('full_content', '')
+            }
+        if chunk_type == 'title':
+            pages[source_id]['title_similarity'] = max(pages[source_id]['title_similarity'], similarity)
+        elif chunk_type == 'content':
+            pages[source_id]['content_similarities'].append(similarity)
+
+    final_results = []
+    for page_id, p in pages.items():
+        title_similarity = p['title_similarity']
+        content_similarities = sorted(p['content_similarities'], reverse=True)
+        chunk_count = len(content_similarities)
+        if chunk_count == 0:
+            best_content_similarity = 0.0
+        elif chunk_count == 1:
+            best_content_similarity = content_similarities[0]
+        elif chunk_count <= 5:
+            best_content_similarity = sum(content_similarities[:chunk_count]) / chunk_count
+        elif chunk_count < 10:
+            best_content_similarity = sum(content_similarities[:3]) / 3.0
+        else:
+            best_content_similarity = sum(content_similarities[:5]) / 5.0
+        if chunk_count < 3:
+            title_weight = 2.0
+        elif chunk_count < 10:
+            title_weight = 3.0
+        else:
+            title_weight = 4.0
+        if title_similarity > 0.6:
+            title_bonus = 1 + (title_similarity - 0.6) * 2.0
+        elif title_similarity > 0.5:
+            title_bonus = 1 + (title_similarity - 0.5) * 1.0
+        else:
+            title_bonus = 1.0
+        raw_score = ((best_content_similarity * title_bonus) + (title_similarity * title_weight)) / (title_weight + 1)
+        match_type = 'none'
+        if title_similarity >= best_content_similarity and title_similarity > 0:
+            match_type = 'title'
+        elif best_content_similarity > 0:
+            match_type = 'content'
+        final_results.append({
+            'page_id': page_id,
+            'url': p['url'],
+            'title': p['title'],
+            'raw_score': raw_score,
+            'title_similarity': round(title_similarity, 4),
+            'content_similarity': round(best_content_similarity, 4),
+            'content_snippet': p['full_content'],
+            'language': p['language'],
+            'match_type': match_type
+        })
+
+    if not final_results:
+        return {'results': [], 'total_pages': 0}
+    min_score = min(r['raw_score'] for r in final_results)
+    max_score = max(r['raw_score'] for r in final_results)
+    for r in final_results:
+        r['relevance_score'] = round((r['raw_score'] - min_score) / (max_score - min_score), 4) if max_score != min_score else 0.0
+    final_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+    return {'results': final_results[:max_pages], 'total_pages': len(final_results)}
+
+
+def merge_rows(raw_results):
+    # The old search concatenated the two single-query results into one row
+    metadatas = [m for row in raw_results['metadatas'] for m in row]
+    return {
+        'metadatas': [metadatas],
+        'distances': [[d for row in raw_results['distances'] for d in row]],
+        'documents': [[''] * len(metadatas)]
+    }
+
+
+def time_grouping(group, raw_results, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        grouped = group(raw_results)
+    return (time.perf_counter() - start) * 1000 / calls, [r['page_id'] for r in grouped['results']]
+
+
+def time_search(client, batched, queries, n_results):
+    client.batched_search = batched
+    timings = []
+    for i in range(queries):
+        start = time.perf_counter()
+        client.search(f"query {i}", n_results=n_results)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--n-results', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    client = build_client(
+        tempfile.mkdtemp(),
+        LEXICAL_SEARCH=False,
+        EXACT_TITLE_SCORING=False,
+        PAGE_PREFILTER_PAGES=0,
+        VECTOR_BACKEND='chroma'
+    )
+    page_ids = rng.integers(0, args.pages, args.chunks)
+    load_synthetic_corpus(
+        client,
+        rng.standard_normal((args.chunks, args.dim)),
+        [{
+            'source_id': f"page_{page}",
+            'source_url': f"https://www.notion.so/page_{page}",
+            'title': f"Page {page}",
+            'chunk_type': 'title' if i % 20 == 0 else 'content',
+            'language': 'en'
+        } for i, page in enumerate(page_ids)]
+    )
+    time_search(client, True, 10, args.n_results)
+
+    for label, batched in (('two queries', False), ('batched', True)):
+        timings = time_search(client, batched, args.queries, args.n_results)
+        print(f"{label:>12}: p50 {np.percentile(timings, 50):7.2f} ms  "
+              f"p95 {np.percentile(timings, 95):7.2f} ms  mean {timings.mean():7.2f} ms")
+
+    # Both groupings run on the same two result rows, the old one in the merged shape it expected
+    raw_results = client.collection.query(
+        query_embeddings=client.embedding_service.generate_embeddings(["a", "b"]),
+        n_results=min(args.n_results * 5, 100),
+        include=["metadatas", "distances"]
+    )
+    merged = merge_rows(raw_results)
+    baseline_ms, baseline_pages = time_grouping(
+        lambda raw: baseline_group_results_by_page(raw, args.n_results), merged, args.queries
+    )
+    vectorized_ms, vectorized_pages = time_grouping(
+        lambda raw: client._group_results_by_page(raw, args.n_results), raw_results, args.queries
+    )
+    print(f"grouping loop: {baseline_ms:7.3f} ms per call")
+    print(f"   vectorized: {vectorized_ms:7.3f} ms per call ({baseline_ms / vectorized_ms:.1f}x), "
+          f"same pages in the same order: {'yes' if baseline_pages == vectorized_pages else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# RSS of the old layout (one ChromaClient per blueprint plus a lingua detector per service) against the
+# shared service registry. Every layout runs in a fresh process over the same synthetic collection.
+# Run from backend/: python -m benchmarks.service_memory --chunks 20000 --clients 5 --detectors 3
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+
+from benchmarks.collection_scan import make_corpus
+from benchmarks.common import build_client, configure, load_synthetic_corpus
+from benchmarks.embedding_pool import make_texts
+from services.registry import rss_mb
+
+
+def prepare(workdir, chunks, dim, vector_backend):
+    client = build_client(workdir, VECTOR_BACKEND=vector_backend)
+    vectors, metadatas = make_corpus(chunks, chunks_per_page=10, dim=dim)
+    load_synthetic_corpus(client, vectors, metadatas, documents=make_texts(chunks, 60))
+
+
+def build_lingua():
+    from lingua import Language, LanguageDetectorBuilder
+    detector = LanguageDetectorBuilder.from_languages(Language.ENGLISH, Language.RUSSIAN, Language.UKRAINIAN).build()
+    detector.detect_language_of('warm up')
+    return detector
+
+
+def run_layout(layout, workdir, clients, detectors, vector_backend, output):
+    configure(workdir, VECTOR_BACKEND=vector_backend)
+    from services.chroma_client import ChromaClient
+    from services.registry import registry
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    held = []
+    if layout == 'per-blueprint':
+        for _ in range(clients):
+            held.append(ChromaClient())
+        for _ in range(detectors):
+            try:
+                held.append(build_lingua())
+            except Exception:
+                pass
+    else:
+        held = [registry.chroma_client for _ in range(clients)]
+        for _ in range(detectors):
+            detector = registry.language_detector
+            if detector is not None:
+                detector.detect_language_of('warm up')
+                held.append(detector)
+    output.put({
+        'layout': layout,
+        'instances': len({id(obj) for obj in held}),
+        'build_s': time.perf_counter() - start,
+        'rss_mb': rss_mb() - base_rss
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--clients', type=int, default=5, help='blueprints that used to own a ChromaClient')
+    parser.add_argument('--detectors', type=int, default=3, help='lingua detectors built by the old layout')
+    parser.add_argument('--vector-backend', default='exact', choices=['chroma', 'exact'])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='service_memory_')
+    try:
+        prepare(workdir, args.chunks, args.dim, args.vector_backend)
+        print(f"{args.chunks} chunks, {args.clients} clients, {args.detectors} detectors, "
+              f"vector backend {args.vector_backend}")
+        print(f"{'layout':>14} {'instances':>10} {'build s':>8} {'RSS MB':>8}")
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        for layout in ['per-blueprint', 'registry']:
+            output = context.Queue()
+            process = context.Process(
+                target=run_layout,
+                args=(layout, workdir, args.clients, args.detectors, args.vector_backend, output)
+            )
+            process.start()
+            r = output.get()
+            process.join()
+            results[layout] = r
+            print(f"{r['layout']:>14} {r['instances']:>10} {r['build_s']:>8.2f} {r['rss_mb']:>8.1f}")
+        saved = results['per-blueprint']['rss_mb'] - results['registry']['rss_mb']
+        share = saved / results['per-blueprint']['rss_mb'] if results['per-blueprint']['rss_mb'] else 0.0
+        print(f"saved {saved:.1f} MB ({share:.0%})")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# Compares the Chroma HNSW path with the in-process exact index (VECTOR_BACKEND=exact).
+# Each backend/size pair runs in its own process so RSS numbers do not bleed into each other.
+# Run from backend/: python -m benchmarks.vector_backends --sizes 5000 20000 50000
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+
+def make_corpus(size, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(size // 50, 1), dim))
+    vectors = centers[rng.integers(0, len(centers), size)] + 0.6 * rng.standard_normal((size, dim))
+    queries = centers[rng.integers(0, len(centers), 200)] + 0.6 * rng.standard_normal((200, dim))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_backend(backend, size, dim, k, dtype, output):
+    vectors, queries = make_corpus(size, dim)
+    ids = [f"chunk_{i}" for i in range(size)]
+    metadatas = [{'source_id': f"page_{i // 20}", 'chunk_type': 'content'} for i in range(size)]
+    workdir = tempfile.mkdtemp()
+    base_rss = rss_mb()
+
+    start = time.perf_counter()
+    if backend == 'chroma':
+        import chromadb
+        collection = chromadb.PersistentClient(path=workdir).get_or_create_collection(
+            name="benchmark_vector_backends",
+            metadata={"hnsw:space": "cosine"}
+        )
+        for i in range(0, size, 5000):
+            collection.add(ids=ids[i:i + 5000], embeddings=vectors[i:i + 5000], metadatas=metadatas[i:i + 5000])
+
+        def query(q):
+            return collection.query(query_embeddings=[q], n_results=k, include=["distances"])['ids'][0]
+    else:
+        from services.vector_index import ExactVectorIndex
+        index = ExactVectorIndex(workdir, dtype=dtype)
+        index.add(ids, vectors, metadatas)
+
+        def query(q):
+            return index.query([q], n_results=k)['ids'][0]
+    build_time = time.perf_counter() - start
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    timings, recalls = [], []
+    for q in queries:
+        truth = {ids[i] for i in np.argsort(-(normalized @ (q / np.linalg.norm(q))))[:k]}
+        start = time.perf_counter()
+        found = query(q)
+        timings.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(truth & set(found)) / k)
+
+    output.put({
+        'backend': backend if backend == 'chroma' else f"exact/{dtype}",
+        'size': size,
+        'build_s': build_time,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'recall': float(np.mean(recalls)),
+        'rss_mb': rss_mb() - base_rss
+    })
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 50000])
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--k', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'backend':>14} {'chunks':>8} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9} {'RSS MB':>8}")
+    for size in args.sizes:
+        for backend, dtype in (('chroma', None), ('exact', 'float32'), ('exact', 'float16')):
+            output = multiprocessing.Queue()
+            process = multiprocessing.Process(target=run_backend, args=(backend, size, args.dim, args.k, dtype, output))
+            process.start()
+            r = output.get()
+            process.join()
+            print(f"{r['backend']:>14} {r['size']:>8} {r['build_s']:>8.1f} {r['p50_ms']:>8.2f} "
+                  f"{r['p95_ms']:>8.2f} {r['recall']:>9.3f} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
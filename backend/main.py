@@ -1,11 +1,12 @@
+from services.startup import startup
 from flask import Flask
 from flask_cors import CORS
-from services.chroma_client import ChromaClient
-from services.ai_engine import AIEngine
+from services.registry import registry
 from routes.ask import ask_blueprint
 from routes.notion import notion_blueprint
 from routes.health import health_blueprint
 from routes.conversations import conversations_bp
+from utils.config import Config
 import os
 
 app = Flask(__name__)
@@ -19,9 +20,6 @@ CORS(app,
      allow_headers=["*"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
-chroma_client = ChromaClient()
-ai_engine = AIEngine()
-
 db_initialized = False
 
 app.register_blueprint(ask_blueprint, url_prefix='/api')
@@ -29,16 +27,32 @@ app.register_blueprint(notion_blueprint, url_prefix='/api')
 app.register_blueprint(health_blueprint, url_prefix='/api')
 app.register_blueprint(conversations_bp, url_prefix='/api')
 
+registry.sync_runner.start_scheduler()
+
 if os.environ.get('FLASK_ENV') == 'development':
     from routes.search import search_blueprint
     from routes.chroma import chroma_blueprint    
     from routes.notion_parsed import notion_parsed_blueprint
     from routes.embeddings_info import embeddings_blueprint
+    from routes.cache import cache_blueprint
     
     app.register_blueprint(search_blueprint, url_prefix='/api')
     app.register_blueprint(chroma_blueprint, url_prefix='/api')
     app.register_blueprint(notion_parsed_blueprint, url_prefix='/api')
     app.register_blueprint(embeddings_blueprint, url_prefix='/api')
+    app.register_blueprint(cache_blueprint, url_prefix='/api')
+
+startup.mark('app_created')
+
+# The app serves right away; models, Chroma and detectors load in the background instead of on the first question
+if Config.WARMUP_ON_START:
+    startup.start_warmup([
+        ('chroma_client', lambda: registry.chroma_client),
+        ('embedding_model', lambda: registry.embedding_service.generate_embeddings(['warm up'], use_cache=False)),
+        ('language_detector', lambda: registry.language_detector),
+        ('tokenizer', lambda: registry.chroma_client.tokenizer.encode('warm up')),
+        ('ai_engine', lambda: registry.ai_engine.client)
+    ])
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from services.registry import registry
+
+cache_blueprint = Blueprint('cache', __name__)
+
+@cache_blueprint.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        'embeddings': registry.embedding_service.get_cache_stats(),
+        'embedding_store': registry.embedding_service.get_store_stats(),
+        'normalization': registry.ai_engine.get_normalization_cache_stats(),
+        'answers': registry.ai_engine.get_answer_cache_stats()
+    })
+
+@cache_blueprint.route('/cache/embeddings', methods=['DELETE'])
+def clear_embedding_cache():
+    embedding_service = registry.embedding_service
+    if embedding_service.cache is not None:
+        embedding_service.cache.clear()
+    return jsonify({'status': 'success', 'embeddings': embedding_service.get_cache_stats()})
+
+@cache_blueprint.route('/cache/embedding_store', methods=['DELETE'])
+def clear_embedding_store():
+    embedding_service = registry.embedding_service
+    if embedding_service.store is not None:
+        embedding_service.store.clear()
+    return jsonify({'status': 'success', 'embedding_store': embedding_service.get_store_stats()})
+
+@cache_blueprint.route('/cache/normalization', methods=['DELETE'])
+def purge_normalization_cache():
+    expired_only = request.args.get('expired_only', 'false').lower() == 'true'
+    purged = registry.ai_engine.purge_normalization_cache(expired_only=expired_only)
+    return jsonify({
+        'status': 'success',
+        'purged_entries': purged,
+        'normalization': registry.ai_engine.get_normalization_cache_stats()
+    })
+
+@cache_blueprint.route('/cache/answers', methods=['DELETE'])
+def clear_answer_cache():
+    registry.ai_engine.answer_cache.invalidate()
+    return jsonify({'status': 'success', 'answers': registry.ai_engine.get_answer_cache_stats()})
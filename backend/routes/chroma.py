@@ -1,8 +1,7 @@
 from flask import Blueprint, request, jsonify
-from services.chroma_client import ChromaClient
+from services.registry import registry
 
 chroma_blueprint = Blueprint('chroma', __name__)
-chroma_client = ChromaClient()
 
 @chroma_blueprint.route('/chroma', methods=['GET'])
 def search_documents():
@@ -10,7 +9,7 @@ def search_documents():
     if not query:
         return jsonify({'error': 'Query parameter "q" is required'})
 
-    search_results = chroma_client.search(query, n_results=10)
+    search_results = registry.chroma_client.search(query, n_results=10)
     
     if not search_results or not search_results['results']:
         return jsonify({
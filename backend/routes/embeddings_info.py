@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify
-from services.embeddings import EmbeddingService
+from services.registry import registry
+from services.onnx_embedder import OnnxEmbedder
+from services.openai_embedder import OpenAIEmbedder
 import time
 import asyncio
 
@@ -15,8 +17,14 @@ def run_async(coro):
 
 @embeddings_blueprint.route('/embeddings/model_info', methods=['GET'])
 def get_model_details():
-    embedding_service = EmbeddingService()
+    embedding_service = registry.embedding_service
     model = embedding_service.model
+    if isinstance(model, (OnnxEmbedder, OpenAIEmbedder)):
+        return jsonify({
+            **model.info(),
+            'embedding_pool': embedding_service.get_pool_stats(),
+            'query_batcher': embedding_service.get_batcher_stats()
+        })
 
     actual_model_name = getattr(model._modules['0'].auto_model.config, 'name_or_path', None)
     
@@ -33,7 +41,9 @@ def get_model_details():
         'num_attention_heads': config.num_attention_heads,
         'model_type': config.model_type,
         'tokenizer_type': model.tokenizer.__class__.__name__,
-        'pooling_method': str(model._modules['1'])
+        'pooling_method': str(model._modules['1']),
+        'embedding_pool': embedding_service.get_pool_stats(),
+        'query_batcher': embedding_service.get_batcher_stats()
     }
 
     sample_text = "This is a test sentence for tokenization."
@@ -57,7 +67,7 @@ def test_hybrid_embeddings():
         async with NotionClient() as notion_client:
             documents = await notion_client.get_all_documents_metadata()
             
-            embedding_service = EmbeddingService()
+            embedding_service = registry.embedding_service
 
             embeddings_data = embedding_service.generate_hybrid_embeddings(documents)
 
@@ -1,7 +1,17 @@
 from flask import Blueprint, jsonify
+from services.startup import startup
+from services.registry import registry
 
 health_blueprint = Blueprint('health', __name__)
 
 @health_blueprint.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'ok', 'message': 'PM Assistant API is running'})
+
+@health_blueprint.route('/health/startup', methods=['GET'])
+def startup_report():
+    return jsonify(startup.report())
+
+@health_blueprint.route('/health/services', methods=['GET'])
+def services_report():
+    return jsonify(registry.memory_report())
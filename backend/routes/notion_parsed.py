@@ -36,7 +36,8 @@ def get_parsed_documents():
             
             return jsonify({
                 'total_count': len(parsed_documents),
-                'execution_time': execution_time,                
+                'execution_time': execution_time,
+                'crawl_report': notion_client.get_crawl_report(),
                 'documents': parsed_documents                
             })
         finally:
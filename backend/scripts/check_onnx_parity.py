@@ -0,0 +1,81 @@
+# Compares ONNX (fp32 and int8) embeddings with the torch model on multilingual sample text and fails
+# when the cosine similarity or the nearest-neighbour agreement drops below the thresholds.
+# Run from backend/: python -m scripts.check_onnx_parity [--model-dir DIR]
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from services.embeddings import MODEL_NAME
+from services.onnx_embedder import QUANTIZED_MODEL_FILE, OnnxEmbedder
+from utils.config import Config
+
+SAMPLES = [
+    'How do we estimate tasks during sprint planning?',
+    'Release checklist for the mobile application',
+    'Who approves the project budget and how often is it reviewed?',
+    'Как оценивать задачи на планировании спринта?',
+    'Чек-лист релиза мобильного приложения',
+    'Кто утверждает бюджет проекта и как часто он пересматривается?',
+    'Як оцінювати задачі на плануванні спринту?',
+    'Ретроспектива: що пішло добре, а що варто покращити',
+    'Roadmap',
+    'Риски',
+    'The stakeholder review is moved to Thursday because the demo environment is not ready yet, '
+    'so the team will use the extra day to fix the remaining blockers in the backlog.',
+    'Команда переносит демо на четверг: тестовое окружение ещё не готово, а оставшиеся блокеры из бэклога '
+    'нужно закрыть до встречи с заказчиком. ' * 4,
+]
+
+
+def cosine_rows(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def neighbour_agreement(a, b):
+    # Share of texts whose nearest other text is the same under both models
+    def nearest(x):
+        x = x / np.linalg.norm(x, axis=1, keepdims=True)
+        scores = x @ x.T
+        np.fill_diagonal(scores, -np.inf)
+        return scores.argmax(axis=1)
+    return float(np.mean(nearest(a) == nearest(b)))
+
+
+def check(model_dir, quantized=True, min_cosine=0.999, min_cosine_int8=0.98, min_agreement=0.9) -> bool:
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(MODEL_NAME, device='cpu').encode(SAMPLES, convert_to_numpy=True)
+
+    variants = [('onnx', False, min_cosine)]
+    if quantized and os.path.exists(os.path.join(model_dir, QUANTIZED_MODEL_FILE)):
+        variants.append(('onnx-int8', True, min_cosine_int8))
+
+    passed = True
+    print(f"{'backend':>10} {'min cos':>8} {'mean cos':>9} {'nn agree':>9} {'status':>7}")
+    for name, is_quantized, threshold in variants:
+        embeddings = OnnxEmbedder(model_dir, quantized=is_quantized).encode(SAMPLES)
+        cosines = cosine_rows(reference, embeddings)
+        agreement = neighbour_agreement(reference, embeddings)
+        ok = cosines.min() >= threshold and agreement >= min_agreement
+        passed = passed and ok
+        print(f"{name:>10} {cosines.min():>8.5f} {cosines.mean():>9.5f} {agreement:>9.2f} {'ok' if ok else 'FAIL':>7}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-dir', default=Config.EMBEDDING_ONNX_PATH)
+    parser.add_argument('--min-cosine', type=float, default=0.999)
+    parser.add_argument('--min-cosine-int8', type=float, default=0.98)
+    parser.add_argument('--min-agreement', type=float, default=0.9)
+    args = parser.parse_args()
+    ok = check(args.model_dir, min_cosine=args.min_cosine, min_cosine_int8=args.min_cosine_int8,
+               min_agreement=args.min_agreement)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
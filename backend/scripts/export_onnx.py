@@ -0,0 +1,99 @@
+# Exports the sentence-transformer to ONNX (and a dynamically quantized int8 copy) for EMBEDDING_BACKEND=onnx,
+# then checks cosine parity against the torch model. Needs torch and sentence-transformers; serving does not.
+# Run from backend/: python -m scripts.export_onnx [--output DIR] [--no-quantize]
+import argparse
+import json
+import os
+import sys
+
+from services.embeddings import MODEL_NAME
+from services.onnx_embedder import EXPORT_CONFIG, MODEL_FILE, QUANTIZED_MODEL_FILE
+from utils.config import Config
+
+
+def export(output_dir, opset):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(MODEL_NAME, device='cpu')
+    transformer = model[0]
+    auto_model = transformer.auto_model.eval()
+    pooling = model[1]
+    if not getattr(pooling, 'pooling_mode_mean_tokens', False):
+        raise ValueError(f"{MODEL_NAME} does not use mean pooling, OnnxEmbedder would not match it")
+
+    class Encoder(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = model.tokenizer(['export sample', 'пример для экспорта модели'], padding=True, return_tensors='pt')
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(auto_model),
+            (sample['input_ids'], sample['attention_mask']),
+            os.path.join(output_dir, MODEL_FILE),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['last_hidden_state'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'last_hidden_state': {0: 'batch', 1: 'sequence'}
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False
+        )
+
+    model.tokenizer.save_pretrained(output_dir)
+    config = {
+        'model_name': MODEL_NAME,
+        'dimension': model.get_sentence_embedding_dimension(),
+        'max_seq_length': transformer.max_seq_length,
+        'pad_token': model.tokenizer.pad_token,
+        'normalize': any(type(module).__name__ == 'Normalize' for module in model),
+        'opset': opset
+    }
+    with open(os.path.join(output_dir, EXPORT_CONFIG), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+def quantize(output_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(
+        os.path.join(output_dir, MODEL_FILE),
+        os.path.join(output_dir, QUANTIZED_MODEL_FILE),
+        weight_type=QuantType.QInt8
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default=Config.EMBEDDING_ONNX_PATH)
+    parser.add_argument('--opset', type=int, default=17)
+    parser.add_argument('--no-quantize', action='store_true')
+    parser.add_argument('--skip-parity', action='store_true')
+    args = parser.parse_args()
+
+    config = export(args.output, args.opset)
+    print(f"Exported {MODEL_NAME} to {os.path.join(args.output, MODEL_FILE)}: {config}")
+    if not args.no_quantize:
+        quantize(args.output)
+        print(f"Quantized int8 model: {os.path.join(args.output, QUANTIZED_MODEL_FILE)}")
+    for name in (MODEL_FILE, QUANTIZED_MODEL_FILE):
+        path = os.path.join(args.output, name)
+        if os.path.exists(path):
+            print(f"{name}: {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+    if not args.skip_parity:
+        from scripts.check_onnx_parity import check
+        sys.exit(0 if check(args.output, quantized=not args.no_quantize) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+# Moves page text from the legacy per-chunk 'full_content' metadata into the page store.
+# Run from backend/: python -m scripts.migrate_page_store
+import json
+
+from services.chroma_client import ChromaClient
+
+
+def main():
+    chroma_client = ChromaClient()
+    result = chroma_client.migrate_full_content_to_page_store()
+    result['page_store'] = chroma_client.page_store.stats()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Import-time profile of the app (python -X importtime) with a budget, so slow or heavy imports at startup
+# are caught before they ship. Exits 1 when the budget is exceeded or a heavy module is imported eagerly.
+# Run from backend/: python -m scripts.startup_report [--max-seconds 3] [--allow-heavy]
+import argparse
+import json
+import sys
+
+from services.startup import import_time_report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--max-seconds', type=float, default=0.0, help='fail when importing takes longer, 0 = no limit')
+    parser.add_argument('--allow-heavy', action='store_true', help='do not fail when torch, chromadb, lingua... are imported')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    report = import_time_report(args.module, top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {report['module']}: {report['import_seconds']:.2f}s of imports, "
+              f"{report['wall_seconds']:.2f}s wall, {report['modules_imported']} modules")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for entry in report['slowest']:
+            print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {'  ' * entry['depth']}{entry['module']}")
+        print(f"heavy modules imported at startup: {', '.join(report['heavy_modules_imported']) or 'none'}")
+
+    failures = []
+    if report['returncode']:
+        failures.append(f"import failed: {report['error']}")
+    if args.max_seconds and report['import_seconds'] > args.max_seconds:
+        failures.append(f"imports took {report['import_seconds']:.2f}s, budget {args.max_seconds:.2f}s")
+    if report['heavy_modules_imported'] and not args.allow_heavy:
+        failures.append(f"heavy modules imported eagerly: {', '.join(report['heavy_modules_imported'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
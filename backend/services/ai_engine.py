@@ -1,20 +1,47 @@
-from openai import AsyncOpenAI
 from utils.config import Config
-from lingua import Language, LanguageDetectorBuilder
+from services.cache import PersistentCache
+from services.answer_cache import answer_cache
+from services.language import get_language_detector
 import asyncio
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
 
 class AIEngine:
+    REPLAY_CHUNK_SIZE = 40
+    _normalization_cache = None
+
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
-        self.language_detector = LanguageDetectorBuilder.from_languages(
-            Language.ENGLISH, Language.RUSSIAN, Language.UKRAINIAN
-        ).build()
+        self._client = None
+        if AIEngine._normalization_cache is None and Config.NORMALIZATION_CACHE_SIZE > 0:
+            AIEngine._normalization_cache = PersistentCache(
+                Config.NORMALIZATION_CACHE_PATH,
+                table='normalized_queries',
+                memory_size=Config.NORMALIZATION_CACHE_SIZE,
+                ttl=Config.NORMALIZATION_CACHE_TTL
+            )
+        self.normalization_cache = AIEngine._normalization_cache
+        self.answer_cache = answer_cache
+
+    # The OpenAI SDK is only loaded when the first question needs it; the language detector is shared
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+        return self._client
+
+    @property
+    def language_detector(self):
+        return get_language_detector()
       
-    async def generate_answer(self, query, search_results, history=None):
-        language_task = asyncio.create_task(self._detect_language_async(query))
-        context_task = asyncio.create_task(self._extract_context_async(search_results))
-        
-        language, context_text = await asyncio.gather(language_task, context_task)
+    async def generate_answer(self, query, search_results, history=None, query_embedding=None, language=None):
+        language, context_text = await self._language_and_context(query, search_results, language)
+
+        cached_answer = self.answer_cache.lookup(query_embedding, language, history)
+        if cached_answer is not None:
+            return cached_answer
         
         system_prompt = self._create_system_prompt(language)
         user_prompt = self._create_user_prompt(query, context_text, language)
@@ -38,10 +65,20 @@ class AIEngine:
                 temperature=0.5,
                 max_tokens=1500,
             )
-            return response.choices[0].message.content
+            answer = response.choices[0].message.content
+            self.answer_cache.store(query_embedding, language, history, answer)
+            return answer
         except Exception as e:
             return f"Sorry, I encountered an error: {str(e)}"
     
+    async def _language_and_context(self, query, search_results, language=None):
+        # Routes that already detected the language for search pass it in
+        if language is not None:
+            return language, await self._extract_context_async(search_results)
+        language_task = asyncio.create_task(self._detect_language_async(query))
+        context_task = asyncio.create_task(self._extract_context_async(search_results))
+        return await asyncio.gather(language_task, context_task)
+
     async def _extract_context_async(self, search_results, max_chunks=5, max_chars=25000):
         return self._extract_context_from_search(search_results, max_chunks, max_chars)
     
@@ -66,18 +103,20 @@ class AIEngine:
         return "\n\n".join(context_parts)
     
     async def _detect_language_async(self, text):
-        return self._detect_language(text)
+        return self.detect_language(text)
     
-    def _detect_language(self, text):
+    def detect_language(self, text):
         try:
             language = self.language_detector.detect_language_of(text)
-            if language == Language.RUSSIAN:
+            code = language.iso_code_639_1.name if language else None
+            if code == 'RU':
                 return 'russian'
-            elif language == Language.UKRAINIAN:
+            elif code == 'UK':
                 return 'ukrainian'
             else:
                 return 'english'
-        except:
+        except Exception as e:
+            logger.warning(f"Language detection failed, answering in English: {e}")
             return 'english'
     
     def _create_system_prompt(self, language):
@@ -110,11 +149,14 @@ class AIEngine:
         }
         return prompts.get(language, prompts['english'])
     
-    async def generate_answer_stream(self, query, search_results, history=None):
-        language_task = asyncio.create_task(self._detect_language_async(query))
-        context_task = asyncio.create_task(self._extract_context_async(search_results))
-        
-        language, context_text = await asyncio.gather(language_task, context_task)
+    async def generate_answer_stream(self, query, search_results, history=None, query_embedding=None, language=None):
+        language, context_text = await self._language_and_context(query, search_results, language)
+
+        cached_answer = self.answer_cache.lookup(query_embedding, language, history)
+        if cached_answer is not None:
+            for i in range(0, len(cached_answer), self.REPLAY_CHUNK_SIZE):
+                yield cached_answer[i:i + self.REPLAY_CHUNK_SIZE]
+            return
         
         system_prompt = self._create_system_prompt(language)
         user_prompt = self._create_user_prompt(query, context_text, language)
@@ -140,35 +182,27 @@ class AIEngine:
                 stream=True
             )
             
+            answer_parts = []
             async for chunk in stream:
                 if chunk.choices[0].delta.content:
+                    answer_parts.append(chunk.choices[0].delta.content)
                     yield chunk.choices[0].delta.content
+
+            self.answer_cache.store(query_embedding, language, history, "".join(answer_parts))
                     
         except Exception as e:
             yield f"Sorry, I encountered an error: {str(e)}"
 
     async def normalize_query(self, original_query: str) -> str:
         language = await self._detect_language_async(original_query)
-        normalization_prompt = self._create_normalization_prompt(language)
-        
-        full_prompt = f"{normalization_prompt}\n\nЗапрос: \"{original_query}\"\n\nНормализованный запрос:"
-        
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": full_prompt}],
-                temperature=0.1,
-                max_tokens=200
-            )
-            
-            normalized = response.choices[0].message.content.strip()
-            return normalized if normalized else original_query
-            
-        except Exception as e:
-            return original_query
 
-    async def normalize_query(self, original_query: str) -> str:
-        language = await self._detect_language_async(original_query)
+        cache_key = None
+        if self.normalization_cache is not None:
+            cache_key = hashlib.sha256(f"{language}\n{original_query.strip()}".encode()).hexdigest()
+            cached = self.normalization_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         normalization_prompt = self._create_normalization_prompt(language)
         
         full_prompt = f"{normalization_prompt}\n\nЗапрос: \"{original_query}\"\n\nНормализованный запрос:"
@@ -185,12 +219,28 @@ class AIEngine:
   
             if normalized.startswith('"') and normalized.endswith('"'):
                 normalized = normalized[1:-1].strip()
+
+            if normalized and cache_key:
+                self.normalization_cache.set(cache_key, normalized)
                 
             return normalized if normalized else original_query
                 
         except Exception as e:
             return original_query
 
+    def get_normalization_cache_stats(self):
+        if self.normalization_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.normalization_cache.stats()}
+
+    def get_answer_cache_stats(self):
+        return self.answer_cache.stats()
+
+    def purge_normalization_cache(self, expired_only: bool = False) -> int:
+        if self.normalization_cache is None:
+            return 0
+        return self.normalization_cache.purge(expired_only=expired_only)
+
     def _create_normalization_prompt(self, language):
         prompts = {
             'english': """Normalize this query to formal business style of project documentation.
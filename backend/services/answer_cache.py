@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from typing import List, Optional
+from utils.config import Config
+import hashlib
+import json
+import threading
+import time
+import numpy as np
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_size: int = 256, threshold: float = 0.97, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _context_key(self, language: str, history) -> str:
+        history_json = json.dumps(history or [], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(f"{language}\n{history_json}".encode()).hexdigest()
+
+    def _normalize(self, embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, embedding: List[float], language: str, history=None) -> Optional[str]:
+        if not self.enabled or embedding is None:
+            return None
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+        context_key = self._context_key(language, history)
+        now = time.time()
+
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if self.ttl and now - e['created_at'] > self.ttl]
+            for k in expired:
+                del self._entries[k]
+
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if e['context_key'] == context_key and e['vector'].shape == vector.shape
+            ]
+            if candidates:
+                similarities = np.stack([e['vector'] for _, e in candidates]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id = candidates[best][0]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id]['answer']
+            self.misses += 1
+            return None
+
+    def store(self, embedding: List[float], language: str, history, answer: str):
+        if not self.enabled or embedding is None or not answer:
+            return
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            self._entries[self._next_id] = {
+                'vector': vector,
+                'context_key': self._context_key(language, history),
+                'answer': answer,
+                'created_at': time.time()
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'threshold': self.threshold,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    max_size=Config.ANSWER_CACHE_SIZE,
+    threshold=Config.ANSWER_CACHE_THRESHOLD,
+    ttl=Config.ANSWER_CACHE_TTL
+)
@@ -0,0 +1,195 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Optional
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - stored_at > self.ttl
+
+    def get(self, key) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or self._is_expired(item[1], now):
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.time())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def save(self, path: str):
+        try:
+            now = time.time()
+            with self._lock:
+                items = [(k, v) for k, v in self._items.items() if not self._is_expired(v[1], now)]
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to save cache to {path}: {e}")
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'rb') as f:
+                items = pickle.load(f)
+            now = time.time()
+            with self._lock:
+                for key, item in items:
+                    if not self._is_expired(item[1], now):
+                        self._items[key] = item
+                while len(self._items) > self.max_size:
+                    self._items.popitem(last=False)
+        except Exception as e:
+            logger.warning(f"Failed to load cache from {path}: {e}")
+
+
+class PersistentCache:
+    def __init__(self, path: str, table: str = 'cache', memory_size: int = 1024, ttl: Optional[float] = None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        try:
+            min_created_at = time.time() - self.ttl if self.ttl else 0
+            with self._connect() as conn:
+                row = conn.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ? AND created_at >= ?",
+                    (key, min_created_at)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"Cache read failed ({self.path}): {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.memory.set(key, row[0])
+        self.hits += 1
+        self.disk_hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str):
+        self.memory.set(key, value)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, time.time())
+                )
+        except Exception as e:
+            logger.warning(f"Cache write failed ({self.path}): {e}")
+
+    def purge(self, expired_only: bool = False) -> int:
+        if not expired_only:
+            self.memory.clear()
+        try:
+            with self._connect() as conn:
+                if expired_only and self.ttl:
+                    cursor = conn.execute(
+                        f"DELETE FROM {self.table} WHERE created_at < ?",
+                        (time.time() - self.ttl,)
+                    )
+                elif expired_only:
+                    return 0
+                else:
+                    cursor = conn.execute(f"DELETE FROM {self.table}")
+                return cursor.rowcount
+        except Exception as e:
+            logger.warning(f"Cache purge failed ({self.path}): {e}")
+            return 0
+
+    def stats(self) -> dict:
+        try:
+            with self._connect() as conn:
+                disk_size = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        except Exception:
+            disk_size = None
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'memory_size': len(self.memory),
+            'disk_size': disk_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
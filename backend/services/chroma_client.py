@@ -1,24 +1,107 @@
-import chromadb
 import hashlib
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor
-from services.embeddings import EmbeddingService
-from typing import List, Dict, Set
-import tiktoken
+from services.embeddings import EmbeddingService, index_namespace, namespaced_path
+from services.answer_cache import answer_cache
+from services.page_store import PageStore
+from services.sync_state import SyncStateStore
+from services.vector_index import ExactVectorIndex
+from services.lexical_index import BM25Index
+from services.page_index import PageIndex
+from utils.config import Config
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 import datetime
 import os
 import json
 
+LANGUAGE_CODES = {'english': 'en', 'russian': 'ru', 'ukrainian': 'uk'}
+RECONCILED_FIELDS = ['source_url', 'title', 'language', 'chunk_index']
+COLLECTION_NAME = 'pm_documents'
+
 class ChromaClient:
-    def __init__(self):
-        self.client = chromadb.PersistentClient(path="./data/chroma")
+    def __init__(self, embedding_service: EmbeddingService = None):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=Config.CHROMA_PATH)
+        # Collections (and the indexes and sync state that mirror them) are separated by embedding dimension
+        self.collection_name = f"{COLLECTION_NAME}{index_namespace()}"
         self.collection = self.client.get_or_create_collection(
-            name="pm_documents",
+            name=self.collection_name,
             metadata={"hnsw:space": "cosine"}
         )
-        self.embedding_service = EmbeddingService()
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        self.metadata_file = "./data/chroma/metadata.json"
+        self.embedding_service = embedding_service or EmbeddingService()
+        self._tokenizer = None
+        self.metadata_file = os.path.join(Config.CHROMA_PATH, namespaced_path("metadata.json"))
+        self.page_store = PageStore(namespaced_path(Config.PAGE_STORE_PATH))
+        self.sync_state = SyncStateStore(namespaced_path(Config.SYNC_STATE_PATH))
         self._last_update_time = self._load_last_update_time()
+        self.batched_search = Config.CHROMA_BATCHED_SEARCH
+        self.vector_index = None
+        if Config.VECTOR_BACKEND == 'exact':
+            self.vector_index = ExactVectorIndex(
+                namespaced_path(Config.VECTOR_INDEX_PATH),
+                dtype=Config.VECTOR_INDEX_DTYPE,
+                compact_ratio=Config.VECTOR_INDEX_COMPACT_RATIO
+            )
+            # The index is saved once per sync, so a sync that died midway leaves it behind the collection
+            if len(self.vector_index) != self.collection.count():
+                self.vector_index.rebuild_from_collection(self.collection)
+        self.language_partitioned_search = Config.LANGUAGE_PARTITIONED_SEARCH
+        self.language_min_pages = Config.LANGUAGE_MIN_PAGES
+        self.exact_title_scoring = Config.EXACT_TITLE_SCORING
+        self.page_prefilter = Config.PAGE_PREFILTER_PAGES
+        self.page_index = None
+        if self.exact_title_scoring or self.page_prefilter:
+            self.page_index = PageIndex(namespaced_path(Config.PAGE_CENTROIDS_PATH))
+            if self.exact_title_scoring:
+                self.page_index.refresh(self.collection)
+            if self.page_prefilter and not self.page_index.load_centroids():
+                self.page_index.refresh_centroids(self.collection)
+        self.rrf_k = Config.RRF_K
+        self.lexical_index = None
+        if Config.LEXICAL_SEARCH:
+            self.lexical_index = BM25Index(namespaced_path(Config.LEXICAL_INDEX_PATH))
+            # Chunks written while the flag was off are missing from the index
+            if len(self.lexical_index) != self.collection.count():
+                self._rebuild_lexical_index()
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            import tiktoken
+            self._tokenizer = tiktoken.get_encoding("cl100k_base")
+        return self._tokenizer
+
+    def rebuild_indexes(self):
+        if self.vector_index is not None:
+            self.vector_index.rebuild_from_collection(self.collection)
+        if self.lexical_index is not None:
+            self._rebuild_lexical_index()
+        if self.exact_title_scoring:
+            self.page_index.refresh(self.collection)
+        if self.page_prefilter:
+            self.page_index.refresh_centroids(self.collection)
+
+    def _rebuild_lexical_index(self):
+        self.lexical_index.clear()
+        for results in self._iter_collection(include=['documents', 'metadatas']):
+            self.lexical_index.add(results['ids'], results['documents'], results['metadatas'])
+        self.lexical_index.save()
+
+    def _iter_collection(self, include: List[str] = None, where: Dict = None, batch_size: int = 5000) -> Iterator[Dict]:
+        # Pages through the collection, fetching only the requested fields, one batch in memory at a time
+        params = {"include": include if include is not None else ['metadatas'], "limit": batch_size}
+        if where:
+            params["where"] = where
+        offset = 0
+        while True:
+            results = self.collection.get(offset=offset, **params)
+            ids = results.get('ids') or []
+            if not ids:
+                return
+            yield results
+            if len(ids) < batch_size:
+                return
+            offset += len(ids)
 
     def _load_last_update_time(self):
         try:
@@ -45,6 +128,7 @@ class ChromaClient:
         timestamp = datetime.datetime.utcnow().isoformat() + "Z"
         self._last_update_time = timestamp
         self._save_last_update_time(timestamp)
+        answer_cache.invalidate()
 
     def get_last_update_time(self):
         return self._last_update_time
@@ -52,16 +136,16 @@ class ChromaClient:
     def _generate_content_hash(self, content: str) -> str:
         return hashlib.sha256(content.encode()).hexdigest()
 
-    def _get_existing_hashes(self) -> Set[str]:
-        existing_hashes = set()
-        try:
-            results = self.collection.get(include=['metadatas'], limit=10000)
-            for metadata in results['metadatas']:
-                if 'content_hash' in metadata:
-                    existing_hashes.add(metadata['content_hash'])
-        except Exception:
-            pass
-        return existing_hashes
+    def _get_page_chunks(self, page_ids: List[str], batch_size: int = 5000) -> Dict[str, Dict[str, Dict]]:
+        # source_id -> chunk id -> metadata of the chunks currently stored for those pages
+        page_chunks = {page_id: {} for page_id in page_ids}
+        page_ids = list(page_chunks)
+        for i in range(0, len(page_ids), 500):
+            where = {"source_id": {"$in": page_ids[i:i + 500]}}
+            for results in self._iter_collection(where=where, batch_size=batch_size):
+                for chunk_id, metadata in zip(results['ids'], results['metadatas']):
+                    page_chunks.setdefault(metadata.get('source_id'), {})[chunk_id] = metadata
+        return page_chunks
 
     def _split_into_chunks(self, text: str, max_tokens: int = 100) -> List[str]:
         tokens = self.tokenizer.encode(text)
@@ -72,33 +156,33 @@ class ChromaClient:
             chunks.append(chunk_text)
         return chunks
 
-    def _process_single_document(self, doc: Dict, existing_hashes: Set[str]) -> Dict:
+    def _process_single_document(self, doc: Dict, stored_chunks: Dict[str, Dict] = None) -> Dict:
+        # Reconciles the page against its stored chunks: only new or changed positions are embedded,
+        # positions that no longer exist are deleted and unchanged chunks only get metadata fixes
+        stored_chunks = stored_chunks or {}
         try: 
             title = doc.get('title', '') or doc.get('properties', {}).get('title', 'Untitled') or 'Untitled'
             content = doc.get('content', '')
             page_id = doc['id']
             url = doc['url']
-            full_content = content
+            page_hash = self.page_store.content_hash(content)
             page_language = self.embedding_service.detect_language(f"{title} {content}")
 
-            chunk_data = {'texts': [], 'metadatas': [], 'ids': [], 'content_hashes': []}
+            chunk_data = self._empty_chunk_data()
+            chunk_data['pages'] = {page_id: content}
+            chunks = []
 
             if title:
                 title_text = title.strip()
-                title_hash = self._generate_content_hash(title_text)
-                if title_hash not in existing_hashes:
-                    chunk_data['texts'].append(title_text)
-                    chunk_data['metadatas'].append({
-                        'source_id': page_id,
-                        'source_url': url,
-                        'title': title,
-                        'chunk_type': 'title',
-                        'language': page_language,
-                        'content_hash': title_hash,
-                        'full_content': full_content
-                    })
-                    chunk_data['ids'].append(f"{page_id}_title")
-                    chunk_data['content_hashes'].append(title_hash)
+                chunks.append((f"{page_id}_title", title_text, {
+                    'source_id': page_id,
+                    'source_url': url,
+                    'title': title,
+                    'chunk_type': 'title',
+                    'language': page_language,
+                    'content_hash': self._generate_content_hash(title_text),
+                    'page_hash': page_hash
+                }))
 
             if content:
                 content_chunks = self._split_into_chunks(content, max_tokens=100)
@@ -106,70 +190,204 @@ class ChromaClient:
                     if not chunk.strip():
                         continue
                     chunk_text = chunk.strip()
-                    content_hash = self._generate_content_hash(chunk_text)
-                    if content_hash in existing_hashes:
-                        continue
-                    chunk_data['texts'].append(chunk_text)
-                    chunk_data['metadatas'].append({
+                    chunks.append((f"{page_id}_content_{i}", chunk_text, {
                         'source_id': page_id,
                         'source_url': url,
                         'title': title,
                         'chunk_type': 'content',
                         'chunk_index': i,
                         'language': page_language,
-                        'content_hash': content_hash,
-                        'full_content': full_content
-                    })
-                    chunk_data['ids'].append(f"{page_id}_content_{i}")
-                    chunk_data['content_hashes'].append(content_hash)
+                        'content_hash': self._generate_content_hash(chunk_text),
+                        'page_hash': page_hash
+                    }))
 
+            for chunk_id, chunk_text, metadata in chunks:
+                stored = stored_chunks.get(chunk_id)
+                if stored is None or stored.get('content_hash') != metadata['content_hash']:
+                    chunk_data['texts'].append(chunk_text)
+                    chunk_data['metadatas'].append(metadata)
+                    chunk_data['ids'].append(chunk_id)
+                    chunk_data['content_hashes'].append(metadata['content_hash'])
+                elif any(stored.get(k) != metadata.get(k) for k in RECONCILED_FIELDS):
+                    chunk_data['update_ids'].append(chunk_id)
+                    chunk_data['update_metadatas'].append(metadata)
+
+            new_ids = {chunk_id for chunk_id, _, _ in chunks}
+            chunk_data['delete_ids'] = [chunk_id for chunk_id in stored_chunks if chunk_id not in new_ids]
             return chunk_data
         except Exception:
-            return {'texts': [], 'metadatas': [], 'ids': [], 'content_hashes': []}
+            return self._empty_chunk_data()
+
+    @staticmethod
+    def _empty_chunk_data() -> Dict:
+        return {
+            'texts': [], 'metadatas': [], 'ids': [], 'content_hashes': [], 'pages': {},
+            'delete_ids': [], 'update_ids': [], 'update_metadatas': []
+        }
+
+    def _update_chunk_metadata(self, chunk_data: Dict) -> bool:
+        try:
+            if chunk_data['update_ids']:
+                self.collection.update(ids=chunk_data['update_ids'], metadatas=chunk_data['update_metadatas'])
+                for metadata in chunk_data['update_metadatas']:
+                    if self.vector_index is not None:
+                        self.vector_index.update_page(metadata['source_id'], metadata)
+                    if self.lexical_index is not None:
+                        self.lexical_index.update_page(metadata['source_id'], metadata)
+            return True
+        except Exception as e:
+            print(f"Error reconciling chunks: {e}")
+            return False
+
+    def _delete_chunks(self, chunk_ids: List[str]) -> bool:
+        try:
+            if chunk_ids:
+                self.collection.delete(ids=chunk_ids)
+                if self.vector_index is not None:
+                    self.vector_index.delete_ids(chunk_ids, save=False)
+                if self.lexical_index is not None:
+                    self.lexical_index.delete_chunks(chunk_ids)
+            return True
+        except Exception as e:
+            print(f"Error deleting chunks: {e}")
+            return False
+
+    def prepare_page(self, document: Dict) -> Optional[Dict]:
+        # Chunks the page against what is stored and applies metadata-only fixes; the chunks to embed are
+        # returned, and positions that no longer exist are left in delete_ids for complete_page
+        try:
+            stored_chunks = self._get_page_chunks([document['id']]).get(document['id'])
+        except Exception as e:
+            print(f"Could not read stored chunks of page {document['id']}: {e}")
+            return None
+        chunk_data = self._process_single_document(document, stored_chunks)
+        if not self._update_chunk_metadata(chunk_data):
+            return None
+        return chunk_data
+
+    def complete_page(self, page_id: str, content: str, delete_ids: List[str]) -> bool:
+        # Called once every new chunk of the page is written, so a failed embedding never leaves the page
+        # without its old chunks
+        if not self._delete_chunks(delete_ids):
+            return False
+        self.store_pages({page_id: content}, set())
+        return True
 
     def add_documents(self, documents: List[Dict], batch_size: int = 200) -> int:
         if not documents:
             return 0
-        existing_hashes = self._get_existing_hashes()
-        all_chunk_data = {'texts': [], 'metadatas': [], 'ids': [], 'content_hashes': []}
+        try:
+            page_chunks = self._get_page_chunks([doc['id'] for doc in documents])
+        except Exception:
+            page_chunks = {}
+        all_chunk_data = self._empty_chunk_data()
+        failed_pages = set()
+        delete_ids = {}
         with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(self._process_single_document, doc, existing_hashes) for doc in documents]
+            futures = [
+                executor.submit(self._process_single_document, doc, page_chunks.get(doc['id']))
+                for doc in documents
+            ]
             for future in futures:
                 try:
                     chunk_data = future.result()
+                    if not self._update_chunk_metadata(chunk_data):
+                        failed_pages.update(chunk_data['pages'])
+                    for page_id in chunk_data['pages']:
+                        delete_ids[page_id] = chunk_data['delete_ids']
                     all_chunk_data['texts'].extend(chunk_data['texts'])
                     all_chunk_data['metadatas'].extend(chunk_data['metadatas'])
                     all_chunk_data['ids'].extend(chunk_data['ids'])
                     all_chunk_data['content_hashes'].extend(chunk_data['content_hashes'])
+                    all_chunk_data['pages'].update(chunk_data['pages'])
                 except Exception:
                     pass
         if not all_chunk_data['texts']:
+            self._delete_orphans(delete_ids, failed_pages)
+            self.store_pages(all_chunk_data['pages'], failed_pages)
+            self.finish_pages(all_chunk_data['pages'])
             return 0
         total_added = 0
         for i in range(0, len(all_chunk_data['texts']), batch_size):
             batch_texts = all_chunk_data['texts'][i:i + batch_size]
             batch_metadatas = all_chunk_data['metadatas'][i:i + batch_size]
             batch_ids = all_chunk_data['ids'][i:i + batch_size]
-            embeddings = self.embedding_service.generate_embeddings(batch_texts)
-            if embeddings:
-                try:
-                    self.collection.add(
-                        embeddings=embeddings,
-                        documents=batch_texts,
-                        metadatas=batch_metadatas,
-                        ids=batch_ids
-                    )
-                    total_added += len(batch_texts)
-                except Exception:
-                    pass
+            embeddings = self.embedding_service.generate_embeddings(batch_texts, use_cache=False, use_store=True)
+            if self.write_chunks(batch_ids, batch_texts, batch_metadatas, embeddings):
+                total_added += len(batch_texts)
+            else:
+                failed_pages.update(m['source_id'] for m in batch_metadatas)
+        self._delete_orphans(delete_ids, failed_pages)
+        self.store_pages(all_chunk_data['pages'], failed_pages)
+        self.finish_pages(all_chunk_data['pages'])
         return total_added
 
-    def search(self, query: str, n_results: int = 20) -> Dict:
+    def _delete_orphans(self, delete_ids: Dict[str, List[str]], failed_pages: Set[str]):
+        # Stale chunks of a page are only removed once its new chunks are written
+        for page_id, chunk_ids in delete_ids.items():
+            if page_id not in failed_pages and not self._delete_chunks(chunk_ids):
+                failed_pages.add(page_id)
+
+    def write_chunks(self, ids: List[str], texts: List[str], metadatas: List[Dict], embeddings) -> bool:
+        if not embeddings:
+            return False
+        try:
+            self.collection.upsert(
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas,
+                ids=ids
+            )
+            if self.vector_index is not None:
+                self.vector_index.add(ids, embeddings, metadatas, save=False)
+            if self.lexical_index is not None:
+                self.lexical_index.add(ids, texts, metadatas)
+            return True
+        except Exception:
+            return False
+
+    def finish_pages(self, page_ids):
+        page_ids = list(page_ids)
+        if self.vector_index is not None:
+            self.vector_index.save()
+        if self.lexical_index is not None:
+            self.lexical_index.save()
+        if self.exact_title_scoring:
+            self.page_index.update_pages(self.collection, page_ids)
+        if self.page_prefilter:
+            self.page_index.update_centroids(self.collection, page_ids)
+
+    def store_pages(self, pages: Dict[str, str], failed_pages: Set[str]):
+        # Pages whose chunks failed keep their old text so the next sync sees them as modified
+        for page_id, content in pages.items():
+            if page_id in failed_pages:
+                continue
+            try:
+                self.page_store.put(page_id, content)
+            except Exception as e:
+                print(f"Error storing page {page_id}: {e}")
+
+    def _attach_page_content(self, results: List[Dict]):
+        try:
+            pages = self.page_store.get_many(r['page_id'] for r in results)
+        except Exception:
+            pages = {}
+        for r in results:
+            if r['page_id'] in pages:
+                r['content_snippet'] = pages[r['page_id']]
+
+    def embed_query(self, query: str) -> List[List[float]]:
+        # The plain query ranks content chunks, the title variant ranks page titles
+        return self.embedding_service.generate_embeddings([
+            query,
+            f"{query} (у назві або темі статті)"
+        ], coalesce=True)
+
+    def search(self, query: str, n_results: int = 20, language: str = None,
+               query_embeddings: List[List[float]] = None) -> Dict:
         try:
-            query_embeddings = self.embedding_service.generate_embeddings([
-                query,
-                f"{query} (у назві або темі статті)"
-            ])
+            if query_embeddings is None:
+                query_embeddings = self.embed_query(query)
 
             # Check if embeddings are available
             if not query_embeddings or len(query_embeddings) < 2:
@@ -180,123 +398,216 @@ class ChromaClient:
                     'titles': []
                 }
 
-            semantic_results = self.collection.query(
-                query_embeddings=[query_embeddings[0]],
-                n_results=min(n_results * 5, 100),
-                include=["documents", "metadatas", "distances"]
-            )
-            title_results = self.collection.query(
-                query_embeddings=[query_embeddings[1]],
-                n_results=min(n_results * 5, 100),
-                include=["documents", "metadatas", "distances"]
-            )
-            merged = {"documents": [[]], "metadatas": [[]], "distances": [[]]}
-            if semantic_results and semantic_results.get("metadatas"):
-                merged["documents"][0].extend(semantic_results["documents"][0])
-                merged["metadatas"][0].extend(semantic_results["metadatas"][0])
-                merged["distances"][0].extend(semantic_results["distances"][0])
-            if title_results and title_results.get("metadatas"):
-                merged["documents"][0].extend(title_results["documents"][0])
-                merged["metadatas"][0].extend(title_results["metadatas"][0])
-                merged["distances"][0].extend(title_results["distances"][0])
-            return self._group_results_by_page(merged, n_results)
+            language = LANGUAGE_CODES.get(language, language)
+            if language and self.language_partitioned_search:
+                grouped = self._search_pages(query, query_embeddings, n_results, language=language)
+                if grouped['total_pages'] >= min(self.language_min_pages, n_results):
+                    grouped['language_filter'] = language
+                    self._attach_page_content(grouped['results'])
+                    return grouped
+
+            grouped = self._search_pages(query, query_embeddings, n_results)
+            self._attach_page_content(grouped['results'])
+            return grouped
         except Exception:
             return {"results": [], "total_pages": 0}
 
-    def _group_results_by_page(self, raw_results: Dict, max_pages: int = 10) -> Dict:
+    def _search_pages(self, query: str, query_embeddings: List[List[float]], n_results: int, language: str = None) -> Dict:
+        candidates = min(n_results * 5, 100)
+        conditions = []
+        candidate_pages = None
+        if self.page_prefilter:
+            # Two-stage retrieval: pick candidate pages by centroid, then rank chunks only within them
+            candidate_pages = self.page_index.top_pages(query_embeddings[0], self.page_prefilter) or None
+            if candidate_pages:
+                conditions.append({"source_id": {"$in": candidate_pages}})
+        if language:
+            conditions.append({"language": language})
+
+        if self.exact_title_scoring:
+            raw_results = self._query_with_exact_titles(query_embeddings, candidates, conditions, language, candidate_pages)
+        else:
+            raw_results = self._query_chunks(query_embeddings[:2], candidates, where=self._combine_where(conditions))
+
+        lexical_pages = None
+        if self.lexical_index is not None:
+            lexical_pages = self.lexical_index.search_pages(query, candidates)
+            if language:
+                lexical_pages = [
+                    (source_id, score) for source_id, score in lexical_pages
+                    if self.lexical_index.page_metadata(source_id).get('language') == language
+                ]
+        return self._group_results_by_page(raw_results, n_results, lexical_pages=lexical_pages)
+
+    @staticmethod
+    def _combine_where(conditions: List[Dict]) -> Dict:
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    def _query_with_exact_titles(self, query_embeddings: List[List[float]], n_results: int,
+                                 conditions: List[Dict] = None, language: str = None,
+                                 candidate_pages: List[str] = None) -> Dict:
+        # Titles are scored exactly against every page, so the ANN query only has to rank content chunks
+        where = self._combine_where([{"chunk_type": "content"}] + list(conditions or []))
+        content_results = self._query_chunks([query_embeddings[0]], n_results, where=where)
+        hit_pages = {
+            m.get('source_id')
+            for row in (content_results.get('metadatas') or []) for m in (row or []) if m
+        }
+        title_results = self.page_index.title_hits(
+            query_embeddings[1], n_results, include_pages=hit_pages, language=language, candidate_pages=candidate_pages
+        )
+        return {
+            'metadatas': (content_results.get('metadatas') or []) + title_results['metadatas'],
+            'distances': (content_results.get('distances') or []) + title_results['distances']
+        }
+
+    def lexical_coverage(self, query: str) -> float:
+        if self.lexical_index is None:
+            return 0.0
+        return self.lexical_index.coverage(query)
+
+    def _query_chunks(self, query_embeddings: List[List[float]], n_results: int, where: Dict = None) -> Dict:
+        if self.vector_index is not None:
+            return self.vector_index.query(query_embeddings, n_results=n_results, where=where)
+
+        params = {"n_results": n_results, "include": ["metadatas", "distances"]}
+        if where:
+            params["where"] = where
+        if self.batched_search:
+            return self.collection.query(query_embeddings=query_embeddings, **params)
+
+        raw_results = {"metadatas": [], "distances": []}
+        for embedding in query_embeddings:
+            single = self.collection.query(query_embeddings=[embedding], **params)
+            raw_results["metadatas"].extend(single.get("metadatas") or [])
+            raw_results["distances"].extend(single.get("distances") or [])
+        return raw_results
+
+    def _group_results_by_page(self, raw_results: Dict, max_pages: int = 10, lexical_pages: List = None) -> Dict:
         try:
-            pages = {}
-            distances = raw_results.get('distances', [[]])[0]
-            metadatas = raw_results.get('metadatas', [[]])[0]
-            documents = raw_results.get('documents', [[]])[0]
-
-            for i, metadata in enumerate(metadatas):
-                if i >= len(distances) or i >= len(documents):
-                    continue
-                source_id = metadata.get('source_id')
-                if not source_id:
-                    continue
-                distance = distances[i]
-                similarity = 1.0 / (1.0 + float(distance))
-                chunk_type = metadata.get('chunk_type', 'content')
-
-                if source_id not in pages:
-                    pages[source_id] = {
-                        'url': metadata.get('source_url', ''),
-                        'title': metadata.get('title', 'Untitled'),
-                        'page_id': source_id,
-                        'title_similarity': 0.0,
-                        'content_similarities': [],
-                        'language': metadata.get('language', 'unknown'),
-                        'full_content': metadata.get('full_content', '')
-                    }
+            metadatas = [m for row in (raw_results.get('metadatas') or []) for m in (row or [])]
+            distances = [d for row in (raw_results.get('distances') or []) for d in (row or [])]
+            count = min(len(metadatas), len(distances))
+            keep = [i for i in range(count) if metadatas[i] and metadatas[i].get('source_id')]
+            if not keep and not lexical_pages:
+                return {'results': [], 'total_pages': 0}
 
-                if chunk_type == 'title':
-                    pages[source_id]['title_similarity'] = max(pages[source_id]['title_similarity'], similarity)
-                elif chunk_type == 'content':
-                    pages[source_id]['content_similarities'].append(similarity)
+            metadatas = [metadatas[i] for i in keep]
+            source_ids = np.array([m['source_id'] for m in metadatas], dtype=object)
+            similarities = 1.0 / (1.0 + np.asarray([distances[i] for i in keep], dtype=np.float64))
+            chunk_types = np.array([m.get('chunk_type', 'content') for m in metadatas], dtype=object)
+
+            # Pages keep the order of their first hit so ties rank as before
+            first_seen = {}
+            for source_id in source_ids:
+                first_seen.setdefault(source_id, len(first_seen))
+            page_of = np.array([first_seen[source_id] for source_id in source_ids], dtype=np.int64)
+            first_index = np.zeros(len(first_seen), dtype=np.int64)
+            first_index[page_of[::-1]] = np.arange(len(page_of))[::-1]
+            page_metadata = [metadatas[i] for i in first_index]
+            page_count = len(first_seen)
+
+            is_title = chunk_types == 'title'
+            title_similarity = np.zeros(page_count)
+            np.maximum.at(title_similarity, page_of[is_title], similarities[is_title])
+
+            is_content = chunk_types == 'content'
+            content_pages = page_of[is_content]
+            content_sims = similarities[is_content]
+            chunk_count = np.bincount(content_pages, minlength=page_count)
+
+            by_page = np.lexsort((-content_sims, content_pages))
+            content_pages = content_pages[by_page]
+            content_sims = content_sims[by_page]
+            page_start = np.concatenate(([0], np.cumsum(chunk_count)[:-1])).astype(np.int64)
+            rank_in_page = np.arange(len(content_pages)) - page_start[content_pages]
+
+            top_k = np.select(
+                [chunk_count <= 5, chunk_count < 10],
+                [chunk_count, 3],
+                default=5
+            )
+            selected = rank_in_page < top_k[content_pages]
+            top_sum = np.bincount(content_pages[selected], weights=content_sims[selected], minlength=page_count)
+            best_content_similarity = np.divide(top_sum, top_k, out=np.zeros(page_count), where=top_k > 0)
+
+            title_weight = np.select([chunk_count < 3, chunk_count < 10], [2.0, 3.0], default=4.0)
+            title_bonus = np.select(
+                [title_similarity > 0.6, title_similarity > 0.5],
+                [1 + (title_similarity - 0.6) * 2.0, 1 + (title_similarity - 0.5) * 1.0],
+                default=1.0
+            )
+            raw_score = ((best_content_similarity * title_bonus) + (title_similarity * title_weight)) / (title_weight + 1)
+            ranking_score = raw_score
+            lexical_score = np.zeros(page_count)
+
+            if lexical_pages:
+                # Reciprocal-rank fusion of the vector page ranking with the BM25 page ranking
+                vector_rank = np.empty(page_count)
+                vector_rank[np.argsort(-raw_score, kind='stable')] = np.arange(page_count)
+                ranking_score = 1.0 / (self.rrf_k + vector_rank + 1)
+
+                extra_metadata = []
+                lexical_rrf = np.zeros(page_count)
+                for rank, (source_id, score) in enumerate(lexical_pages):
+                    if source_id not in first_seen:
+                        first_seen[source_id] = len(first_seen)
+                        extra_metadata.append(self.lexical_index.page_metadata(source_id))
+                        lexical_rrf = np.append(lexical_rrf, 0.0)
+                        lexical_score = np.append(lexical_score, 0.0)
+                    page = first_seen[source_id]
+                    lexical_rrf[page] = 1.0 / (self.rrf_k + rank + 1)
+                    lexical_score[page] = score
+
+                padding = np.zeros(len(extra_metadata))
+                ranking_score = np.concatenate((ranking_score, padding)) + lexical_rrf
+                raw_score = np.concatenate((raw_score, padding))
+                title_similarity = np.concatenate((title_similarity, padding))
+                best_content_similarity = np.concatenate((best_content_similarity, padding))
+                page_metadata.extend(extra_metadata)
+                page_count = len(page_metadata)
+
+            score_range = ranking_score.max() - ranking_score.min()
+            if score_range:
+                relevance = np.round((ranking_score - ranking_score.min()) / score_range, 4)
+            else:
+                relevance = np.zeros(page_count)
 
             final_results = []
-            for page_id, p in pages.items():
-                title_similarity = p['title_similarity']
-                content_similarities = sorted(p['content_similarities'], reverse=True)
-                chunk_count = len(content_similarities)
-
-                if chunk_count == 0:
-                    best_content_similarity = 0.0
-                elif chunk_count == 1:
-                    best_content_similarity = content_similarities[0]
-                elif chunk_count <= 5:
-                    best_content_similarity = sum(content_similarities[:chunk_count]) / chunk_count
-                elif chunk_count < 10:
-                    best_content_similarity = sum(content_similarities[:3]) / 3.0
-                else:
-                    best_content_similarity = sum(content_similarities[:5]) / 5.0
-
-                if chunk_count < 3:
-                    title_weight = 2.0
-                elif chunk_count < 10:
-                    title_weight = 3.0
-                else:
-                    title_weight = 4.0
-
-                if title_similarity > 0.6:
-                    title_bonus = 1 + (title_similarity - 0.6) * 2.0
-                elif title_similarity > 0.5:
-                    title_bonus = 1 + (title_similarity - 0.5) * 1.0
-                else:
-                    title_bonus = 1.0
-
-                raw_score = ((best_content_similarity * title_bonus) + (title_similarity * title_weight)) / (title_weight + 1)
+            for page in np.argsort(-relevance, kind='stable')[:max_pages]:
+                metadata = page_metadata[page]
+                title_sim = float(title_similarity[page])
+                content_sim = float(best_content_similarity[page])
 
                 match_type = 'none'
-                if title_similarity >= best_content_similarity and title_similarity > 0:
+                if title_sim >= content_sim and title_sim > 0:
                     match_type = 'title'
-                elif best_content_similarity > 0:
+                elif content_sim > 0:
                     match_type = 'content'
+                elif lexical_score[page] > 0:
+                    match_type = 'lexical'
+
+                result = {
+                    'page_id': metadata['source_id'],
+                    'url': metadata.get('source_url', ''),
+                    'title': metadata.get('title', 'Untitled'),
+                    'raw_score': float(raw_score[page]),
+                    'title_similarity': round(title_sim, 4),
+                    'content_similarity': round(content_sim, 4),
+                    'content_snippet': metadata.get('full_content', ''),
+                    'language': metadata.get('language', 'unknown'),
+                    'match_type': match_type,
+                    'relevance_score': float(relevance[page])
+                }
+                if lexical_pages:
+                    result['lexical_score'] = round(float(lexical_score[page]), 4)
+                final_results.append(result)
 
-                final_results.append({
-                    'page_id': page_id,
-                    'url': p['url'],
-                    'title': p['title'],
-                    'raw_score': raw_score,
-                    'title_similarity': round(title_similarity, 4),
-                    'content_similarity': round(best_content_similarity, 4),
-                    'content_snippet': p['full_content'],
-                    'language': p['language'],
-                    'match_type': match_type
-                })
-
-            if not final_results:
-                return {'results': [], 'total_pages': 0}
-
-            min_score = min(r['raw_score'] for r in final_results)
-            max_score = max(r['raw_score'] for r in final_results)
-            for r in final_results:
-                r['relevance_score'] = round((r['raw_score'] - min_score) / (max_score - min_score), 4) if max_score != min_score else 0.0
-
-            final_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-            return {'results': final_results[:max_pages], 'total_pages': len(final_results)}
+            return {'results': final_results, 'total_pages': page_count}
         except Exception:
             return {'results': [], 'total_pages': 0}
         
@@ -311,47 +622,114 @@ class ChromaClient:
 
     def clear_collection(self) -> bool:
         try:
-            self.collection.delete()
+            self.client.delete_collection(self.collection.name)
+            self.collection = self.client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+            self.page_store.clear()
+            self.sync_state.clear()
+            if self.vector_index is not None:
+                self.vector_index.clear()
+            if self.lexical_index is not None:
+                self.lexical_index.clear()
+            if self.page_index is not None:
+                self.page_index.clear()
             return True
         except Exception:
             return False
         
    
+    def get_indexed_pages(self, batch_size: int = 5000) -> Dict[str, Dict]:
+        # Page ids, titles and urls only; page text stays in the page store
+        pages = {}
+        for results in self._iter_collection(batch_size=batch_size):
+            for metadata in results['metadatas']:
+                source_id = metadata.get('source_id') if metadata else None
+                if source_id and source_id not in pages:
+                    pages[source_id] = {
+                        'title': metadata.get('title', ''),
+                        'url': metadata.get('source_url', '')
+                    }
+        return pages
+
     def get_all_documents_metadata(self) -> List[Dict]:
         try:
-            results = self.collection.get(include=['metadatas'], limit=10000)
             documents = []
             seen_page_ids = set()
             
-            for metadata in results['metadatas']:
-                source_id = metadata.get('source_id')
-                if source_id and source_id not in seen_page_ids:
-                    doc = {
-                        'page_id': source_id,
-                        'url': metadata.get('source_url', ''),
-                        'title': metadata.get('title', ''),
-                        'content': metadata.get('full_content', ''),
-                        'chunk_type': metadata.get('chunk_type', ''),
-                        'language': metadata.get('language', 'unknown')
-                    }
-                    documents.append(doc)
-                    seen_page_ids.add(source_id)
+            for results in self._iter_collection():
+                for metadata in results['metadatas']:
+                    source_id = metadata.get('source_id') if metadata else None
+                    if source_id and source_id not in seen_page_ids:
+                        doc = {
+                            'page_id': source_id,
+                            'url': metadata.get('source_url', ''),
+                            'title': metadata.get('title', ''),
+                            'content': metadata.get('full_content', ''),
+                            'chunk_type': metadata.get('chunk_type', ''),
+                            'language': metadata.get('language', 'unknown')
+                        }
+                        documents.append(doc)
+                        seen_page_ids.add(source_id)
+
+            pages = self.page_store.get_many(seen_page_ids)
+            for doc in documents:
+                if doc['page_id'] in pages:
+                    doc['content'] = pages[doc['page_id']]
             
             return documents
         except Exception:
             return []
 
     def delete_document(self, page_id: str) -> bool:
+        return self.delete_documents([page_id]) > 0
+
+    def delete_documents(self, page_ids: Iterable[str]) -> int:
+        # One $in-filtered delete per 500 pages instead of a get + delete round trip per page
+        page_ids = list(dict.fromkeys(page_ids))
+        if not page_ids:
+            return 0
         try:
-            results = self.collection.get(
-                where={"source_id": page_id},
-                include=[],
-                limit=10000
-            )
-            
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-                return True
-            return False
-        except Exception:
-            return False
+            before = self.collection.count()
+            for i in range(0, len(page_ids), 500):
+                self.collection.delete(where={"source_id": {"$in": page_ids[i:i + 500]}})
+            deleted = before - self.collection.count()
+
+            self.page_store.delete(page_ids)
+            self.sync_state.delete(page_ids)
+            if self.vector_index is not None:
+                self.vector_index.delete_pages(page_ids)
+            if self.lexical_index is not None:
+                self.lexical_index.delete_pages(page_ids)
+                self.lexical_index.save()
+            if self.page_index is not None:
+                self.page_index.remove_pages(page_ids)
+            return deleted
+        except Exception as e:
+            print(f"Error deleting {len(page_ids)} documents: {e}")
+            return 0
+
+    def migrate_full_content_to_page_store(self, batch_size: int = 1000) -> Dict:
+        # Moves the legacy per-chunk 'full_content' metadata into the page store
+        migrated_pages = set()
+        updated_chunks = 0
+        for results in self._iter_collection(batch_size=batch_size):
+            update_ids, update_metadatas = [], []
+            for chunk_id, metadata in zip(results['ids'], results['metadatas']):
+                if not metadata or 'full_content' not in metadata:
+                    continue
+                source_id = metadata.get('source_id')
+                content = metadata.get('full_content') or ''
+                if source_id and source_id not in migrated_pages:
+                    self.page_store.put(source_id, content)
+                    migrated_pages.add(source_id)
+                update_ids.append(chunk_id)
+                update_metadatas.append({
+                    'full_content': None,
+                    'page_hash': self.page_store.content_hash(content)
+                })
+            if update_ids:
+                self.collection.update(ids=update_ids, metadatas=update_metadatas)
+                updated_chunks += len(update_ids)
+        return {'migrated_pages': len(migrated_pages), 'updated_chunks': updated_chunks}
@@ -0,0 +1,104 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    # Coalesces texts from concurrent requests into one encode call: the worker takes the first waiting
+    # request, then gathers whatever else arrives within max_wait_ms or until max_batch_size texts
+    def __init__(self, encode: Callable[[List[str]], List[List[float]]], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0):
+        self.encode_batch = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.requests = 0
+        self.batches = 0
+        self.texts_encoded = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+        self._ensure_worker()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: List[str], timeout: float = None) -> List[List[float]]:
+        return self.submit(texts).result(timeout)
+
+    def _gather(self, first):
+        pending = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [item for item in self._gather(first) if item[1].set_running_or_notify_cancel()]
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            if not texts:
+                continue
+            try:
+                embeddings = self.encode_batch(texts)
+            except Exception as e:
+                logger.warning(f"Coalesced embedding batch of {len(texts)} texts failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.requests += len(pending)
+            self.batches += 1
+            self.texts_encoded += len(texts)
+            self.largest_batch = max(self.largest_batch, len(texts))
+            start = 0
+            for item_texts, future in pending:
+                future.set_result(embeddings[start:start + len(item_texts)])
+                start += len(item_texts)
+
+    def shutdown(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'requests': self.requests,
+            'batches': self.batches,
+            'texts_encoded': self.texts_encoded,
+            'largest_batch': self.largest_batch,
+            'avg_requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+            'queued': self._queue.qsize()
+        }
@@ -0,0 +1,48 @@
+from typing import List, Sequence
+
+
+def token_lengths(model, texts: List[str]) -> List[int]:
+    # Lengths as the model sees them (special tokens included, truncated to its max sequence length)
+    try:
+        if hasattr(model, 'token_lengths'):
+            return model.token_lengths(texts)
+        max_length = getattr(model, 'max_seq_length', None)
+        encoded = model.tokenizer(texts, add_special_tokens=True, truncation=max_length is not None, max_length=max_length)
+        return [len(ids) for ids in encoded['input_ids']]
+    except Exception:
+        return [len(text) // 4 + 2 for text in texts]
+
+
+def fixed_batches(count: int, batch_size: int) -> List[List[int]]:
+    return [list(range(start, min(start + batch_size, count))) for start in range(0, count, batch_size)]
+
+
+def token_budget_batches(lengths: Sequence[int], max_tokens: int, max_size: int) -> List[List[int]]:
+    # Longest first, so every batch holds texts of similar length; a batch costs its size times its
+    # longest text, which is what the padded transformer input pays for
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    batch = []
+    longest = 0
+    for i in order:
+        length = max(1, lengths[i])
+        if batch and (len(batch) >= max_size or (len(batch) + 1) * max(longest, length) > max_tokens):
+            batches.append(batch)
+            batch = []
+            longest = 0
+        batch.append(i)
+        longest = max(longest, length)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def padding_stats(lengths: Sequence[int], batches: List[List[int]]) -> dict:
+    real = sum(lengths[i] for batch in batches for i in batch)
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches if batch)
+    return {
+        'batches': len(batches),
+        'tokens': real,
+        'padded_tokens': padded,
+        'padding_efficiency': round(real / padded, 3) if padded else 1.0
+    }
@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+import logging
+import math
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, torch_threads: int, onnx_path: str = None, onnx_quantized: bool = False):
+    # Runs once per worker process: pin the thread pools before torch is imported, then load the model
+    global _worker_model
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(torch_threads)
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    os.environ['HF_HUB_DISABLE_TELEMETRY'] = '1'
+    if onnx_path:
+        from services.onnx_embedder import OnnxEmbedder
+        _worker_model = OnnxEmbedder(onnx_path, quantized=onnx_quantized, threads=torch_threads)
+        return
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_batch(texts: List[str], batch_size: int):
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+
+
+class EmbeddingPool:
+    # Process pool with one SentenceTransformer per worker for bulk encoding outside the GIL
+    def __init__(self, model_name: str, workers: int, torch_threads: int = 0, shard_size: int = 64,
+                 onnx_path: str = None, onnx_quantized: bool = False):
+        self.model_name = model_name
+        self.onnx_path = onnx_path
+        self.onnx_quantized = onnx_quantized
+        self.workers = workers
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // workers)
+        self.shard_size = shard_size
+        self._executor = None
+        self.texts_encoded = 0
+        self.shards_encoded = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(
+                f"Starting embedding pool: {self.workers} workers x {self.torch_threads} torch threads"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.torch_threads, self.onnx_path, self.onnx_quantized)
+            )
+        return self._executor
+
+    def _shards(self, texts: List[str]) -> List[List[str]]:
+        # Small inputs are still split across every worker; large ones are capped at shard_size per task
+        size = max(1, min(self.shard_size, math.ceil(len(texts) / self.workers)))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    def iter_encode(self, texts: List[str], batch_size: int = 32) -> Iterator[List[List[float]]]:
+        shards = self._shards(texts)
+        # map yields in submission order, so shard results stream back in input order
+        for shard, vectors in zip(shards, self._get_executor().map(_encode_batch, shards, [batch_size] * len(shards))):
+            self.texts_encoded += len(shard)
+            self.shards_encoded += 1
+            yield vectors.tolist()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        embeddings = []
+        for vectors in self.iter_encode(texts, batch_size):
+            embeddings.extend(vectors)
+        return embeddings
+
+    def warm_up(self):
+        self.encode(['warm up'] * self.workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            'backend': 'onnx' if self.onnx_path else 'torch',
+            'workers': self.workers,
+            'torch_threads': self.torch_threads,
+            'shard_size': self.shard_size,
+            'started': self._executor is not None,
+            'texts_encoded': self.texts_encoded,
+            'shards_encoded': self.shards_encoded
+        }
@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+
+class EmbeddingStore:
+    # Disk-backed (model, content hash) -> embedding cache that survives collection rebuilds
+    def __init__(self, path: str = "./data/embeddings.sqlite3", max_bytes: int = 512 * 2 ** 20, dtype: str = 'float16',
+                 touch_batch: int = 1000, touch_interval: float = 30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        # Reads only record access times in memory; they reach the table in batches
+        self._touched = {}
+        self._last_flush = time.monotonic()
+        self._stored_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, "
+                "dtype TEXT NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "last_used REAL NOT NULL, "
+                "PRIMARY KEY (model, content_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, model: str, content_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        content_hashes = list(dict.fromkeys(content_hashes))
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(content_hashes), 500):
+                batch = content_hashes[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT content_hash, dtype, vector FROM embeddings "
+                    f"WHERE model = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    [model] + batch
+                ).fetchall()
+                for content_hash, dtype, vector in rows:
+                    found[content_hash] = np.frombuffer(vector, dtype=dtype).astype(np.float32).tolist()
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(content_hashes) - len(found)
+        self._touch(model, found)
+        return found
+
+    def _touch(self, model: str, content_hashes: Iterable[str]):
+        now = time.time()
+        with self._lock:
+            for content_hash in content_hashes:
+                self._touched[(model, content_hash)] = now
+            due = len(self._touched) >= self.touch_batch or time.monotonic() - self._last_flush >= self.touch_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._last_flush = time.monotonic()
+        if not touched:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND content_hash = ?",
+                [(used, model, content_hash) for (model, content_hash), used in touched.items()]
+            )
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        if not embeddings:
+            return
+        now = time.time()
+        rows = [
+            (model, content_hash, self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes(), now)
+            for content_hash, vector in embeddings.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, content_hash, dtype, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        with self._lock:
+            self.writes += len(rows)
+            if self._stored_bytes is not None:
+                # Replaced rows are counted twice; the total is recounted before anything is evicted
+                self._stored_bytes += sum(len(row[3]) for row in rows)
+        self._evict()
+
+    def _evict(self):
+        if self.max_bytes <= 0:
+            return
+        if self._stored_bytes is not None and self._stored_bytes <= self.max_bytes:
+            return
+        self.flush()
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            self._stored_bytes = total
+            if total <= self.max_bytes:
+                return
+            # Evict least recently used rows down to 90% so eviction does not run on every write
+            excess = total - int(self.max_bytes * 0.9)
+            rowids, freed = [], 0
+            for rowid, size in conn.execute("SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used"):
+                rowids.append(rowid)
+                freed += size
+                if freed >= excess:
+                    break
+            for i in range(0, len(rowids), 500):
+                batch = rowids[i:i + 500]
+                conn.execute(f"DELETE FROM embeddings WHERE rowid IN ({','.join('?' * len(batch))})", batch)
+        with self._lock:
+            self.evictions += len(rowids)
+            self._stored_bytes = total - freed
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._stored_bytes = 0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM embeddings")
+
+    def stats(self) -> dict:
+        self.flush()
+        with self._connect() as conn:
+            entries, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': entries,
+            'stored_bytes': stored_bytes,
+            'max_bytes': self.max_bytes,
+            'dtype': self.dtype.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
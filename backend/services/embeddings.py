@@ -1,50 +1,166 @@
-from sentence_transformers import SentenceTransformer
-from lingua import Language, LanguageDetectorBuilder
 import re
 import emoji
-import tiktoken
 from typing import List, Dict
+from services.cache import LRUCache
+from services.embedding_batcher import EmbeddingBatcher
+from services.embedding_batches import fixed_batches, token_budget_batches, token_lengths
+from services.embedding_pool import EmbeddingPool
+from services.embedding_store import EmbeddingStore
+from services.language import get_language_detector
+from services.onnx_embedder import OnnxEmbedder
+from services.openai_embedder import OpenAIEmbedder
+from utils.config import Config
+import atexit
+import hashlib
 import os
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+
+def index_namespace() -> str:
+    # Remote embeddings live in another vector space, so each remote model and dimension gets its own
+    # collection, side indexes and caches
+    if Config.EMBEDDING_BACKEND == 'openai':
+        model = re.sub(r'[^A-Za-z0-9]+', '_', Config.OPENAI_EMBEDDING_MODEL).strip('_')
+        return f"_{model}_{Config.OPENAI_EMBEDDING_DIMENSIONS}"
+    return ''
+
+
+def namespaced_path(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}{index_namespace()}{ext}" if path else path
+
+
 class EmbeddingService:
     _model = None
+    _model_loaded = False
+    _tokenizer = None
+    _cache = None
+    _store = None
+    _pool = None
+    _batcher = None
+    _load_lock = threading.RLock()
 
     def __init__(self):
-        if EmbeddingService._model is None:
-            try:
-                # Set timeout and retry settings
-                os.environ['HF_HUB_DOWNLOAD_TIMEOUT'] = '60'  # 60 seconds timeout
-                os.environ['HF_HUB_DISABLE_TELEMETRY'] = '1'  # Disable telemetry
-
-                # Try to load model with fallback to OpenAI if specified
-                use_openai_fallback = os.environ.get('USE_OPENAI_EMBEDDINGS', 'false').lower() == 'true'
-
-                if use_openai_fallback:
-                    logger.info("Using OpenAI embeddings as fallback")
-                    EmbeddingService._model = 'openai'  # Flag to use OpenAI
-                else:
-                    logger.info("Loading sentence-transformer model...")
-                    EmbeddingService._model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-                    logger.info("Model loaded successfully")
-            except Exception as e:
-                logger.error(f"Failed to load embedding model: {e}")
-                logger.warning("Running without embeddings - search functionality will be limited")
-                EmbeddingService._model = None
+        if EmbeddingService._store is None and Config.EMBEDDING_STORE_PATH:
+            EmbeddingService._store = EmbeddingStore(
+                Config.EMBEDDING_STORE_PATH,
+                max_bytes=int(Config.EMBEDDING_STORE_MAX_MB * 2 ** 20),
+                dtype=Config.EMBEDDING_STORE_DTYPE
+            )
+
+        if EmbeddingService._cache is None and Config.EMBEDDING_CACHE_SIZE > 0:
+            EmbeddingService._cache = LRUCache(
+                max_size=Config.EMBEDDING_CACHE_SIZE,
+                ttl=Config.EMBEDDING_CACHE_TTL
+            )
+            if Config.EMBEDDING_CACHE_PATH:
+                EmbeddingService._cache.load(namespaced_path(Config.EMBEDDING_CACHE_PATH))
+                atexit.register(EmbeddingService._cache.save, namespaced_path(Config.EMBEDDING_CACHE_PATH))
 
-        self.model = EmbeddingService._model
+        # int8 vectors differ slightly from the torch ones, so they get their own embedding store entries
+        self.model_name = MODEL_NAME
+        if Config.EMBEDDING_BACKEND == 'onnx' and Config.EMBEDDING_ONNX_QUANTIZED:
+            self.model_name = f"{MODEL_NAME}@onnx-int8"
+        elif Config.EMBEDDING_BACKEND == 'openai':
+            self.model_name = f"openai:{Config.OPENAI_EMBEDDING_MODEL}@{Config.OPENAI_EMBEDDING_DIMENSIONS}"
+        # Query cache keys carry the backend too, so fp32 ONNX and torch vectors are not mixed either
+        self.cache_namespace = f"{Config.EMBEDDING_BACKEND}:{self.model_name}"
+        self.cache = EmbeddingService._cache
+        self.store = EmbeddingService._store
 
+    # The model, language detector and tokenizer are loaded on first use and shared by every instance,
+    # so importing or constructing the service does not pull in torch or tiktoken
+    @property
+    def model(self):
+        if not EmbeddingService._model_loaded:
+            with EmbeddingService._load_lock:
+                if not EmbeddingService._model_loaded:
+                    EmbeddingService._model = self._load_model()
+                    EmbeddingService._model_loaded = True
+        return EmbeddingService._model
+
+    @staticmethod
+    def _load_model():
         try:
-            self.language_detector = LanguageDetectorBuilder.from_languages(
-                Language.ENGLISH, Language.RUSSIAN, Language.UKRAINIAN
-            ).build()
-        except:
-            logger.warning("Language detector initialization failed")
-            self.language_detector = None
+            # Set timeout and retry settings
+            os.environ['HF_HUB_DOWNLOAD_TIMEOUT'] = '60'  # 60 seconds timeout
+            os.environ['HF_HUB_DISABLE_TELEMETRY'] = '1'  # Disable telemetry
+
+            if Config.EMBEDDING_BACKEND == 'openai':
+                logger.info(f"Using OpenAI embeddings ({Config.OPENAI_EMBEDDING_MODEL})")
+                return OpenAIEmbedder(
+                    Config.OPENAI_EMBEDDING_MODEL,
+                    api_key=Config.OPENAI_API_KEY,
+                    base_url=Config.OPENAI_EMBEDDING_BASE_URL,
+                    dimensions=Config.OPENAI_EMBEDDING_DIMENSIONS,
+                    batch_size=Config.OPENAI_EMBEDDING_BATCH_SIZE,
+                    concurrency=Config.OPENAI_EMBEDDING_CONCURRENCY,
+                    max_retries=Config.OPENAI_EMBEDDING_MAX_RETRIES,
+                    timeout=Config.OPENAI_EMBEDDING_TIMEOUT
+                )
+            if Config.EMBEDDING_BACKEND == 'onnx':
+                logger.info(f"Loading ONNX embedding model from {Config.EMBEDDING_ONNX_PATH}...")
+                model = OnnxEmbedder(
+                    Config.EMBEDDING_ONNX_PATH,
+                    quantized=Config.EMBEDDING_ONNX_QUANTIZED,
+                    threads=Config.EMBEDDING_ONNX_THREADS
+                )
+            else:
+                from sentence_transformers import SentenceTransformer
+                logger.info("Loading sentence-transformer model...")
+                model = SentenceTransformer(MODEL_NAME)
+            logger.info("Model loaded successfully")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to load embedding model: {e}")
+            logger.warning("Running without embeddings - search functionality will be limited")
+            return None
+
+    @property
+    def pool(self):
+        if EmbeddingService._pool is None and Config.EMBEDDING_WORKERS > 1 and Config.EMBEDDING_BACKEND != 'openai':
+            model = self.model
+            with EmbeddingService._load_lock:
+                if EmbeddingService._pool is None and model is not None:
+                    EmbeddingService._pool = EmbeddingPool(
+                        MODEL_NAME,
+                        workers=Config.EMBEDDING_WORKERS,
+                        torch_threads=Config.EMBEDDING_WORKER_THREADS,
+                        shard_size=Config.EMBEDDING_POOL_SHARD_SIZE,
+                        onnx_path=Config.EMBEDDING_ONNX_PATH if Config.EMBEDDING_BACKEND == 'onnx' else None,
+                        onnx_quantized=Config.EMBEDDING_ONNX_QUANTIZED
+                    )
+                    atexit.register(EmbeddingService._pool.shutdown)
+        return EmbeddingService._pool
+
+    @property
+    def batcher(self):
+        if EmbeddingService._batcher is None:
+            with EmbeddingService._load_lock:
+                if EmbeddingService._batcher is None:
+                    EmbeddingService._batcher = EmbeddingBatcher(
+                        self._encode_batches,
+                        max_batch_size=Config.EMBEDDING_COALESCE_MAX_BATCH,
+                        max_wait_ms=Config.EMBEDDING_COALESCE_WAIT_MS
+                    )
+                    atexit.register(EmbeddingService._batcher.shutdown)
+        return EmbeddingService._batcher
 
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+    @property
+    def language_detector(self):
+        return get_language_detector()
+
+    @property
+    def tokenizer(self):
+        if EmbeddingService._tokenizer is None:
+            import tiktoken
+            EmbeddingService._tokenizer = tiktoken.get_encoding("cl100k_base")
+        return EmbeddingService._tokenizer
 
     def _clean_text(self, text: str) -> str:
         if not text or not isinstance(text, str):
@@ -75,11 +191,6 @@ class EmbeddingService:
             logger.warning("Embeddings model not available, returning empty embeddings")
             return []
 
-        if self.model == 'openai':
-            # TODO: Implement OpenAI embeddings if needed
-            logger.warning("OpenAI embeddings not yet implemented")
-            return []
-
         all_embeddings = []
 
         for page in pages:
@@ -98,15 +209,8 @@ class EmbeddingService:
                 continue
 
             if clean_title:
-                title_embedding = self.model.encode(
-                    clean_title,
-                    show_progress_bar=False,
-                    convert_to_tensor=False
-                ).tolist()
-                
                 all_embeddings.append({
                     'type': 'title',
-                    'embedding': title_embedding,
                     'content': clean_title,
                     'page_id': page_id,
                     'url': url
@@ -118,21 +222,18 @@ class EmbeddingService:
                 for i, chunk in enumerate(content_chunks):
                     if not chunk.strip():
                         continue
-                        
-                    content_embedding = self.model.encode(
-                        chunk,
-                        show_progress_bar=False,
-                        convert_to_tensor=False
-                    ).tolist()
                     
                     all_embeddings.append({
                         'type': 'content',
-                        'embedding': content_embedding,
                         'content': chunk,
                         'page_id': page_id,
                         'url': url,
                         'chunk_index': i
                     })
+
+        embeddings = self._embed([e['content'] for e in all_embeddings], use_store=True)
+        for entry, embedding in zip(all_embeddings, embeddings):
+            entry['embedding'] = embedding
         
         return all_embeddings
 
@@ -140,19 +241,16 @@ class EmbeddingService:
         try:
             language = self.language_detector.detect_language_of(text)
             return language.iso_code_639_1.name.lower() if language else 'unknown'
-        except Exception:
+        except Exception as e:
+            logger.warning(f"Language detection failed: {e}")
             return 'unknown'
 
-    def generate_embeddings(self, texts, batch_size: int = 32):
+    def generate_embeddings(self, texts, batch_size: int = 32, use_cache: bool = True, use_store: bool = False,
+                            coalesce: bool = False):
         if not self.model:
             logger.warning("Embeddings model not available")
             return []
 
-        if self.model == 'openai':
-            # TODO: Implement OpenAI embeddings if needed
-            logger.warning("OpenAI embeddings not yet implemented")
-            return []
-
         if not texts:
             return []
         if isinstance(texts, str):
@@ -161,13 +259,114 @@ class EmbeddingService:
         if not texts:
             return []
 
-        embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        if not use_cache or self.cache is None:
+            return self._embed(texts, batch_size, use_store, coalesce)
+
+        embeddings = [None] * len(texts)
+        missing = {}
+        for i, text in enumerate(texts):
+            cached = self.cache.get(self._cache_key(text))
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.setdefault(text, []).append(i)
+
+        if missing:
+            missing_texts = list(missing)
+            for text, embedding in zip(missing_texts, self._embed(missing_texts, batch_size, use_store, coalesce)):
+                self.cache.set(self._cache_key(text), embedding)
+                for i in missing[text]:
+                    embeddings[i] = embedding
+        return embeddings
+
+    def _cache_key(self, text: str) -> str:
+        return f"{self.cache_namespace}|{text}"
+
+    def _embed(self, texts: List[str], batch_size: int = 32, use_store: bool = False,
+               coalesce: bool = False) -> List[List[float]]:
+        if not use_store or self.store is None or not texts:
+            return self._encode(texts, batch_size, coalesce)
+        hashes = [hashlib.sha256(text.encode()).hexdigest() for text in texts]
+        try:
+            stored = self.store.get_many(self.model_name, hashes)
+        except Exception as e:
+            logger.warning(f"Embedding store lookup failed: {e}")
+            stored = {}
+        missing = {}
+        for text, content_hash in zip(texts, hashes):
+            if content_hash not in stored:
+                missing.setdefault(content_hash, text)
+        if missing:
+            encoded = dict(zip(missing, self._encode(list(missing.values()), batch_size, coalesce)))
+            stored.update(encoded)
+            try:
+                self.store.put_many(self.model_name, encoded)
+            except Exception as e:
+                logger.warning(f"Embedding store write failed: {e}")
+        return [stored[content_hash] for content_hash in hashes]
+
+    def _batches(self, texts: List[str], batch_size: int) -> List[List[int]]:
+        # The remote backend splits into requests itself and sends them concurrently
+        if isinstance(self.model, OpenAIEmbedder):
+            return [list(range(len(texts)))]
+        if Config.EMBEDDING_BATCH_POLICY == 'tokens' and len(texts) > 1:
+            lengths = token_lengths(self.model, texts)
+            return token_budget_batches(lengths, Config.EMBEDDING_BATCH_MAX_TOKENS, Config.EMBEDDING_BATCH_MAX_SIZE)
+        return fixed_batches(len(texts), batch_size)
+
+    def _encode(self, texts: List[str], batch_size: int = 32, coalesce: bool = False) -> List[List[float]]:
+        # Query embeddings from concurrent requests share one forward pass; ingest batches skip the wait
+        if coalesce and Config.EMBEDDING_COALESCE and len(texts) < Config.EMBEDDING_COALESCE_MAX_BATCH:
+            return self.batcher.encode(texts)
+        return self._encode_batches(texts, batch_size)
+
+    def _encode_batches(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        batches = self._batches(texts, batch_size)
+        embeddings = [None] * len(texts)
+        # Bulk batches go to the worker processes; single queries stay on the in-process model
+        if self.pool is not None and len(texts) >= Config.EMBEDDING_POOL_MIN_TEXTS:
+            try:
+                order = [i for batch in batches for i in batch]
+                for i, embedding in zip(order, self.pool.encode([texts[i] for i in order], batch_size)):
+                    embeddings[i] = embedding
+                return embeddings
+            except Exception as e:
+                logger.warning(f"Embedding pool failed, encoding in-process: {e}")
+        for batch in batches:
             batch_embeddings = self.model.encode(
-                batch,
+                [texts[i] for i in batch],
+                batch_size=len(batch),
                 show_progress_bar=False,
                 convert_to_tensor=False
             )
-            embeddings.extend(batch_embeddings.tolist())
+            for i, embedding in zip(batch, batch_embeddings.tolist()):
+                embeddings[i] = embedding
         return embeddings
+
+    def get_cache_stats(self) -> Dict:
+        if self.cache is None:
+            return {'enabled': False}
+        return {
+            'enabled': True,
+            'namespace': self.cache_namespace,
+            'persist_path': namespaced_path(Config.EMBEDDING_CACHE_PATH) or None,
+            **self.cache.stats()
+        }
+
+    def get_pool_stats(self) -> Dict:
+        if self.pool is None:
+            return {'enabled': False}
+        return {'enabled': True, 'min_texts': Config.EMBEDDING_POOL_MIN_TEXTS, **self.pool.stats()}
+
+    def get_batcher_stats(self) -> Dict:
+        if not Config.EMBEDDING_COALESCE:
+            return {'enabled': False}
+        return {'enabled': True, **self.batcher.stats()}
+
+    def get_store_stats(self) -> Dict:
+        if self.store is None:
+            return {'enabled': False}
+        try:
+            return {'enabled': True, 'model': self.model_name, **self.store.stats()}
+        except Exception as e:
+            return {'enabled': True, 'error': str(e)}
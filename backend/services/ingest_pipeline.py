@@ -0,0 +1,278 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional
+from utils.config import Config
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['fetch', 'chunk', 'embed', 'upsert']
+_DONE = object()
+
+
+class IngestCancelled(Exception):
+    pass
+
+
+class IngestPipeline:
+    # fetch page -> clean/chunk/hash -> embed batch -> upsert, with bounded queues between the stages
+    def __init__(self, chroma_client, notion_client, should_index: Optional[Callable[[Dict], bool]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None, queue_size: int = None,
+                 embed_batch_size: int = None, chunk_workers: int = None):
+        self.chroma_client = chroma_client
+        self.notion_client = notion_client
+        self.should_index = should_index
+        self.should_stop = should_stop
+        self.queue_size = queue_size or Config.INGEST_QUEUE_SIZE
+        self.embed_batch_size = embed_batch_size or Config.INGEST_EMBED_BATCH_SIZE
+        self.chunk_workers = chunk_workers or Config.INGEST_CHUNK_WORKERS
+        self.batch_wait = Config.INGEST_BATCH_WAIT
+        self.progress_interval = Config.INGEST_PROGRESS_INTERVAL
+        self.queues = {}
+        self.stage_stats = {name: {'items_in': 0, 'items_out': 0, 'busy_seconds': 0.0} for name in STAGES}
+        self.started_at = None
+        self.finished_at = None
+        self.documents_seen = set()
+        self.documents_updated = 0
+        self.chunks_added = 0
+        self.failed_pages = set()
+        self.written_pages = []
+        self.watermarks = {}
+        self.fetched_at = {}
+        self._pending_chunks = {}
+        self._page_texts = {}
+        self._page_edited = {}
+        self._page_deletes = {}
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    def progress(self) -> Dict:
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0.0
+        return {
+            'running': self.running,
+            'elapsed_seconds': round(elapsed, 2),
+            'stages': {
+                name: {
+                    **{k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()},
+                    'items_per_second': round(stats['items_out'] / elapsed, 2) if elapsed else 0.0
+                }
+                for name, stats in self.stage_stats.items()
+            },
+            'queue_depths': {name: queue.qsize() for name, queue in self.queues.items()},
+            'queue_size': self.queue_size,
+            'documents_seen': len(self.documents_seen),
+            'documents_updated': self.documents_updated,
+            'chunks_added': self.chunks_added,
+            'pages_in_flight': len(self._pending_chunks),
+            'failed_pages': len(self.failed_pages)
+        }
+
+    async def run(self, pages: List[Dict]) -> Dict:
+        loop = asyncio.get_running_loop()
+        self.started_at = time.monotonic()
+        pages = self._unique_pages(pages)
+        self.queues = {
+            'pages': asyncio.Queue(self.queue_size),
+            'documents': asyncio.Queue(self.queue_size),
+            'chunks': asyncio.Queue(self.queue_size * self.embed_batch_size),
+            'batches': asyncio.Queue(self.queue_size)
+        }
+
+        executor = ThreadPoolExecutor(max_workers=self.chunk_workers)
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            # A failing stage cancels the others; otherwise the bounded queues upstream of it stop
+            # draining and the pipeline never finishes
+            async with asyncio.TaskGroup() as group:
+                fetchers = [group.create_task(self._fetch_stage()) for _ in range(self.notion_client.concurrency)]
+                chunkers = [group.create_task(self._chunk_stage(executor)) for _ in range(self.chunk_workers)]
+                embedder = group.create_task(self._embed_stage())
+                group.create_task(self._feed_pages(pages, len(fetchers)))
+                group.create_task(self._close_after(fetchers, 'documents', len(chunkers)))
+                group.create_task(self._close_after(chunkers, 'chunks', 1))
+                group.create_task(self._close_after([embedder], 'batches', 1))
+                group.create_task(self._upsert_stage())
+
+            await loop.run_in_executor(executor, self.chroma_client.finish_pages, self.written_pages)
+        except BaseExceptionGroup as e:
+            logger.error(f"Ingest pipeline failed: {e.exceptions[0]!r}")
+            raise e.exceptions[0]
+        finally:
+            self.finished_at = time.monotonic()
+            reporter.cancel()
+            # Chunk jobs still running would write to the collection after a cancelled sync returned
+            executor.shutdown(wait=True, cancel_futures=True)
+        logger.info(f"Ingest pipeline finished: {self.progress()}")
+        return self.progress()
+
+    @staticmethod
+    def _unique_pages(pages: List[Dict]) -> List[Dict]:
+        # The listing can return a page more than once; the latest edit wins
+        unique = {}
+        for page in pages:
+            current = unique.get(page['id'])
+            if current is None or (page.get('last_edited_time') or '') > (current.get('last_edited_time') or ''):
+                unique[page['id']] = page
+        return list(unique.values())
+
+    def _check_stop(self):
+        if self.should_stop and self.should_stop():
+            raise IngestCancelled('Ingest pipeline cancelled')
+
+    async def _feed_pages(self, pages: List[Dict], fetchers: int):
+        for page in pages:
+            self._check_stop()
+            await self.queues['pages'].put(page)
+        for _ in range(fetchers):
+            await self.queues['pages'].put(_DONE)
+
+    async def _close_after(self, tasks: List[asyncio.Task], queue: str, consumers: int):
+        await asyncio.wait(tasks)
+        for _ in range(consumers):
+            await self.queues[queue].put(_DONE)
+
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            progress = self.progress()
+            logger.info(
+                f"Ingest pipeline: {progress['documents_seen']} documents, {progress['chunks_added']} chunks, "
+                f"queues {progress['queue_depths']}"
+            )
+
+    async def _fetch_stage(self):
+        stats = self.stage_stats['fetch']
+        while True:
+            page = await self.queues['pages'].get()
+            if page is _DONE:
+                return
+            self._check_stop()
+            stats['items_in'] += 1
+            started = time.monotonic()
+            requested_at = time.time()
+            document = await self.notion_client.fetch_page(page)
+            stats['busy_seconds'] += time.monotonic() - started
+            if document:
+                self.fetched_at[document['id']] = requested_at
+                self.documents_seen.add(document['id'])
+                stats['items_out'] += 1
+                await self.queues['documents'].put(document)
+
+    async def _chunk_stage(self, executor):
+        loop = asyncio.get_running_loop()
+        stats = self.stage_stats['chunk']
+        while True:
+            document = await self.queues['documents'].get()
+            if document is _DONE:
+                return
+            self._check_stop()
+            stats['items_in'] += 1
+            page_id = document['id']
+            if self.should_index and not self.should_index(document):
+                self.watermarks[page_id] = document.get('last_edited_time')
+                continue
+
+            started = time.monotonic()
+            chunk_data = await loop.run_in_executor(executor, self.chroma_client.prepare_page, document)
+            stats['busy_seconds'] += time.monotonic() - started
+            if chunk_data is None or page_id not in chunk_data['pages']:
+                self.failed_pages.add(page_id)
+                continue
+
+            self.documents_updated += 1
+            self._page_texts[page_id] = chunk_data['pages'][page_id]
+            self._page_edited[page_id] = document.get('last_edited_time')
+            self._page_deletes[page_id] = chunk_data['delete_ids']
+            self._pending_chunks[page_id] = len(chunk_data['ids'])
+            if not chunk_data['ids']:
+                await self._complete_page(page_id)
+                continue
+            for chunk in zip(chunk_data['ids'], chunk_data['texts'], chunk_data['metadatas']):
+                stats['items_out'] += 1
+                await self.queues['chunks'].put(chunk)
+
+    async def _embed_stage(self):
+        loop = asyncio.get_running_loop()
+        stats = self.stage_stats['embed']
+        queue = self.queues['chunks']
+        done = False
+        while not done:
+            batch = []
+            item = await queue.get()
+            if item is _DONE:
+                return
+            batch.append(item)
+            # Fill the batch while the chunkers keep up, but do not hold a partial batch for long
+            while len(batch) < self.embed_batch_size:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=self.batch_wait)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            self._check_stop()
+            stats['items_in'] += len(batch)
+            started = time.monotonic()
+            texts = [text for _, text, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(
+                    None, partial(self.chroma_client.embedding_service.generate_embeddings, texts, use_cache=False, use_store=True)
+                )
+            except Exception as e:
+                logger.warning(f"Embedding batch of {len(batch)} chunks failed: {e}")
+                embeddings = []
+            stats['busy_seconds'] += time.monotonic() - started
+            stats['items_out'] += len(batch)
+            await self.queues['batches'].put((batch, embeddings))
+
+    async def _upsert_stage(self):
+        loop = asyncio.get_running_loop()
+        stats = self.stage_stats['upsert']
+        while True:
+            item = await self.queues['batches'].get()
+            if item is _DONE:
+                return
+            self._check_stop()
+            batch, embeddings = item
+            stats['items_in'] += len(batch)
+            ids = [chunk_id for chunk_id, _, _ in batch]
+            texts = [text for _, text, _ in batch]
+            metadatas = [metadata for _, _, metadata in batch]
+            started = time.monotonic()
+            written = await loop.run_in_executor(
+                None, self.chroma_client.write_chunks, ids, texts, metadatas, embeddings
+            )
+            stats['busy_seconds'] += time.monotonic() - started
+            if written:
+                stats['items_out'] += len(batch)
+                self.chunks_added += len(batch)
+            else:
+                self.failed_pages.update(m['source_id'] for m in metadatas)
+            for metadata in metadatas:
+                page_id = metadata['source_id']
+                self._pending_chunks[page_id] -= 1
+                if self._pending_chunks[page_id] == 0:
+                    await self._complete_page(page_id)
+
+    async def _complete_page(self, page_id: str):
+        # Stale chunks, page text and the watermark are only touched once every new chunk of the page is
+        # written, so a page whose embedding failed keeps its old chunks until the next sync
+        self._pending_chunks.pop(page_id, None)
+        content = self._page_texts.pop(page_id, '')
+        edited = self._page_edited.pop(page_id, None)
+        delete_ids = self._page_deletes.pop(page_id, [])
+        if page_id in self.failed_pages:
+            return
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.chroma_client.complete_page, page_id, content, delete_ids):
+            self.failed_pages.add(page_id)
+            return
+        self.written_pages.append(page_id)
+        self.watermarks[page_id] = edited
@@ -0,0 +1,24 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_detector = None
+_lock = threading.Lock()
+
+
+def get_language_detector():
+    # One lingua detector per process, built on first use; None when lingua cannot be loaded
+    global _detector
+    if _detector is None:
+        with _lock:
+            if _detector is None:
+                try:
+                    from lingua import Language, LanguageDetectorBuilder
+                    _detector = LanguageDetectorBuilder.from_languages(
+                        Language.ENGLISH, Language.RUSSIAN, Language.UKRAINIAN
+                    ).build()
+                except Exception as e:
+                    logger.warning(f"Language detector initialization failed: {e}")
+                    _detector = False
+    return _detector or None
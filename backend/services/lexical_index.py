@@ -0,0 +1,192 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+PAGE_FIELDS = ['source_url', 'title', 'language', 'page_hash']
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+class BM25Index:
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: Optional[str] = "./data/lexical_index.pkl", k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+        if path:
+            self.load()
+
+    def _reset(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_len = {}
+        self.doc_meta = {}
+        self.page_chunks = {}
+        self.pages = {}
+        self.total_len = 0
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+            if state.get('version') != self.FORMAT_VERSION:
+                return
+            with self._lock:
+                self.postings = state['postings']
+                self.doc_terms = state['doc_terms']
+                self.doc_len = state['doc_len']
+                self.doc_meta = state['doc_meta']
+                self.page_chunks = state['page_chunks']
+                self.pages = state['pages']
+                self.total_len = state['total_len']
+        except Exception as e:
+            logger.warning(f"Failed to load lexical index from {self.path}: {e}")
+            self._reset()
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                state = {
+                    'version': self.FORMAT_VERSION,
+                    'postings': self.postings,
+                    'doc_terms': self.doc_terms,
+                    'doc_len': self.doc_len,
+                    'doc_meta': self.doc_meta,
+                    'page_chunks': self.page_chunks,
+                    'pages': self.pages,
+                    'total_len': self.total_len
+                }
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save lexical index to {self.path}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+        self.save()
+
+    def _remove_chunk(self, chunk_id: str):
+        for term in self.doc_terms.pop(chunk_id, ()):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(chunk_id, 0)
+        meta = self.doc_meta.pop(chunk_id, None)
+        if meta:
+            chunks = self.page_chunks.get(meta[0])
+            if chunks is not None:
+                chunks.discard(chunk_id)
+                if not chunks:
+                    del self.page_chunks[meta[0]]
+                    self.pages.pop(meta[0], None)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self._remove_chunk(chunk_id)
+                source_id = metadata.get('source_id')
+                if not source_id:
+                    continue
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self.postings.setdefault(term, {})[chunk_id] = tf
+                length = sum(counts.values())
+                self.doc_terms[chunk_id] = list(counts)
+                self.doc_len[chunk_id] = length
+                self.total_len += length
+                self.doc_meta[chunk_id] = (source_id, metadata.get('chunk_type', 'content'))
+                self.page_chunks.setdefault(source_id, set()).add(chunk_id)
+                page = self.pages.setdefault(source_id, {'source_id': source_id})
+                page.update({k: metadata[k] for k in PAGE_FIELDS if metadata.get(k) is not None})
+
+    def delete_pages(self, source_ids: List[str]) -> int:
+        removed = 0
+        with self._lock:
+            for source_id in source_ids:
+                for chunk_id in list(self.page_chunks.get(source_id, ())):
+                    self._remove_chunk(chunk_id)
+                    removed += 1
+        return removed
+
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        with self._lock:
+            removed = sum(1 for chunk_id in chunk_ids if chunk_id in self.doc_len)
+            for chunk_id in chunk_ids:
+                self._remove_chunk(chunk_id)
+        return removed
+
+    def update_page(self, source_id: str, metadata: Dict):
+        with self._lock:
+            page = self.pages.get(source_id)
+            if page is not None:
+                page.update({k: metadata[k] for k in PAGE_FIELDS if metadata.get(k) is not None})
+
+    def _idf(self, term: str) -> float:
+        doc_freq = len(self.postings.get(term, ()))
+        total = len(self.doc_len)
+        return math.log(1 + (total - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, n_results: int = 100) -> List[Tuple[str, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self.doc_len:
+                return []
+            avg_len = self.total_len / len(self.doc_len) or 1.0
+            scores = Counter()
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = self._idf(term)
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_len[chunk_id] / avg_len)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            return scores.most_common(n_results)
+
+    def search_pages(self, query: str, n_results: int = 100) -> List[Tuple[str, float]]:
+        best = {}
+        for chunk_id, score in self.search(query, n_results):
+            source_id = self.doc_meta[chunk_id][0]
+            if score > best.get(source_id, 0.0):
+                best[source_id] = score
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
+    def page_metadata(self, source_id: str) -> Dict:
+        return dict(self.pages.get(source_id, {'source_id': source_id}))
+
+    def coverage(self, query: str) -> float:
+        # Share of the query's IDF mass that is present in the index; unseen terms count with maximal IDF
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self.doc_len:
+                return 0.0
+            max_idf = self._idf('')
+            total = sum(self._idf(t) if t in self.postings else max_idf for t in terms)
+            matched = sum(self._idf(t) for t in terms if t in self.postings)
+            return matched / total if total else 0.0
@@ -1,11 +1,36 @@
 from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+from services.rate_limiter import TokenBucket
 from utils.config import Config
 from typing import List, Dict, Any, Optional
+from collections import Counter
 import asyncio
+import httpx
+import random
+import time
+
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+# Linked pages and databases are crawled as pages of their own
+SEPARATE_PAGE_TYPES = {'child_page', 'child_database'}
 
 class NotionClient:
     def __init__(self):
-        self.async_client = AsyncClient(auth=Config.NOTION_API_KEY)
+        self.async_client = AsyncClient(auth=Config.NOTION_API_KEY, base_url=Config.NOTION_BASE_URL)
+        self.rate_limiter = TokenBucket(Config.NOTION_RATE_LIMIT, Config.NOTION_RATE_BURST)
+        self.concurrency = max(Config.NOTION_CONCURRENCY, 1)
+        self.max_retries = Config.NOTION_MAX_RETRIES
+        self.max_depth = Config.NOTION_MAX_DEPTH
+        self.page_call_budget = Config.NOTION_PAGE_CALL_BUDGET
+        self._request_slots = asyncio.Semaphore(self.concurrency)
+        self.page_stats = {}
+        self.request_counts = {'search': 0, 'blocks': 0}
+        self.page_retries = Counter()
+        self.failed_pages = {}
+        self.retries = 0
+        self.rate_limited = 0
+        self.pages_requested = 0
+        self.documents_fetched = 0
+        self._started = time.monotonic()
 
     async def __aenter__(self):
         return self
@@ -14,11 +39,83 @@ class NotionClient:
         await self.close()
 
     async def get_all_documents_metadata(self) -> List[Dict[str, Any]]:
-        pages = await self._get_all_pages_via_search_async()
-        tasks = [self._process_single_page_async(page) for page in pages]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        pages = await self.get_all_pages()
+        return await self.get_documents(pages)
+
+    async def get_all_pages(self) -> List[Dict[str, Any]]:
+        return await self._get_all_pages_via_search_async()
+
+    async def get_documents(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(page):
+            async with semaphore:
+                return await self.fetch_page(page)
+
+        results = await asyncio.gather(*[bounded(page) for page in pages], return_exceptions=True)
         return [result for result in results if result and not isinstance(result, Exception)]
 
+    async def fetch_page(self, page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # One listed page as a document with its text; None if it has no title or content or failed
+        self.pages_requested += 1
+        document = await self._process_single_page_async(page)
+        if document:
+            self.documents_fetched += 1
+        return document
+
+    async def _request(self, kind: str, call, page_id: str = None, **params):
+        attempt = 0
+        while True:
+            try:
+                async with self._request_slots:
+                    await self.rate_limiter.acquire()
+                    self.request_counts[kind] += 1
+                    return await call(**params)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                if page_id:
+                    self.page_retries[page_id] += 1
+                if isinstance(e, HTTPResponseError) and e.status == 429:
+                    self.rate_limited += 1
+                    self.rate_limiter.pause(delay)
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        backoff = min(Config.NOTION_BACKOFF_MAX, Config.NOTION_BACKOFF_BASE * 2 ** attempt)
+        backoff *= random.uniform(0.5, 1.0)
+        if isinstance(error, HTTPResponseError):
+            if error.status not in RETRY_STATUSES:
+                return None
+            try:
+                return max(float(error.headers.get('Retry-After')), backoff)
+            except (TypeError, ValueError):
+                return backoff
+        if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+            return backoff
+        return None
+
+    def get_crawl_report(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        total_requests = sum(self.request_counts.values())
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'pages_requested': self.pages_requested,
+            'documents_fetched': self.documents_fetched,
+            'requests': dict(self.request_counts),
+            'requests_per_second': round(total_requests / elapsed, 2) if elapsed else 0.0,
+            'pages_per_second': round(self.pages_requested / elapsed, 2) if elapsed else 0.0,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'page_retries': dict(self.page_retries),
+            'truncated_pages': [page_id for page_id, stats in self.page_stats.items() if stats['truncated']],
+            'page_stats': dict(self.page_stats),
+            'failed_pages': dict(self.failed_pages)
+        }
+
     async def _get_all_pages_via_search_async(self) -> List[Dict[str, Any]]:
         pages = []
         has_more, cursor = True, None
@@ -31,7 +128,7 @@ class NotionClient:
             if cursor:
                 params["start_cursor"] = cursor
 
-            response = await self.async_client.search(**params)
+            response = await self._request('search', self.async_client.search, **params)
             results = response.get("results", [])
 
             for page in results:
@@ -50,7 +147,8 @@ class NotionClient:
             if not title:
                 return None
 
-            content = await self.get_page_content_async(page_id)
+            blocks = await self._get_block_tree_async(page_id)
+            content = self._extract_text_from_blocks(blocks)
             if not content:
                 return None
             
@@ -60,31 +158,73 @@ class NotionClient:
                 "id": page_id,
                 "url": page_url,
                 "content": content,
+                "last_edited_time": page.get("last_edited_time"),
                 "properties": {
                     "title": title,
                     "post": page_id.replace('-', '')
                 }
             }
-        except Exception:
+        except Exception as e:
+            # Reported separately so a page that could not be fetched is not mistaken for a deleted one
+            self.failed_pages[page.get("id")] = str(e) or type(e).__name__
             return None
 
     async def get_page_content_async(self, page_id: str) -> str:
         try:
-            blocks = await self._get_all_blocks_async(page_id)
+            blocks = await self._get_block_tree_async(page_id)
             return self._extract_text_from_blocks(blocks)
         except Exception:
             return ""
 
-    async def _get_all_blocks_async(self, page_id: str) -> List[Dict]:
+    async def _get_block_tree_async(self, page_id: str) -> List[Dict]:
+        stats = {'calls': 0, 'blocks': 0, 'depth': 0, 'truncated': False, 'seconds': 0.0}
+        started = time.monotonic()
+        try:
+            return await self._get_children_recursive_async(page_id, page_id, 0, stats)
+        finally:
+            stats['seconds'] = round(time.monotonic() - started, 3)
+            self.page_stats[page_id] = stats
+
+    async def _get_children_recursive_async(self, block_id: str, page_id: str, depth: int, stats: Dict) -> List[Dict]:
+        blocks = await self._get_all_blocks_async(block_id, page_id, stats)
+        stats['blocks'] += len(blocks)
+        stats['depth'] = max(stats['depth'], depth)
+        parents = [
+            block for block in blocks
+            if block.get('has_children') and block.get('type') not in SEPARATE_PAGE_TYPES
+        ]
+        if not parents:
+            return blocks
+        if depth + 1 >= self.max_depth:
+            stats['truncated'] = True
+            return blocks
+
+        # Siblings are fetched concurrently, so a deep page costs one round trip per level, not per block
+        results = await asyncio.gather(
+            *[self._get_children_recursive_async(block['id'], page_id, depth + 1, stats) for block in parents],
+            return_exceptions=True
+        )
+        for block, children in zip(parents, results):
+            if isinstance(children, Exception):
+                raise children
+            block['children'] = children
+        return blocks
+
+    async def _get_all_blocks_async(self, block_id: str, page_id: str = None, stats: Dict = None) -> List[Dict]:
         blocks = []
         has_more, cursor = True, None
         
         while has_more:
-            params = {"block_id": page_id, "page_size": 100}
+            if stats is not None:
+                if stats['calls'] >= self.page_call_budget:
+                    stats['truncated'] = True
+                    break
+                stats['calls'] += 1
+            params = {"block_id": block_id, "page_size": 100}
             if cursor:
                 params["start_cursor"] = cursor
                 
-            response = await self.async_client.blocks.children.list(**params)
+            response = await self._request('blocks', self.async_client.blocks.children.list, page_id=page_id or block_id, **params)
             blocks.extend(response.get("results", []))
             has_more = response.get("has_more", False)
             cursor = response.get("next_cursor")
@@ -103,24 +243,32 @@ class NotionClient:
 
     def _extract_text_from_blocks(self, blocks: List[Dict]) -> str:
         texts = []
+        self._collect_block_texts(blocks, texts)
+        return " ".join(texts)
+
+    def _collect_block_texts(self, blocks: List[Dict], texts: List[str]):
         for block in blocks:
             block_type = block.get("type")
             if not block_type:
                 continue
                 
             block_content = block.get(block_type, {})
-            rich_texts = block_content.get("rich_text", [])
+            rich_texts = list(block_content.get("rich_text", []))
+            for cell in block_content.get("cells", []):
+                rich_texts.extend(cell)
             
             for rich_text in rich_texts:
                 text = rich_text.get("plain_text", "").strip()
                 if text:
                     texts.append(text)
-                    
-        return " ".join(texts)
+
+            self._collect_block_texts(block.get("children", []), texts)
 
     async def get_last_edited_time(self) -> Optional[str]:
         try:
-            response = await self.async_client.search(
+            response = await self._request(
+                'search',
+                self.async_client.search,
                 filter={"property": "object", "value": "page"},
                 sort={"direction": "descending", "timestamp": "last_edited_time"},
                 page_size=1
@@ -0,0 +1,83 @@
+from typing import List, Union
+import json
+import os
+import numpy as np
+
+EXPORT_CONFIG = 'export_config.json'
+MODEL_FILE = 'model.onnx'
+QUANTIZED_MODEL_FILE = 'model_int8.onnx'
+
+
+class OnnxEmbedder:
+    # SentenceTransformer-compatible encode() over the exported transformer, with the same mean pooling
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, EXPORT_CONFIG), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        self.max_seq_length = self.config.get('max_seq_length', 128)
+        self.normalize = self.config.get('normalize', False)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        pad_token = self.config.get('pad_token', '<pad>')
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config.get('dimension')
+
+    def token_lengths(self, sentences: List[str]) -> List[int]:
+        return [sum(encoding.attention_mask) for encoding in self.tokenizer.encode_batch(sentences)]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_tensor: bool = False, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.zeros((0, self.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+
+        # Longest first, as SentenceTransformer does, so each batch pads to similar lengths
+        order = np.argsort([-len(sentence) for sentence in sentences], kind='stable')
+        embeddings = [None] * len(sentences)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in rows])
+            input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            if 'token_type_ids' in self.input_names:
+                feeds['token_type_ids'] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, vector in zip(rows, pooled):
+                embeddings[i] = vector
+
+        result = np.vstack(embeddings).astype(np.float32)
+        return result[0] if single else result
+
+    def info(self) -> dict:
+        return {
+            'backend': 'onnx',
+            'model_name': self.config.get('model_name'),
+            'model_path': self.model_path,
+            'quantized': self.quantized,
+            'embedding_dimensions': self.get_sentence_embedding_dimension(),
+            'max_sequence_length': self.max_seq_length,
+            'normalize': self.normalize,
+            'inputs': sorted(self.input_names)
+        }
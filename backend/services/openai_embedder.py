@@ -0,0 +1,98 @@
+from typing import Dict, List, Union
+import asyncio
+import threading
+import numpy as np
+
+
+class OpenAIEmbedder:
+    # SentenceTransformer-compatible encode() over the OpenAI embeddings API: inputs go out in requests of
+    # batch_size texts, at most `concurrency` at a time, and the vectors come back in input order.
+    # Requests run on one background event loop so the HTTP connections are reused across calls.
+    def __init__(self, model: str, api_key: str = None, base_url: str = None, dimensions: int = None,
+                 batch_size: int = 256, concurrency: int = 4, max_retries: int = 5, timeout: float = 30.0):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url or None
+        self.dimensions = dimensions
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.requests = 0
+        self.texts_encoded = 0
+        self.failed_requests = 0
+        self._client = None
+        self._semaphore = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openai-embeddings", daemon=True)
+        self._thread.start()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimensions
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            # The SDK retries connection errors, 429 and 5xx with exponential backoff and honours Retry-After
+            self._client = AsyncOpenAI(
+                api_key=self.api_key or 'unused',
+                base_url=self.base_url,
+                max_retries=self.max_retries,
+                timeout=self.timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def _request(self, texts: List[str]) -> np.ndarray:
+        params = {'model': self.model, 'input': texts}
+        if self.dimensions and self.model.startswith('text-embedding-3'):
+            params['dimensions'] = self.dimensions
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                response = await client.embeddings.create(**params)
+            except Exception:
+                self.failed_requests += 1
+                raise
+        self.requests += 1
+        self.texts_encoded += len(texts)
+        vectors = [None] * len(texts)
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return np.asarray(vectors, dtype=np.float32)
+
+    async def encode_async(self, sentences: List[str]) -> np.ndarray:
+        # The API rejects empty strings
+        sentences = [sentence or ' ' for sentence in sentences]
+        batches = [sentences[i:i + self.batch_size] for i in range(0, len(sentences), self.batch_size)]
+        return np.vstack(await asyncio.gather(*(self._request(batch) for batch in batches)))
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = None, show_progress_bar: bool = False,
+               convert_to_tensor: bool = False, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.zeros((0, self.dimensions or 0), dtype=np.float32)
+        result = asyncio.run_coroutine_threadsafe(self.encode_async(sentences), self._loop).result()
+        return result[0] if single else result
+
+    def close(self):
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=5)
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def info(self) -> Dict:
+        return {
+            'backend': 'openai',
+            'model_name': self.model,
+            'base_url': self.base_url or 'https://api.openai.com/v1',
+            'embedding_dimensions': self.dimensions,
+            'batch_size': self.batch_size,
+            'concurrency': self.concurrency,
+            'max_retries': self.max_retries,
+            'requests': self.requests,
+            'texts_encoded': self.texts_encoded,
+            'failed_requests': self.failed_requests
+        }
@@ -0,0 +1,236 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PAGE_FIELDS = ['source_url', 'title', 'language', 'page_hash']
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class PageIndex:
+    def __init__(self, centroids_path: Optional[str] = None):
+        self._lock = threading.RLock()
+        self.page_ids = []
+        self.pages = {}
+        self.title_matrix = np.zeros((0, 0), dtype=np.float32)
+        self.centroids_path = centroids_path
+        self.centroid_ids = []
+        self.centroid_matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def _fetch_titles(self, collection, page_ids: List[str] = None, batch_size: int = 5000) -> Tuple[List[str], List, List[Dict]]:
+        where = {"chunk_type": "title"}
+        if page_ids is not None:
+            where = {"$and": [where, {"source_id": {"$in": page_ids}}]}
+        ids, embeddings, metadatas = [], [], []
+        offset = 0
+        while True:
+            results = collection.get(where=where, include=['embeddings', 'metadatas'], limit=batch_size, offset=offset)
+            batch_ids = results.get('ids') or []
+            if not batch_ids:
+                break
+            ids.extend(batch_ids)
+            embeddings.extend(results['embeddings'])
+            metadatas.extend(results['metadatas'])
+            offset += len(batch_ids)
+        return ids, embeddings, metadatas
+
+    def _set_titles(self, page_ids: List[str], matrix: np.ndarray, pages: Dict[str, Dict]):
+        self.page_ids = page_ids
+        self.title_matrix = matrix
+        self.pages = pages
+
+    def refresh(self, collection):
+        _, embeddings, metadatas = self._fetch_titles(collection)
+        page_ids, pages, vectors = [], {}, []
+        for embedding, metadata in zip(embeddings, metadatas):
+            source_id = metadata.get('source_id')
+            if not source_id or source_id in pages:
+                continue
+            page_ids.append(source_id)
+            pages[source_id] = {'source_id': source_id, **{k: metadata[k] for k in PAGE_FIELDS if k in metadata}}
+            vectors.append(embedding)
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32)) if vectors else np.zeros((0, 0), dtype=np.float32)
+        with self._lock:
+            self._set_titles(page_ids, matrix, pages)
+
+    def update_pages(self, collection, page_ids: Iterable[str]):
+        page_ids = list(dict.fromkeys(page_ids))
+        if not page_ids:
+            return
+        fetched = {}
+        for i in range(0, len(page_ids), 500):
+            _, embeddings, metadatas = self._fetch_titles(collection, page_ids[i:i + 500])
+            for embedding, metadata in zip(embeddings, metadatas):
+                fetched[metadata['source_id']] = (embedding, metadata)
+
+        with self._lock:
+            keep = [i for i, source_id in enumerate(self.page_ids) if source_id not in fetched]
+            new_ids = [self.page_ids[i] for i in keep] + list(fetched)
+            vectors = [self.title_matrix[keep]] if keep else []
+            if fetched:
+                vectors.append(_normalize_rows(np.asarray([e for e, _ in fetched.values()], dtype=np.float32)))
+            matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+            pages = {source_id: self.pages[source_id] for source_id in new_ids if source_id in self.pages}
+            for source_id, (_, metadata) in fetched.items():
+                pages[source_id] = {'source_id': source_id, **{k: metadata[k] for k in PAGE_FIELDS if k in metadata}}
+            self._set_titles(new_ids, matrix, pages)
+
+    def remove_pages(self, page_ids: Iterable[str]):
+        removed = set(page_ids)
+        with self._lock:
+            keep = [i for i, source_id in enumerate(self.page_ids) if source_id not in removed]
+            if len(keep) != len(self.page_ids):
+                new_ids = [self.page_ids[i] for i in keep]
+                matrix = self.title_matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+                self._set_titles(new_ids, matrix, {s: self.pages[s] for s in new_ids})
+
+            keep = [i for i, source_id in enumerate(self.centroid_ids) if source_id not in removed]
+            if len(keep) != len(self.centroid_ids):
+                self.centroid_ids = [self.centroid_ids[i] for i in keep]
+                self.centroid_matrix = self.centroid_matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+                self.save_centroids()
+
+    def clear(self):
+        with self._lock:
+            self._set_titles([], np.zeros((0, 0), dtype=np.float32), {})
+            self.centroid_ids = []
+            self.centroid_matrix = np.zeros((0, 0), dtype=np.float32)
+            self.save_centroids()
+
+    def _fetch_page_centroids(self, collection, page_ids: List[str] = None, batch_size: int = 5000) -> Dict[str, np.ndarray]:
+        # Mean of the page's content chunk embeddings; pages without content fall back to their title
+        where = {"source_id": {"$in": page_ids}} if page_ids is not None else None
+        sums, counts, titles = {}, {}, {}
+        offset = 0
+        while True:
+            params = {"include": ['embeddings', 'metadatas'], "limit": batch_size, "offset": offset}
+            if where:
+                params["where"] = where
+            results = collection.get(**params)
+            batch_ids = results.get('ids') or []
+            if not batch_ids:
+                break
+            for embedding, metadata in zip(results['embeddings'], results['metadatas']):
+                source_id = metadata.get('source_id')
+                if not source_id:
+                    continue
+                vector = np.asarray(embedding, dtype=np.float32)
+                if metadata.get('chunk_type') == 'title':
+                    titles[source_id] = vector
+                    continue
+                if source_id in sums:
+                    sums[source_id] += vector
+                    counts[source_id] += 1
+                else:
+                    sums[source_id] = vector.copy()
+                    counts[source_id] = 1
+            offset += len(batch_ids)
+        centroids = {source_id: vector for source_id, vector in titles.items() if source_id not in sums}
+        centroids.update({source_id: sums[source_id] / counts[source_id] for source_id in sums})
+        return centroids
+
+    def _set_centroids(self, centroids: Dict[str, np.ndarray]):
+        self.centroid_ids = list(centroids)
+        if centroids:
+            self.centroid_matrix = _normalize_rows(np.vstack(list(centroids.values())).astype(np.float32))
+        else:
+            self.centroid_matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def refresh_centroids(self, collection):
+        centroids = self._fetch_page_centroids(collection)
+        with self._lock:
+            self._set_centroids(centroids)
+            self.save_centroids()
+
+    def update_centroids(self, collection, page_ids: Iterable[str]):
+        page_ids = list(dict.fromkeys(page_ids))
+        if not page_ids:
+            return
+        fetched = {}
+        for i in range(0, len(page_ids), 500):
+            fetched.update(self._fetch_page_centroids(collection, page_ids[i:i + 500]))
+        updated = set(page_ids)
+        with self._lock:
+            centroids = {
+                source_id: self.centroid_matrix[i]
+                for i, source_id in enumerate(self.centroid_ids) if source_id not in updated
+            }
+            centroids.update(fetched)
+            self._set_centroids(centroids)
+            self.save_centroids()
+
+    def load_centroids(self) -> bool:
+        if not self.centroids_path or not os.path.exists(self.centroids_path):
+            return False
+        try:
+            data = np.load(self.centroids_path, allow_pickle=False)
+            with self._lock:
+                self.centroid_ids = data['ids'].tolist()
+                self.centroid_matrix = data['matrix'].astype(np.float32)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load page centroids from {self.centroids_path}: {e}")
+            return False
+
+    def save_centroids(self):
+        if not self.centroids_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.centroids_path) or '.', exist_ok=True)
+            tmp_path = f"{self.centroids_path}.tmp.npz"
+            np.savez(tmp_path, ids=np.array(self.centroid_ids, dtype=str), matrix=self.centroid_matrix.astype(np.float16))
+            os.replace(tmp_path, self.centroids_path)
+        except Exception as e:
+            logger.warning(f"Failed to save page centroids to {self.centroids_path}: {e}")
+
+    def top_pages(self, query_embedding: List[float], n_pages: int) -> List[str]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        with self._lock:
+            if not self.centroid_ids or self.centroid_matrix.shape[1] != len(query) or not norm:
+                return []
+            scores = self.centroid_matrix @ (query / norm)
+            n_pages = min(n_pages, len(scores))
+            top = np.argpartition(-scores, n_pages - 1)[:n_pages]
+            return [self.centroid_ids[i] for i in top[np.argsort(-scores[top], kind='stable')]]
+
+    def score_titles(self, query_embedding: List[float]) -> Tuple[List[str], np.ndarray]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        with self._lock:
+            if not self.page_ids or self.title_matrix.shape[1] != len(query) or not norm:
+                return [], np.zeros(0, dtype=np.float32)
+            return self.page_ids, self.title_matrix @ (query / norm)
+
+    def title_hits(self, query_embedding: List[float], n_results: int, include_pages: Iterable[str] = (),
+                   language: Optional[str] = None, candidate_pages: Optional[Iterable[str]] = None) -> Dict:
+        # Chroma-shaped title rows: the top n_results titles plus every page in include_pages, limited to
+        # candidate_pages when the centroid prefilter narrowed the content query
+        with self._lock:
+            page_ids, scores = self.score_titles(query_embedding)
+            if not page_ids:
+                return {'metadatas': [[]], 'distances': [[]]}
+            include_pages = set(include_pages)
+            ranked = np.argsort(-scores, kind='stable')
+            if candidate_pages is not None:
+                candidate_pages = set(candidate_pages)
+                ranked = [i for i in ranked if page_ids[i] in candidate_pages]
+            if language:
+                ranked = [i for i in ranked if self.pages[page_ids[i]].get('language') == language]
+            top = list(ranked[:n_results])
+            top_set = set(top)
+            rows = top + [i for i, source_id in enumerate(page_ids) if source_id in include_pages and i not in top_set]
+            return {
+                'metadatas': [[{**self.pages[page_ids[i]], 'chunk_type': 'title'} for i in rows]],
+                'distances': [[float(1.0 - scores[i]) for i in rows]]
+            }
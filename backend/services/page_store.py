@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+
+class PageStore:
+    def __init__(self, path: str = "./data/pages.sqlite3"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "source_id TEXT PRIMARY KEY, "
+                "content_hash TEXT NOT NULL, "
+                "content BLOB NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def put(self, source_id: str, content: str) -> str:
+        content = content or ''
+        content_hash = self.content_hash(content)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT content_hash FROM pages WHERE source_id = ?", (source_id,)
+            ).fetchone()
+            if row is None or row[0] != content_hash:
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages (source_id, content_hash, content, updated_at) VALUES (?, ?, ?, ?)",
+                    (source_id, content_hash, zlib.compress(content.encode(), 6), time.time())
+                )
+        return content_hash
+
+    def get(self, source_id: str) -> Optional[str]:
+        return self.get_many([source_id]).get(source_id)
+
+    def get_many(self, source_ids: Iterable[str]) -> Dict[str, str]:
+        source_ids = list(dict.fromkeys(source_ids))
+        pages = {}
+        with self._connect() as conn:
+            # SQLite limits the number of bound parameters per statement
+            for i in range(0, len(source_ids), 500):
+                batch = source_ids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT source_id, content FROM pages WHERE source_id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for source_id, content in rows:
+                    pages[source_id] = zlib.decompress(content).decode()
+        return pages
+
+    def get_hashes(self) -> Dict[str, str]:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT source_id, content_hash FROM pages").fetchall())
+
+    def delete(self, source_ids: Iterable[str]) -> int:
+        source_ids = list(source_ids)
+        deleted = 0
+        with self._connect() as conn:
+            for i in range(0, len(source_ids), 500):
+                batch = source_ids[i:i + 500]
+                cursor = conn.execute(
+                    f"DELETE FROM pages WHERE source_id IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                deleted += cursor.rowcount
+        return deleted
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            pages, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM pages"
+            ).fetchone()
+        return {'pages': pages, 'stored_bytes': stored_bytes}
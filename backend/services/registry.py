@@ -0,0 +1,85 @@
+from typing import Dict
+import os
+import threading
+import time
+
+from utils.lazy import Lazy
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except Exception:
+        pass
+    return 0.0
+
+
+class ServiceRegistry:
+    # One instance of each heavy component per process, built on first use and shared by every blueprint
+    COMPONENTS = ['embedding_service', 'language_detector', 'chroma_client', 'ai_engine', 'sync_runner']
+
+    def __init__(self):
+        self._services = {}
+        self._build_stats = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name, factory):
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    rss_before = rss_mb()
+                    started = time.perf_counter()
+                    service = factory()
+                    self._build_stats[name] = {
+                        'build_seconds': round(time.perf_counter() - started, 3),
+                        'rss_delta_mb': round(rss_mb() - rss_before, 1)
+                    }
+                    self._services[name] = service
+        return service
+
+    @property
+    def embedding_service(self):
+        from services.embeddings import EmbeddingService
+        return self._get('embedding_service', EmbeddingService)
+
+    @property
+    def language_detector(self):
+        from services.language import get_language_detector
+        return self._get('language_detector', lambda: get_language_detector() or False) or None
+
+    @property
+    def chroma_client(self):
+        from services.chroma_client import ChromaClient
+        return self._get('chroma_client', lambda: ChromaClient(embedding_service=self.embedding_service))
+
+    @property
+    def ai_engine(self):
+        from services.ai_engine import AIEngine
+        return self._get('ai_engine', AIEngine)
+
+    @property
+    def sync_runner(self):
+        from services.sync_jobs import SyncJobRunner
+        # The runner resolves the Chroma client on first use so creating it does not open the collection
+        return self._get('sync_runner', lambda: SyncJobRunner(Lazy(lambda: self.chroma_client)))
+
+    def initialized(self, name: str) -> bool:
+        return name in self._services
+
+    def memory_report(self) -> Dict:
+        components = {}
+        for name in self.COMPONENTS:
+            components[name] = {'initialized': self.initialized(name), **self._build_stats.get(name, {})}
+        return {
+            'pid': os.getpid(),
+            'rss_mb': round(rss_mb(), 1),
+            'components': components
+        }
+
+
+registry = ServiceRegistry()
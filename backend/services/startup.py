@@ -0,0 +1,105 @@
+from typing import Callable, Dict, List, Tuple
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROCESS_STARTED = time.time()
+HEAVY_MODULES = ['torch', 'sentence_transformers', 'transformers', 'chromadb', 'lingua', 'tiktoken', 'openai', 'onnxruntime']
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+class StartupState:
+    # Startup milestones and the warm-up that loads the heavy components after the app starts serving
+    def __init__(self):
+        self.status = 'cold'
+        self.marks = {}
+        self.warmup_times = {}
+        self.warmup_errors = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def mark(self, name: str):
+        self.marks[name] = round(time.time() - PROCESS_STARTED, 3)
+
+    def warm_up(self, steps: List[Tuple[str, Callable]]):
+        self.status = 'warming'
+        started = time.perf_counter()
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Warm-up step {name} failed: {e}")
+                self.warmup_errors[name] = str(e)
+            self.warmup_times[name] = round(time.perf_counter() - step_started, 3)
+        self.warmup_times['total'] = round(time.perf_counter() - started, 3)
+        self.mark('warm')
+        self.status = 'ready'
+        logger.info(f"Warm-up finished: {self.warmup_times}")
+
+    def start_warmup(self, steps: List[Tuple[str, Callable]]):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.warm_up, args=(steps,), name="warmup", daemon=True)
+            self._thread.start()
+
+    def report(self) -> Dict:
+        return {
+            'status': self.status,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - PROCESS_STARTED, 3),
+            'marks': dict(self.marks),
+            'warmup_seconds': dict(self.warmup_times),
+            'warmup_errors': dict(self.warmup_errors),
+            'heavy_modules_loaded': [name for name in HEAVY_MODULES if name in sys.modules]
+        }
+
+
+startup = StartupState()
+
+
+def import_time_report(module: str = 'main', top: int = 25) -> Dict:
+    # Imports the module in a fresh interpreter with -X importtime, without the warm-up, and summarises the tree
+    env = dict(os.environ, WARMUP_ON_START='false', PYTHONDONTWRITEBYTECODE='1')
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, timeout=300
+    )
+    wall_seconds = time.perf_counter() - started
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                'module': name,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                'depth': len(indent) // 2
+            })
+    min_depth = min((entry['depth'] for entry in entries), default=0)
+    total_ms = sum(entry['cumulative_ms'] for entry in entries if entry['depth'] == min_depth)
+    imported = {entry['module'] for entry in entries}
+    return {
+        'module': module,
+        'returncode': completed.returncode,
+        'error': completed.stderr.strip().splitlines()[-1] if completed.returncode else None,
+        'wall_seconds': round(wall_seconds, 3),
+        'import_seconds': round(total_ms / 1000, 3),
+        'modules_imported': len(entries),
+        'heavy_modules_imported': [name for name in HEAVY_MODULES if name in imported],
+        'slowest': [
+            {k: round(v, 2) if isinstance(v, float) else v for k, v in entry.items()}
+            for entry in sorted(entries, key=lambda e: e['cumulative_ms'], reverse=True)[:top]
+        ]
+    }
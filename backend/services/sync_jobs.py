@@ -0,0 +1,346 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from services.notion_client import NotionClient
+from services.ingest_pipeline import IngestPipeline, IngestCancelled
+from utils.config import Config
+import asyncio
+import datetime
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.datetime.utcfromtimestamp(timestamp).isoformat() + "Z"
+
+
+def _to_timestamp(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _is_unchanged(page: Dict, watermark: Optional[Tuple[str, float]]) -> bool:
+    # Notion rounds last_edited_time down to the minute, so an edit later in the same minute keeps the
+    # same value; the stored copy is only trusted if it was fetched after that minute had ended
+    if not watermark or not page.get('last_edited_time'):
+        return False
+    edited, synced_at = watermark
+    if edited != page['last_edited_time']:
+        return False
+    minute_end = _to_timestamp(edited) // 60 * 60 + 60
+    return synced_at is not None and synced_at >= minute_end
+
+
+class SyncJob:
+    def __init__(self, full_sync: bool = False, trigger: str = 'manual'):
+        self.id = uuid.uuid4().hex
+        self.full_sync = full_sync
+        self.trigger = trigger
+        self.status = 'queued'
+        self.stage = None
+        self.stage_times = {}
+        self.counts = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.deadline = None
+        self.cancel_reason = None
+        self.joined = 0
+        self.pipeline = None
+        self.notion_client = None
+        self._stage_started = None
+        self._done = threading.Event()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        # A cancelling job still holds single-flight until its thread has stopped writing
+        return self.status in ('queued', 'running', 'cancelling')
+
+    def start_stage(self, name: str):
+        if name is not None:
+            self.check_cancelled()
+        with self._lock:
+            self._close_stage()
+            self.stage = name
+            self._stage_started = time.monotonic()
+
+    def _close_stage(self):
+        if self.stage and self._stage_started is not None:
+            self.stage_times[self.stage] = round(time.monotonic() - self._stage_started, 3)
+        self._stage_started = None
+
+    def update_counts(self, **counts):
+        with self._lock:
+            self.counts.update(counts)
+
+    def finish(self, result: Dict = None, error: str = None) -> bool:
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._close_stage()
+            self.stage = None
+            self.result = result
+            if self._cancel.is_set():
+                self.status = 'timed_out'
+                self.error = self.cancel_reason
+            else:
+                self.status = 'failed' if error else 'succeeded'
+                self.error = error
+            self.finished_at = time.time()
+        self._done.set()
+        return True
+
+    def cancel(self, force: bool = False) -> bool:
+        # Past the deadline the job only asks its thread to stop; the thread checks between pages and
+        # stages and finishes the job itself, so a stuck sync never runs next to a new one
+        with self._lock:
+            if self.status != 'running' or self.deadline is None or (not force and time.time() < self.deadline):
+                return False
+            stage = self.stage
+            self.cancel_reason = f'Sync job timed out after {self.deadline - self.started_at:g}s (stage: {stage})'
+            self.status = 'cancelling'
+            self._cancel.set()
+        logger.error(f"Sync job {self.id} timed out in stage {stage}, cancelling")
+        return True
+
+    def cancel_requested(self) -> bool:
+        self.cancel()
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_requested():
+            raise IngestCancelled(self.cancel_reason)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        with self._lock:
+            stage_times = dict(self.stage_times)
+            if self.stage and self._stage_started is not None:
+                stage_times[self.stage] = round(time.monotonic() - self._stage_started, 3)
+            end = self.finished_at or time.time()
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'trigger': self.trigger,
+                'full_sync': self.full_sync,
+                'stage': self.stage,
+                'stage_times': stage_times,
+                'counts': dict(self.counts),
+                'joined_requests': self.joined,
+                'created_at': _iso(self.created_at),
+                'started_at': _iso(self.started_at),
+                'finished_at': _iso(self.finished_at),
+                'deadline': _iso(self.deadline),
+                'elapsed_seconds': round(end - self.started_at, 2) if self.started_at else 0.0,
+                'error': self.error
+            }
+            pipeline = self.pipeline
+            notion_client = self.notion_client
+            result = self.result
+        if pipeline is not None:
+            data['pipeline'] = pipeline.progress()
+        if notion_client is not None and self.active:
+            data['notion_requests'] = dict(notion_client.request_counts)
+        if include_result:
+            data['result'] = result
+        return data
+
+
+async def sync_notion(chroma_client, job: SyncJob) -> Dict:
+    total_start_time = time.time()
+    full_sync = job.full_sync or not Config.SYNC_SKIP_UNCHANGED
+
+    async with NotionClient() as notion_client:
+        job.notion_client = notion_client
+        job.start_stage('get_current_docs')
+        indexed_pages = chroma_client.get_indexed_pages()
+        current_page_ids = set(indexed_pages)
+        stored_hashes = chroma_client.page_store.get_hashes()
+        job.update_counts(indexed_pages=len(current_page_ids))
+
+        job.start_stage('list_notion_pages')
+        notion_pages = await notion_client.get_all_pages()
+        watermarks = {} if full_sync else chroma_client.sync_state.get_watermarks()
+        # Pages whose last_edited_time has not moved since the last sync are not downloaded again
+        unchanged_page_ids = {
+            page['id'] for page in notion_pages
+            if page['id'] in current_page_ids and _is_unchanged(page, watermarks.get(page['id']))
+        }
+        pages_to_fetch = [page for page in notion_pages if page['id'] not in unchanged_page_ids]
+        job.update_counts(
+            notion_pages_listed=len(notion_pages),
+            unchanged_pages_skipped=len(unchanged_page_ids),
+            pages_to_fetch=len(pages_to_fetch)
+        )
+
+        def is_modified(notion_doc):
+            existing = indexed_pages.get(notion_doc['id'])
+            if existing is None:
+                return True
+            if notion_doc['properties'].get('title', '') != existing['title']:
+                return True
+            content_hash = chroma_client.page_store.content_hash(notion_doc.get('content', ''))
+            return stored_hashes.get(notion_doc['id']) != content_hash
+
+        # Pages stream through fetch -> chunk -> embed -> upsert, so only a bounded window is in memory
+        job.start_stage('ingest_pipeline')
+        pipeline = IngestPipeline(
+            chroma_client, notion_client, should_index=is_modified, should_stop=job.cancel_requested
+        )
+        job.pipeline = pipeline
+        await pipeline.run(pages_to_fetch)
+        chunk_count = pipeline.chunks_added
+
+        notion_page_ids = pipeline.documents_seen | unchanged_page_ids | set(notion_client.failed_pages)
+        deleted_page_ids = current_page_ids - notion_page_ids
+
+        job.start_stage('delete_documents')
+        deleted_chunks = chroma_client.delete_documents(deleted_page_ids)
+        deleted_count = len(deleted_page_ids) if deleted_chunks else 0
+
+        job.start_stage('finalize')
+        chroma_client.sync_state.set_watermarks(pipeline.watermarks, pipeline.fetched_at)
+        chroma_client.set_last_update_time()
+        chroma_stats = chroma_client.get_collection_stats()
+
+        total_documents = len(pipeline.documents_seen) + len(unchanged_page_ids)
+        updated_documents = pipeline.documents_updated
+        statistics = {
+            'total_notion_documents': total_documents,
+            'documents_updated': updated_documents,
+            'chunks_added': chunk_count,
+            'documents_deleted': deleted_count,
+            'chunks_deleted': deleted_chunks,
+            'skipped_documents': total_documents - updated_documents,
+            'notion_pages_listed': len(notion_pages),
+            'unchanged_pages_skipped': len(unchanged_page_ids),
+            'pages_fetched': len(pages_to_fetch),
+            'full_sync': full_sync,
+            'notion_requests': dict(notion_client.request_counts)
+        }
+        job.update_counts(**statistics)
+        job.start_stage(None)
+
+        return {
+            'status': 'success',
+            'message': f'Database updated: {updated_documents} documents updated ({chunk_count} chunks), {deleted_count} documents deleted',
+            'update_type': 'full' if full_sync else 'incremental',
+            'execution_time': int(time.time() - total_start_time),
+            'stage_times': dict(job.stage_times),
+            'statistics': statistics,
+            'crawl_report': notion_client.get_crawl_report(),
+            'pipeline': pipeline.progress(),
+            'chroma_stats': chroma_stats
+        }
+
+
+class SyncJobRunner:
+    # One sync at a time in a background thread; triggers while it runs join the running job
+    def __init__(self, chroma_client, history_size: int = None):
+        self.chroma_client = chroma_client
+        self.history_size = history_size or Config.SYNC_JOB_HISTORY
+        self.jobs = OrderedDict()
+        self.current = None
+        self._lock = threading.Lock()
+        self._scheduler = None
+        self._stop = threading.Event()
+
+    def _expire_current(self):
+        if self.current is not None:
+            self.current.cancel()
+
+    def start(self, full_sync: bool = False, trigger: str = 'manual') -> Tuple[SyncJob, bool]:
+        with self._lock:
+            self._expire_current()
+            if self.current is not None and self.current.active:
+                self.current.joined += 1
+                return self.current, True
+            job = SyncJob(full_sync=full_sync, trigger=trigger)
+            self.current = job
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history_size:
+                self.jobs.popitem(last=False)
+        thread = threading.Thread(target=self._run, args=(job,), name=f"notion-sync-{job.id[:8]}", daemon=True)
+        thread.start()
+        return job, False
+
+    def _run(self, job: SyncJob):
+        timeout = Config.SYNC_JOB_TIMEOUT if Config.SYNC_JOB_TIMEOUT > 0 else None
+        job.status = 'running'
+        job.started_at = time.time()
+        if timeout:
+            # Blocking calls cannot be interrupted, so the job also checks its deadline between pages
+            job.deadline = job.started_at + timeout
+        logger.info(f"Sync job {job.id} started ({job.trigger}, full_sync={job.full_sync})")
+        try:
+            result = asyncio.run(asyncio.wait_for(sync_notion(self.chroma_client, job), timeout))
+            if job.finish(result=result):
+                logger.info(f"Sync job {job.id} finished: {result['message']}")
+        except (asyncio.TimeoutError, IngestCancelled):
+            job.cancel(force=True)
+            job.finish()
+        except Exception as e:
+            logger.exception(f"Sync job {job.id} failed")
+            job.finish(error=f'Error updating vector database: {str(e)}')
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        self._expire_current()
+        return self.jobs.get(job_id)
+
+    def latest(self) -> Optional[SyncJob]:
+        self._expire_current()
+        return self.current
+
+    def list_jobs(self):
+        self._expire_current()
+        return [job.to_dict(include_result=False) for job in reversed(list(self.jobs.values()))]
+
+    async def _notion_changed(self) -> bool:
+        async with NotionClient() as notion_client:
+            notion_last_edited = await notion_client.get_last_edited_time()
+        if not notion_last_edited:
+            return False
+        return _to_timestamp(self.chroma_client.get_last_update_time()) < _to_timestamp(notion_last_edited)
+
+    def check_and_start(self) -> Optional[SyncJob]:
+        self._expire_current()
+        if self.current is not None and self.current.active:
+            return None
+        try:
+            changed = asyncio.run(self._notion_changed())
+        except Exception as e:
+            logger.warning(f"Scheduled Notion check failed: {e}")
+            return None
+        if not changed:
+            return None
+        job, _ = self.start(trigger='schedule')
+        return job
+
+    def start_scheduler(self, interval: float = None):
+        interval = Config.SYNC_SCHEDULE_INTERVAL if interval is None else interval
+        if interval <= 0 or self._scheduler is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.check_and_start()
+
+        self._scheduler = threading.Thread(target=loop, name="notion-sync-scheduler", daemon=True)
+        self._scheduler.start()
+        logger.info(f"Notion sync scheduler started, checking every {interval}s")
+
+    def stop_scheduler(self):
+        self._stop.set()
+        self._scheduler = None
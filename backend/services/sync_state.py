@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+import os
+import sqlite3
+import time
+
+
+class SyncStateStore:
+    def __init__(self, path: str = "./data/sync_state.sqlite3"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_state ("
+                "source_id TEXT PRIMARY KEY, "
+                "last_edited_time TEXT NOT NULL, "
+                "synced_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_watermarks(self) -> Dict[str, Tuple[str, float]]:
+        # source_id -> (last_edited_time, when the page content was fetched)
+        with self._connect() as conn:
+            rows = conn.execute("SELECT source_id, last_edited_time, synced_at FROM page_state").fetchall()
+        return {source_id: (edited, synced_at) for source_id, edited, synced_at in rows}
+
+    def set_watermarks(self, watermarks: Dict[str, str], synced_at: Dict[str, float] = None):
+        now = time.time()
+        synced_at = synced_at or {}
+        rows = [
+            (source_id, edited, synced_at.get(source_id, now))
+            for source_id, edited in watermarks.items() if edited
+        ]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_state (source_id, last_edited_time, synced_at) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def delete(self, source_ids: Iterable[str]) -> int:
+        source_ids = list(source_ids)
+        deleted = 0
+        with self._connect() as conn:
+            for i in range(0, len(source_ids), 500):
+                batch = source_ids[i:i + 500]
+                cursor = conn.execute(
+                    f"DELETE FROM page_state WHERE source_id IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                deleted += cursor.rowcount
+        return deleted
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM page_state")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            pages, last_synced = conn.execute("SELECT COUNT(*), MAX(synced_at) FROM page_state").fetchone()
+        return {'pages': pages, 'last_synced_at': last_synced}
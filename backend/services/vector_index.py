@@ -0,0 +1,310 @@
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_TYPES = ['content', 'title']
+PAGE_FIELDS = ['source_url', 'title', 'language', 'page_hash']
+
+
+class ExactVectorIndex:
+    def __init__(self, path: str = "./data/vector_index", dtype: str = 'float32', block_size: int = 16384,
+                 compact_ratio: float = 0.3):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def _manifest_file(self):
+        return os.path.join(self.path, 'manifest.json')
+
+    @property
+    def _matrix_file(self):
+        return os.path.join(self.path, 'embeddings.bin')
+
+    @property
+    def _arrays_file(self):
+        return os.path.join(self.path, 'rows.npz')
+
+    def _load(self):
+        self.dim = None
+        self.count = 0
+        self.capacity = 0
+        self.matrix = None
+        self.ids = np.array([], dtype=object)
+        self.page_of = np.array([], dtype=np.int32)
+        self.chunk_type = np.array([], dtype=np.int8)
+        self.alive = np.array([], dtype=bool)
+        self.pages = []
+        self._page_index = {}
+        self._row_of = {}
+        self._dirty = False
+        try:
+            if not os.path.exists(self._manifest_file):
+                return
+            with open(self._manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if np.dtype(manifest['dtype']) != self.dtype:
+                logger.warning("Vector index dtype changed, index will be rebuilt")
+                return
+            self.dim = manifest['dim']
+            self.count = manifest['count']
+            self.capacity = manifest['capacity']
+            self.pages = manifest['pages']
+            self.matrix = np.memmap(self._matrix_file, dtype=self.dtype, mode='r+', shape=(self.capacity, self.dim))
+            arrays = np.load(self._arrays_file, allow_pickle=False)
+            self.ids = arrays['ids'].astype(object)
+            self.page_of = arrays['page_of']
+            self.chunk_type = arrays['chunk_type']
+            self.alive = arrays['alive']
+            self._grow_arrays(self.capacity)
+            self._page_index = {p['source_id']: i for i, p in enumerate(self.pages)}
+            self._row_of = {self.ids[i]: i for i in np.flatnonzero(self.alive[:self.count])}
+        except Exception as e:
+            logger.warning(f"Failed to load vector index from {self.path}: {e}")
+            self._load_empty()
+
+    def _load_empty(self):
+        for name in (self._manifest_file, self._arrays_file, self._matrix_file):
+            if os.path.exists(name):
+                os.remove(name)
+        self._load()
+
+    # Writers pass save=False and the sync saves once at the end: rows.npz and the manifest are rewritten
+    # in full, so saving after every batch made a sync quadratic in the index size
+    def save(self):
+        with self._lock:
+            if self.matrix is None or not self._dirty:
+                return
+            self.matrix.flush()
+            np.savez(
+                os.path.join(self.path, 'rows.tmp.npz'),
+                ids=self.ids[:self.count].astype(str),
+                page_of=self.page_of[:self.count],
+                chunk_type=self.chunk_type[:self.count],
+                alive=self.alive[:self.count]
+            )
+            os.replace(os.path.join(self.path, 'rows.tmp.npz'), self._arrays_file)
+            manifest = {
+                'dim': self.dim,
+                'dtype': self.dtype.name,
+                'count': self.count,
+                'capacity': self.capacity,
+                'pages': self.pages
+            }
+            tmp_manifest = f"{self._manifest_file}.tmp"
+            with open(tmp_manifest, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_manifest, self._manifest_file)
+            self._dirty = False
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = max(1024, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        tmp_file = f"{self._matrix_file}.tmp"
+        matrix = np.memmap(tmp_file, dtype=self.dtype, mode='w+', shape=(capacity, self.dim))
+        if self.count:
+            matrix[:self.count] = self.matrix[:self.count]
+        matrix.flush()
+        del matrix
+        self.matrix = None
+        os.replace(tmp_file, self._matrix_file)
+        self.matrix = np.memmap(self._matrix_file, dtype=self.dtype, mode='r+', shape=(capacity, self.dim))
+        self.capacity = capacity
+        self._grow_arrays(capacity)
+
+    def _grow_arrays(self, capacity: int):
+        for name in ('ids', 'page_of', 'chunk_type', 'alive'):
+            array = getattr(self, name)
+            if len(array) >= capacity:
+                continue
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _page_id(self, metadata: Dict) -> int:
+        source_id = metadata.get('source_id')
+        page = {'source_id': source_id, **{k: metadata.get(k) for k in PAGE_FIELDS if metadata.get(k) is not None}}
+        if source_id in self._page_index:
+            index = self._page_index[source_id]
+            self.pages[index].update(page)
+            return index
+        self.pages.append(page)
+        self._page_index[source_id] = len(self.pages) - 1
+        return len(self.pages) - 1
+
+    def add(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict], save: bool = True):
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+            self._ensure_capacity(self.count + len(ids))
+
+            start = self.count
+            rows = np.arange(start, start + len(ids))
+            self.matrix[rows] = vectors.astype(self.dtype)
+            for row, chunk_id, metadata in zip(rows, ids, metadatas):
+                previous = self._row_of.get(chunk_id)
+                if previous is not None:
+                    self.alive[previous] = False
+                self.ids[row] = chunk_id
+                self.page_of[row] = self._page_id(metadata)
+                self.chunk_type[row] = CHUNK_TYPES.index(metadata.get('chunk_type', 'content'))
+                self.alive[row] = True
+                self._row_of[chunk_id] = row
+            self.count += len(ids)
+            self._dirty = True
+            # Re-added chunks leave their old rows dead
+            self._maybe_compact()
+            if save:
+                self.save()
+
+    def delete_pages(self, source_ids: List[str], save: bool = True) -> int:
+        with self._lock:
+            pages = [self._page_index[s] for s in source_ids if s in self._page_index]
+            if not pages or not self.count:
+                return 0
+            rows = np.flatnonzero(np.isin(self.page_of[:self.count], pages) & self.alive[:self.count])
+            self.alive[rows] = False
+            for row in rows:
+                self._row_of.pop(self.ids[row], None)
+            self._dirty = True
+            self._maybe_compact()
+            if save:
+                self.save()
+            return len(rows)
+
+    def delete_ids(self, ids: List[str], save: bool = True) -> int:
+        with self._lock:
+            rows = [self._row_of.pop(chunk_id) for chunk_id in ids if chunk_id in self._row_of]
+            if not rows:
+                return 0
+            self.alive[rows] = False
+            self._dirty = True
+            self._maybe_compact()
+            if save:
+                self.save()
+            return len(rows)
+
+    def update_page(self, source_id: str, metadata: Dict):
+        with self._lock:
+            if source_id in self._page_index:
+                self._page_id(metadata)
+                self._dirty = True
+
+    def _maybe_compact(self):
+        if self.count and self.count - len(self._row_of) > self.count * self.compact_ratio:
+            self._compact()
+
+    def _compact(self):
+        rows = np.flatnonzero(self.alive[:self.count])
+        live_pages = np.unique(self.page_of[rows])
+        page_remap = np.full(len(self.pages), -1, dtype=np.int32)
+        page_remap[live_pages] = np.arange(len(live_pages))
+
+        self.matrix[:len(rows)] = self.matrix[rows]
+        self.ids[:len(rows)] = self.ids[rows]
+        self.page_of[:len(rows)] = page_remap[self.page_of[rows]]
+        self.chunk_type[:len(rows)] = self.chunk_type[rows]
+        self.alive[:len(rows)] = True
+        self.alive[len(rows):] = False
+        self.count = len(rows)
+
+        self.pages = [self.pages[p] for p in live_pages]
+        self._page_index = {p['source_id']: i for i, p in enumerate(self.pages)}
+        self._row_of = {chunk_id: i for i, chunk_id in enumerate(self.ids[:self.count])}
+        self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self.matrix = None
+            self._load_empty()
+
+    def _where_mask(self, where: Optional[Dict]) -> np.ndarray:
+        mask = self.alive[:self.count].copy()
+        if not where:
+            return mask
+        for field, condition in where.items():
+            if field == '$and':
+                for sub_where in condition:
+                    mask &= self._where_mask(sub_where)
+                continue
+            values = condition['$in'] if isinstance(condition, dict) else [condition]
+            if field == 'chunk_type':
+                mask &= np.isin(self.chunk_type[:self.count], [CHUNK_TYPES.index(v) for v in values if v in CHUNK_TYPES])
+            elif field == 'source_id':
+                mask &= np.isin(self.page_of[:self.count], [self._page_index[v] for v in values if v in self._page_index])
+            else:
+                page_mask = np.array([p.get(field) in values for p in self.pages], dtype=bool)
+                mask &= page_mask[self.page_of[:self.count]] if len(page_mask) else False
+        return mask
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, where: Optional[Dict] = None) -> Dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        results = {'ids': [], 'metadatas': [], 'distances': []}
+
+        with self._lock:
+            if not self.count or n_results < 1 or self.dim != queries.shape[1]:
+                for _ in queries:
+                    results['ids'].append([])
+                    results['metadatas'].append([])
+                    results['distances'].append([])
+                return results
+
+            scores = np.empty((len(queries), self.count), dtype=np.float32)
+            for start in range(0, self.count, self.block_size):
+                end = min(start + self.block_size, self.count)
+                block = np.asarray(self.matrix[start:end], dtype=np.float32)
+                scores[:, start:end] = queries @ block.T
+            scores[:, ~self._where_mask(where)] = -np.inf
+
+            k = min(n_results, self.count)
+            for row_scores in scores:
+                top = np.argpartition(-row_scores, k - 1)[:k]
+                top = top[np.argsort(-row_scores[top], kind='stable')]
+                top = top[np.isfinite(row_scores[top])]
+                results['ids'].append([self.ids[i] for i in top])
+                results['metadatas'].append([self._metadata(i) for i in top])
+                results['distances'].append((1.0 - row_scores[top]).tolist())
+        return results
+
+    def _metadata(self, row: int) -> Dict:
+        page = self.pages[self.page_of[row]]
+        return {**page, 'chunk_type': CHUNK_TYPES[self.chunk_type[row]]}
+
+    def rebuild_from_collection(self, collection, batch_size: int = 5000) -> int:
+        with self._lock:
+            self.clear()
+            offset = 0
+            while True:
+                results = collection.get(include=['embeddings', 'metadatas'], limit=batch_size, offset=offset)
+                ids = results.get('ids') or []
+                if not ids:
+                    break
+                self.add(ids, results['embeddings'], results['metadatas'], save=False)
+                offset += len(ids)
+            self.save()
+            return len(self)
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import Config
+
+
+class WordTokenizer:
+    # Stands in for tiktoken, which downloads its vocabulary on first use
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+
+class CountingEmbeddingService:
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.calls = 0
+        self.texts = []
+
+    def embed(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], 'little')
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def generate_embeddings(self, texts, batch_size=32, use_cache=True, use_store=False, coalesce=False):
+        if isinstance(texts, str):
+            texts = [texts]
+        self.calls += 1
+        self.texts.extend(texts)
+        return [self.embed(text) for text in texts]
+
+    def detect_language(self, text):
+        return 'unknown'
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CHROMA_PATH', str(tmp_path / 'chroma'))
+    monkeypatch.setattr(Config, 'PAGE_STORE_PATH', str(tmp_path / 'pages.sqlite3'))
+    monkeypatch.setattr(Config, 'SYNC_STATE_PATH', str(tmp_path / 'sync_state.sqlite3'))
+    monkeypatch.setattr(Config, 'EMBEDDING_STORE_PATH', str(tmp_path / 'embeddings.sqlite3'))
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_PATH', '')
+    monkeypatch.setattr(Config, 'NORMALIZATION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(Config, 'VECTOR_INDEX_PATH', str(tmp_path / 'vector_index'))
+    monkeypatch.setattr(Config, 'LEXICAL_INDEX_PATH', str(tmp_path / 'lexical_index.pkl'))
+    monkeypatch.setattr(Config, 'PAGE_CENTROIDS_PATH', str(tmp_path / 'page_centroids.npz'))
+    return tmp_path
+
+
+@pytest.fixture
+def embedding_service():
+    return CountingEmbeddingService()
+
+
+@pytest.fixture
+def chroma_client(data_dir, embedding_service, monkeypatch):
+    import chromadb
+    from services.chroma_client import ChromaClient
+
+    monkeypatch.setattr(chromadb, 'PersistentClient', lambda path: chromadb.EphemeralClient())
+    client = ChromaClient(embedding_service=embedding_service)
+    client._tokenizer = WordTokenizer()
+    yield client
+    # EphemeralClient instances share one in-memory system per process
+    client.client.delete_collection(client.collection_name)
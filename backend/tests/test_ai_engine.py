@@ -0,0 +1,22 @@
+import asyncio
+
+from services.ai_engine import AIEngine
+
+
+def test_detect_language_is_public(data_dir):
+    engine = AIEngine()
+    assert engine.detect_language('Как оценивать задачи на планировании спринта?') == 'russian'
+    assert engine.detect_language('Як оцінювати задачі на плануванні спринту?') == 'ukrainian'
+    assert engine.detect_language('How do we estimate tasks?') == 'english'
+
+
+def test_answer_uses_the_language_the_route_detected(data_dir, monkeypatch):
+    engine = AIEngine()
+    monkeypatch.setattr(engine.answer_cache, 'lookup', lambda embedding, language, history: f"cached:{language}")
+
+    def fail(text):
+        raise AssertionError('language detected twice')
+
+    monkeypatch.setattr(engine, 'detect_language', fail)
+    answer = asyncio.run(engine.generate_answer('вопрос', {'results': []}, query_embedding=[1.0], language='russian'))
+    assert answer == 'cached:russian'
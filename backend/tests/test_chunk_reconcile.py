@@ -0,0 +1,53 @@
+def make_page(words, title='Sprint planning', url='https://notion.so/page-1'):
+    return {
+        'id': 'page-1',
+        'url': url,
+        'title': title,
+        'content': ' '.join(words)
+    }
+
+
+def stored_chunks(client):
+    results = client.collection.get(where={'source_id': 'page-1'}, include=['documents', 'metadatas'])
+    return dict(zip(results['ids'], zip(results['documents'], results['metadatas'])))
+
+
+def test_one_word_edit_reembeds_only_the_changed_chunk(chroma_client, embedding_service):
+    words = [f"word{i}" for i in range(300)]
+    chroma_client.add_documents([make_page(words)])
+    assert len(embedding_service.texts) == 4
+
+    words[150] = 'edited'
+    embedding_service.texts.clear()
+    chroma_client.add_documents([make_page(words)])
+
+    assert embedding_service.texts == [' '.join(words[100:200])]
+    chunks = stored_chunks(chroma_client)
+    assert chunks['page-1_content_1'][0] == ' '.join(words[100:200])
+    assert len(chunks) == 4
+
+
+def test_shrinking_page_deletes_orphan_chunks(chroma_client, embedding_service):
+    words = [f"word{i}" for i in range(300)]
+    chroma_client.add_documents([make_page(words)])
+
+    embedding_service.texts.clear()
+    chroma_client.add_documents([make_page(words[:120])])
+
+    assert sorted(stored_chunks(chroma_client)) == ['page-1_content_0', 'page-1_content_1', 'page-1_title']
+    assert embedding_service.texts == [' '.join(words[100:120])]
+
+
+def test_metadata_only_change_does_not_reembed(chroma_client, embedding_service):
+    words = [f"word{i}" for i in range(300)]
+    chroma_client.add_documents([make_page(words)])
+
+    embedding_service.texts.clear()
+    calls = embedding_service.calls
+    chroma_client.add_documents([make_page(words, url='https://notion.so/moved')])
+
+    assert embedding_service.texts == []
+    assert embedding_service.calls == calls
+    chunks = stored_chunks(chroma_client)
+    assert len(chunks) == 4
+    assert all(metadata['source_url'] == 'https://notion.so/moved' for _, metadata in chunks.values())
@@ -0,0 +1,43 @@
+import sqlite3
+
+from services.embedding_store import EmbeddingStore
+
+VECTOR = [0.1] * 64
+
+
+def stored_hashes(store):
+    with sqlite3.connect(store.path) as conn:
+        return {row[0] for row in conn.execute("SELECT content_hash FROM embeddings")}
+
+
+def test_reads_batch_access_time_updates(tmp_path):
+    store = EmbeddingStore(str(tmp_path / 'embeddings.sqlite3'), touch_batch=3, touch_interval=3600)
+    store.put_many('model', {'a': VECTOR, 'b': VECTOR})
+    with sqlite3.connect(store.path) as conn:
+        before = dict(conn.execute("SELECT content_hash, last_used FROM embeddings"))
+
+    store.get_many('model', ['a', 'b'])
+    with sqlite3.connect(store.path) as conn:
+        assert dict(conn.execute("SELECT content_hash, last_used FROM embeddings")) == before
+
+    store.get_many('model', ['a'])
+    store.put_many('model', {'c': VECTOR})
+    store.get_many('model', ['c'])
+    with sqlite3.connect(store.path) as conn:
+        after = dict(conn.execute("SELECT content_hash, last_used FROM embeddings"))
+    assert after['a'] > before['a'] and after['b'] > before['b']
+
+
+def test_eviction_keeps_recently_read_rows(tmp_path):
+    row_bytes = len(VECTOR) * 2
+    store = EmbeddingStore(str(tmp_path / 'embeddings.sqlite3'), max_bytes=10 * row_bytes, touch_batch=1000)
+    store.put_many('model', {f"old{i}": VECTOR for i in range(8)})
+    # Only held in memory until eviction needs the order
+    store.get_many('model', ['old0', 'old1'])
+    store.put_many('model', {f"new{i}": VECTOR for i in range(4)})
+
+    hashes = stored_hashes(store)
+    assert {'old0', 'old1'} <= hashes
+    assert {f"new{i}" for i in range(4)} <= hashes
+    assert len(hashes) * row_bytes <= 10 * row_bytes
+    assert store.stats()['stored_bytes'] == store._stored_bytes
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from services.cache import LRUCache
+from services.embeddings import EmbeddingService, index_namespace
+from utils.config import Config
+
+
+class ConstantEncoder:
+    def __init__(self, value):
+        self.value = value
+        self.encoded = []
+
+    def encode(self, sentences, **kwargs):
+        self.encoded.extend(sentences)
+        return np.full((len(sentences), 4), self.value, dtype=np.float32)
+
+
+@pytest.fixture
+def shared_cache(data_dir, monkeypatch):
+    cache = LRUCache(max_size=100, ttl=3600)
+    monkeypatch.setattr(EmbeddingService, '_cache', cache)
+    monkeypatch.setattr(EmbeddingService, '_store', None)
+    monkeypatch.setattr(EmbeddingService, '_model_loaded', True)
+    monkeypatch.setattr(Config, 'EMBEDDING_WORKERS', 0)
+    monkeypatch.setattr(Config, 'EMBEDDING_COALESCE', False)
+    return cache
+
+
+def service_for(monkeypatch, backend, encoder, quantized=False):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', backend)
+    monkeypatch.setattr(Config, 'EMBEDDING_ONNX_QUANTIZED', quantized)
+    monkeypatch.setattr(EmbeddingService, '_model', encoder)
+    return EmbeddingService()
+
+
+def test_query_cache_is_separated_by_backend_and_quantization(shared_cache, monkeypatch):
+    torch_model, onnx_model, int8_model = ConstantEncoder(1.0), ConstantEncoder(2.0), ConstantEncoder(3.0)
+
+    assert service_for(monkeypatch, 'torch', torch_model).generate_embeddings(['sprint review'])[0][0] == 1.0
+    assert service_for(monkeypatch, 'onnx', onnx_model).generate_embeddings(['sprint review'])[0][0] == 2.0
+    assert service_for(monkeypatch, 'onnx', int8_model, quantized=True).generate_embeddings(['sprint review'])[0][0] == 3.0
+    assert service_for(monkeypatch, 'torch', torch_model).generate_embeddings(['sprint review'])[0][0] == 1.0
+
+    assert torch_model.encoded == ['sprint review']
+    assert onnx_model.encoded == ['sprint review']
+    assert int8_model.encoded == ['sprint review']
+
+
+def test_index_namespace_includes_remote_model(monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'openai')
+    monkeypatch.setattr(Config, 'OPENAI_EMBEDDING_DIMENSIONS', 1536)
+    monkeypatch.setattr(Config, 'OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
+    small = index_namespace()
+    monkeypatch.setattr(Config, 'OPENAI_EMBEDDING_MODEL', 'text-embedding-3-large')
+    large = index_namespace()
+
+    assert small == '_text_embedding_3_small_1536'
+    assert small != large
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'torch')
+    assert index_namespace() == ''
+
+
+def test_only_query_embeddings_go_through_the_coalescer(shared_cache, monkeypatch):
+    from services.embedding_batcher import EmbeddingBatcher
+
+    monkeypatch.setattr(Config, 'EMBEDDING_COALESCE', True)
+    service = service_for(monkeypatch, 'torch', ConstantEncoder(1.0))
+    batcher = EmbeddingBatcher(service._encode_batches, max_wait_ms=0)
+    monkeypatch.setattr(EmbeddingService, '_batcher', batcher)
+    try:
+        service.generate_embeddings(['chunk one', 'chunk two'], use_cache=False, use_store=True)
+        assert batcher.stats()['requests'] == 0
+
+        service.generate_embeddings(['sprint review', 'sprint review (title)'], use_cache=False, coalesce=True)
+        assert batcher.stats()['requests'] == 1
+    finally:
+        batcher.shutdown()
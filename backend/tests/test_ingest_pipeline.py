@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from services.ingest_pipeline import IngestPipeline
+
+
+class FakeNotionClient:
+    def __init__(self, documents, concurrency=2):
+        self.documents = documents
+        self.concurrency = concurrency
+
+    async def fetch_page(self, page):
+        await asyncio.sleep(0)
+        return dict(self.documents[page['id']])
+
+
+def make_pages(count):
+    documents = {
+        f"page-{i}": {
+            'id': f"page-{i}",
+            'url': f"https://notion.so/page-{i}",
+            'title': f"Page {i}",
+            'content': ' '.join(f"word{i}_{j}" for j in range(250)),
+            'last_edited_time': '2024-05-01T10:00:00.000Z'
+        }
+        for i in range(count)
+    }
+    pages = [{'id': page_id, 'last_edited_time': doc['last_edited_time']} for page_id, doc in documents.items()]
+    return documents, pages
+
+
+def run_pipeline(pipeline, pages):
+    return asyncio.run(asyncio.wait_for(pipeline.run(pages), timeout=30))
+
+
+def test_duplicate_page_ids_are_ingested_once(chroma_client):
+    documents, pages = make_pages(5)
+    pages = pages + pages[:3] + [dict(pages[0], last_edited_time='2024-05-02T10:00:00.000Z')]
+    pipeline = IngestPipeline(chroma_client, FakeNotionClient(documents), queue_size=2, embed_batch_size=4)
+
+    progress = run_pipeline(pipeline, pages)
+
+    assert progress['documents_seen'] == 5
+    assert progress['failed_pages'] == 0
+    assert progress['pages_in_flight'] == 0
+    assert sorted(pipeline.written_pages) == sorted(documents)
+    assert pipeline.watermarks['page-0'] == '2024-05-01T10:00:00.000Z'
+    # Title plus three content chunks per page
+    assert chroma_client.collection.count() == 5 * 4
+
+
+@pytest.mark.parametrize('stage', ['_fetch_stage', '_embed_stage', '_upsert_stage'])
+def test_failing_stage_raises_instead_of_hanging(chroma_client, monkeypatch, stage):
+    documents, pages = make_pages(40)
+    pipeline = IngestPipeline(chroma_client, FakeNotionClient(documents), queue_size=1, embed_batch_size=2)
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError(f"{stage} broke")
+
+    monkeypatch.setattr(pipeline, stage, broken)
+    with pytest.raises(RuntimeError, match=f"{stage} broke"):
+        run_pipeline(pipeline, pages)
+    assert not pipeline.running
+
+
+def test_failed_embedding_keeps_the_old_chunks(chroma_client, embedding_service):
+    documents, pages = make_pages(1)
+    run_pipeline(IngestPipeline(chroma_client, FakeNotionClient(documents)), pages)
+    assert chroma_client.collection.count() == 4
+
+    # The page shrinks to two content chunks: one changed, the third one is now stale
+    words = documents['page-0']['content'].split()
+    documents['page-0']['content'] = ' '.join(words[:100] + ['edited'] * 50)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('embedding backend down')
+
+    embedding_service.generate_embeddings = broken
+    pipeline = IngestPipeline(chroma_client, FakeNotionClient(documents))
+    run_pipeline(pipeline, pages)
+
+    assert pipeline.failed_pages == {'page-0'}
+    assert 'page-0' not in pipeline.watermarks
+    assert set(chroma_client.collection.get()['ids']) == {
+        'page-0_title', 'page-0_content_0', 'page-0_content_1', 'page-0_content_2'
+    }
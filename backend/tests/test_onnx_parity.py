@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from services.onnx_embedder import MODEL_FILE
+from utils.config import Config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.normpath(os.path.join(BACKEND_DIR, Config.EMBEDDING_ONNX_PATH))
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(os.path.join(MODEL_DIR, MODEL_FILE)),
+    reason=f"no exported ONNX model in {MODEL_DIR} (run python -m scripts.export_onnx)"
+)
+
+
+def test_onnx_embeddings_match_torch():
+    pytest.importorskip('sentence_transformers')
+    from scripts.check_onnx_parity import check
+
+    assert check(MODEL_DIR)
@@ -0,0 +1,86 @@
+import numpy as np
+
+from services.page_index import PageIndex
+
+DIM = 128
+
+
+def normalize(vector):
+    return vector / np.linalg.norm(vector)
+
+
+def noise(rng):
+    return normalize(rng.standard_normal(DIM))
+
+
+def load_corpus(client, pages=40, chunks_per_page=4, seed=7):
+    rng = np.random.default_rng(seed)
+    ids, embeddings, metadatas, page_vectors = [], [], [], {}
+    for page in range(pages):
+        source_id = f"page-{page}"
+        page_vector = noise(rng)
+        page_vectors[source_id] = page_vector
+        base = {'source_id': source_id, 'source_url': f"https://notion.so/{source_id}",
+                'title': source_id, 'language': 'en', 'page_hash': source_id}
+        ids.append(f"{source_id}_title")
+        embeddings.append(normalize(page_vector + 0.15 * noise(rng)))
+        metadatas.append({**base, 'chunk_type': 'title'})
+        for i in range(chunks_per_page):
+            ids.append(f"{source_id}_content_{i}")
+            embeddings.append(normalize(page_vector + 0.3 * noise(rng)))
+            metadatas.append({**base, 'chunk_type': 'content', 'chunk_index': i})
+    client.collection.add(ids=ids, embeddings=np.asarray(embeddings, dtype=np.float32), metadatas=metadatas)
+    return page_vectors
+
+
+def top_pages(client, query_vector, n_results):
+    embedding = query_vector.tolist()
+    grouped = client._search_pages('', [embedding, embedding], n_results)
+    return [result['page_id'] for result in grouped['results']]
+
+
+def test_prefilter_and_exact_titles_match_unfiltered_search(chroma_client, data_dir):
+    chroma_client.lexical_index = None
+    chroma_client.vector_index = None
+    page_vectors = load_corpus(chroma_client)
+    chroma_client.page_index = PageIndex(str(data_dir / 'page_centroids.npz'))
+    chroma_client.page_index.refresh(chroma_client.collection)
+    chroma_client.page_index.refresh_centroids(chroma_client.collection)
+
+    rng = np.random.default_rng(11)
+    page_ids = list(page_vectors)
+    for _ in range(15):
+        # The query leans on one page and less on a second one, so the top two pages are well defined
+        first, second = rng.choice(page_ids, size=2, replace=False)
+        query_vector = normalize(
+            0.8 * page_vectors[first] + 0.45 * page_vectors[second] + 0.05 * noise(rng)
+        )
+        chroma_client.exact_title_scoring, chroma_client.page_prefilter = False, 0
+        unfiltered = top_pages(chroma_client, query_vector, 5)
+        chroma_client.exact_title_scoring, chroma_client.page_prefilter = True, 10
+        indexed = top_pages(chroma_client, query_vector, 5)
+
+        assert unfiltered[:2] == [first, second]
+        assert indexed[:2] == unfiltered[:2]
+
+
+
+def test_title_hits_stay_within_prefilter_candidates(chroma_client, data_dir):
+    chroma_client.lexical_index = None
+    chroma_client.vector_index = None
+    page_vectors = load_corpus(chroma_client)
+    chroma_client.page_index = PageIndex(str(data_dir / 'page_centroids.npz'))
+    chroma_client.page_index.refresh(chroma_client.collection)
+    chroma_client.page_index.refresh_centroids(chroma_client.collection)
+
+    rng = np.random.default_rng(3)
+    for _ in range(10):
+        query_vector = noise(rng)
+        candidates = set(chroma_client.page_index.top_pages(query_vector, 3))
+        chroma_client.exact_title_scoring, chroma_client.page_prefilter = True, 3
+        indexed = top_pages(chroma_client, query_vector, 10)
+        chroma_client.exact_title_scoring = False
+        filtered = top_pages(chroma_client, query_vector, 10)
+
+        assert set(indexed) <= candidates
+        assert set(indexed) == set(filtered)
@@ -0,0 +1,17 @@
+def test_search_reuses_precomputed_query_embeddings(chroma_client, embedding_service):
+    chroma_client.add_documents([
+        {'id': f"page-{i}", 'url': f"https://notion.so/page-{i}", 'title': f"Page {i}",
+         'content': f"sprint planning notes {i} " * 20}
+        for i in range(5)
+    ])
+    query_embeddings = chroma_client.embed_query('sprint planning')
+    calls = embedding_service.calls
+
+    reused = chroma_client.search('sprint planning', n_results=3, query_embeddings=query_embeddings)
+    assert embedding_service.calls == calls
+
+    fresh = chroma_client.search('sprint planning', n_results=3)
+    assert embedding_service.calls == calls + 1
+    assert [r['page_id'] for r in reused['results']] == [r['page_id'] for r in fresh['results']]
+    assert reused['results']
+
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from services import sync_jobs
+from services.sync_jobs import SyncJobRunner, _is_unchanged, _to_timestamp
+from utils.config import Config
+
+
+def test_hung_async_job_times_out(monkeypatch):
+    async def hang(chroma_client, job):
+        job.start_stage('list_notion_pages')
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(Config, 'SYNC_JOB_TIMEOUT', 0.2)
+    monkeypatch.setattr(sync_jobs, 'sync_notion', hang)
+    runner = SyncJobRunner(chroma_client=None)
+
+    job, joined = runner.start()
+    assert not joined
+    assert job.wait(timeout=5)
+    assert job.status == 'timed_out'
+    assert 'timed out' in job.error and 'list_notion_pages' in job.error
+
+
+def test_blocked_job_keeps_single_flight_until_its_thread_exits(monkeypatch):
+    calls = []
+
+    async def block(chroma_client, job):
+        calls.append(job.id)
+        if len(calls) == 1:
+            # A blocking call neither the event loop nor the cancel flag can interrupt
+            time.sleep(1.0)
+            job.start_stage('finalize')
+        return {'message': 'ok'}
+
+    monkeypatch.setattr(Config, 'SYNC_JOB_TIMEOUT', 0.2)
+    monkeypatch.setattr(sync_jobs, 'sync_notion', block)
+    runner = SyncJobRunner(chroma_client=None)
+
+    first, _ = runner.start()
+    time.sleep(0.4)
+    same, joined = runner.start()
+    assert joined and same is first
+    assert first.status == 'cancelling' and first.active
+    assert len(calls) == 1
+
+    # The thread stops at its next cancellation check; only then can a new sync start
+    assert first.wait(timeout=5)
+    assert first.status == 'timed_out' and 'timed out' in first.error
+    second, joined = runner.start()
+    assert not joined and second is not first
+    assert second.wait(timeout=5) and second.status == 'succeeded'
+
+
+def test_pipeline_stops_between_pages_when_cancelled():
+    from services.ingest_pipeline import IngestCancelled, IngestPipeline
+
+    class Notion:
+        concurrency = 1
+
+        async def fetch_page(self, page):
+            fetched.append(page['id'])
+            return None
+
+    fetched = []
+    pipeline = IngestPipeline(
+        chroma_client=None, notion_client=Notion(), should_stop=lambda: len(fetched) >= 3,
+        queue_size=1, chunk_workers=1
+    )
+    pages = [{'id': f'page-{i}', 'last_edited_time': None} for i in range(50)]
+    with pytest.raises(IngestCancelled):
+        asyncio.run(pipeline.run(pages))
+    assert len(fetched) == 3
+
+
+def test_page_is_refetched_until_synced_after_its_edit_minute():
+    page = {'id': 'page-1', 'last_edited_time': '2024-05-01T10:00:00.000Z'}
+    minute = _to_timestamp(page['last_edited_time'])
+
+    # Fetched within the edited minute: a later edit in that minute would look the same
+    assert not _is_unchanged(page, ('2024-05-01T10:00:00.000Z', minute + 30))
+    assert _is_unchanged(page, ('2024-05-01T10:00:00.000Z', minute + 60))
+    assert not _is_unchanged(page, ('2024-05-01T09:59:00.000Z', minute + 3600))
+    assert not _is_unchanged(page, None)
+    assert not _is_unchanged({'id': 'page-1'}, ('2024-05-01T10:00:00.000Z', minute + 3600))
+
+
+def test_watermarks_keep_fetch_time(data_dir):
+    from services.sync_state import SyncStateStore
+
+    store = SyncStateStore(Config.SYNC_STATE_PATH)
+    store.set_watermarks({'a': '2024-05-01T10:00:00.000Z', 'b': None}, {'a': 1714557630.0})
+    assert store.get_watermarks() == {'a': ('2024-05-01T10:00:00.000Z', 1714557630.0)}
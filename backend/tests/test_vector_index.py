@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from services.vector_index import ExactVectorIndex
+
+
+def batch(start, size, dim=8, seed=0):
+    rng = np.random.default_rng(seed + start)
+    ids = [f"page-{i // 4}_content_{i % 4}" for i in range(start, start + size)]
+    metadatas = [{'source_id': f"page-{i // 4}", 'chunk_type': 'content', 'title': f"Page {i // 4}"}
+                 for i in range(start, start + size)]
+    return ids, rng.standard_normal((size, dim)).tolist(), metadatas
+
+
+def test_unsaved_batches_are_written_once_and_reload(tmp_path):
+    index = ExactVectorIndex(str(tmp_path / 'vector_index'))
+    for start in range(0, 400, 40):
+        index.add(*batch(start, 40), save=False)
+    assert not os.path.exists(index._arrays_file)
+
+    index.save()
+    saved_at = os.path.getmtime(index._arrays_file)
+    index.save()
+    assert os.path.getmtime(index._arrays_file) == saved_at
+
+    query = batch(120, 1)[1]
+    reloaded = ExactVectorIndex(str(tmp_path / 'vector_index'))
+    assert len(reloaded) == 400
+    assert reloaded.query(query, n_results=5)['ids'] == index.query(query, n_results=5)['ids']
+    assert reloaded.query(query, n_results=1)['ids'] == [['page-30_content_0']]
+
+
+def test_readded_rows_are_compacted_past_the_dead_ratio(tmp_path):
+    index = ExactVectorIndex(str(tmp_path / 'vector_index'), compact_ratio=0.3)
+    index.add(*batch(0, 100), save=False)
+    for seed in range(1, 6):
+        index.add(*batch(0, 20, seed=seed), save=False)
+        assert index.count - len(index) <= 0.3 * index.count
+    assert len(index) == 100
+
+    ids, vectors, _ = batch(0, 20, seed=5)
+    assert index.query([vectors[3]], n_results=1)['ids'] == [[ids[3]]]
@@ -6,5 +6,74 @@ load_dotenv()
 class Config:
     NOTION_API_KEY = os.getenv('NOTION_API_KEY')
     NOTION_DATABASE_ID = os.getenv('NOTION_DATABASE_ID')
+    NOTION_BASE_URL = os.getenv('NOTION_BASE_URL', 'https://api.notion.com')
+    NOTION_CONCURRENCY = int(os.getenv('NOTION_CONCURRENCY', '8'))
+    NOTION_RATE_LIMIT = float(os.getenv('NOTION_RATE_LIMIT', '3'))
+    NOTION_RATE_BURST = float(os.getenv('NOTION_RATE_BURST', '6'))
+    NOTION_MAX_RETRIES = int(os.getenv('NOTION_MAX_RETRIES', '6'))
+    NOTION_BACKOFF_BASE = float(os.getenv('NOTION_BACKOFF_BASE', '0.5'))
+    NOTION_BACKOFF_MAX = float(os.getenv('NOTION_BACKOFF_MAX', '30'))
+    NOTION_MAX_DEPTH = int(os.getenv('NOTION_MAX_DEPTH', '6'))
+    NOTION_PAGE_CALL_BUDGET = int(os.getenv('NOTION_PAGE_CALL_BUDGET', '200'))
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-    
\ No newline at end of file
+    CHROMA_PATH = os.getenv('CHROMA_PATH', './data/chroma')
+    CHROMA_BATCHED_SEARCH = os.getenv('CHROMA_BATCHED_SEARCH', 'true').lower() == 'true'
+    EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '2048'))
+    EMBEDDING_CACHE_TTL = float(os.getenv('EMBEDDING_CACHE_TTL', '86400'))
+    EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', '')
+    EMBEDDING_STORE_PATH = os.getenv('EMBEDDING_STORE_PATH', './data/embeddings.sqlite3')
+    EMBEDDING_STORE_MAX_MB = float(os.getenv('EMBEDDING_STORE_MAX_MB', '512'))
+    EMBEDDING_STORE_DTYPE = os.getenv('EMBEDDING_STORE_DTYPE', 'float16')
+    EMBEDDING_BATCH_POLICY = os.getenv('EMBEDDING_BATCH_POLICY', 'tokens').lower()
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv('EMBEDDING_BATCH_MAX_TOKENS', '4096'))
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', '128'))
+    EMBEDDING_COALESCE = os.getenv('EMBEDDING_COALESCE', 'true').lower() == 'true'
+    EMBEDDING_COALESCE_WAIT_MS = float(os.getenv('EMBEDDING_COALESCE_WAIT_MS', '2'))
+    EMBEDDING_COALESCE_MAX_BATCH = int(os.getenv('EMBEDDING_COALESCE_MAX_BATCH', '64'))
+    USE_OPENAI_EMBEDDINGS = os.getenv('USE_OPENAI_EMBEDDINGS', 'false').lower() == 'true'
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'openai' if USE_OPENAI_EMBEDDINGS else 'torch').lower()
+    OPENAI_EMBEDDING_MODEL = os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
+    OPENAI_EMBEDDING_DIMENSIONS = int(os.getenv('OPENAI_EMBEDDING_DIMENSIONS', '1536'))
+    OPENAI_EMBEDDING_BASE_URL = os.getenv('OPENAI_EMBEDDING_BASE_URL', '')
+    OPENAI_EMBEDDING_BATCH_SIZE = int(os.getenv('OPENAI_EMBEDDING_BATCH_SIZE', '256'))
+    OPENAI_EMBEDDING_CONCURRENCY = int(os.getenv('OPENAI_EMBEDDING_CONCURRENCY', '4'))
+    OPENAI_EMBEDDING_MAX_RETRIES = int(os.getenv('OPENAI_EMBEDDING_MAX_RETRIES', '5'))
+    OPENAI_EMBEDDING_TIMEOUT = float(os.getenv('OPENAI_EMBEDDING_TIMEOUT', '30'))
+    EMBEDDING_ONNX_PATH = os.getenv('EMBEDDING_ONNX_PATH', './models/paraphrase-multilingual-MiniLM-L12-v2-onnx')
+    EMBEDDING_ONNX_QUANTIZED = os.getenv('EMBEDDING_ONNX_QUANTIZED', 'true').lower() == 'true'
+    EMBEDDING_ONNX_THREADS = int(os.getenv('EMBEDDING_ONNX_THREADS', '0'))
+    EMBEDDING_WORKERS = int(os.getenv('EMBEDDING_WORKERS', '0'))
+    EMBEDDING_WORKER_THREADS = int(os.getenv('EMBEDDING_WORKER_THREADS', '0'))
+    EMBEDDING_POOL_MIN_TEXTS = int(os.getenv('EMBEDDING_POOL_MIN_TEXTS', '64'))
+    EMBEDDING_POOL_SHARD_SIZE = int(os.getenv('EMBEDDING_POOL_SHARD_SIZE', '64'))
+    NORMALIZATION_CACHE_SIZE = int(os.getenv('NORMALIZATION_CACHE_SIZE', '1024'))
+    NORMALIZATION_CACHE_TTL = float(os.getenv('NORMALIZATION_CACHE_TTL', '604800'))
+    NORMALIZATION_CACHE_PATH = os.getenv('NORMALIZATION_CACHE_PATH', './data/cache.sqlite3')
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.97'))
+    ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '86400'))
+    PAGE_STORE_PATH = os.getenv('PAGE_STORE_PATH', './data/pages.sqlite3')
+    SYNC_STATE_PATH = os.getenv('SYNC_STATE_PATH', './data/sync_state.sqlite3')
+    SYNC_SKIP_UNCHANGED = os.getenv('SYNC_SKIP_UNCHANGED', 'true').lower() == 'true'
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'true').lower() == 'true'
+    SYNC_SCHEDULE_INTERVAL = float(os.getenv('SYNC_SCHEDULE_INTERVAL', '0'))
+    SYNC_JOB_HISTORY = int(os.getenv('SYNC_JOB_HISTORY', '20'))
+    SYNC_JOB_TIMEOUT = float(os.getenv('SYNC_JOB_TIMEOUT', '3600'))
+    INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '16'))
+    INGEST_EMBED_BATCH_SIZE = int(os.getenv('INGEST_EMBED_BATCH_SIZE', '64'))
+    INGEST_CHUNK_WORKERS = int(os.getenv('INGEST_CHUNK_WORKERS', '2'))
+    INGEST_BATCH_WAIT = float(os.getenv('INGEST_BATCH_WAIT', '0.2'))
+    INGEST_PROGRESS_INTERVAL = float(os.getenv('INGEST_PROGRESS_INTERVAL', '5'))
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma').lower()
+    VECTOR_INDEX_PATH = os.getenv('VECTOR_INDEX_PATH', './data/vector_index')
+    VECTOR_INDEX_DTYPE = os.getenv('VECTOR_INDEX_DTYPE', 'float32')
+    VECTOR_INDEX_COMPACT_RATIO = float(os.getenv('VECTOR_INDEX_COMPACT_RATIO', '0.3'))
+    LEXICAL_SEARCH = os.getenv('LEXICAL_SEARCH', 'false').lower() == 'true'
+    LEXICAL_INDEX_PATH = os.getenv('LEXICAL_INDEX_PATH', './data/lexical_index.pkl')
+    RRF_K = int(os.getenv('RRF_K', '60'))
+    SKIP_NORMALIZATION_COVERAGE = float(os.getenv('SKIP_NORMALIZATION_COVERAGE', '0'))
+    EXACT_TITLE_SCORING = os.getenv('EXACT_TITLE_SCORING', 'false').lower() == 'true'
+    PAGE_PREFILTER_PAGES = int(os.getenv('PAGE_PREFILTER_PAGES', '0'))
+    PAGE_CENTROIDS_PATH = os.getenv('PAGE_CENTROIDS_PATH', './data/page_centroids.npz')
+    LANGUAGE_PARTITIONED_SEARCH = os.getenv('LANGUAGE_PARTITIONED_SEARCH', 'false').lower() == 'true'
+    LANGUAGE_MIN_PAGES = int(os.getenv('LANGUAGE_MIN_PAGES', '3'))
@@ -107,16 +107,29 @@ export default function AgentSection({ currentConversationId, onConversationChan
 
     try {
       const res = await fetch(`${apiUrl}/api/notion/update_vector_db`, {
-        method: "GET",
+        method: "POST",
         headers: { "Content-Type": "application/json" },
       });
 
       const data = await res.json();
 
-      if (res.ok) {
+      if (!res.ok) {
+        console.error("Update error:", data.message || "Unknown error");
+        return;
+      }
+
+      let job = data.job;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobRes = await fetch(`${apiUrl}/api/notion/sync/jobs/${data.job_id}`);
+        job = await jobRes.json();
+        if (!jobRes.ok) break;
+      }
+
+      if (job.status === "succeeded") {
         await checkDbStatus();
       } else {
-        console.error("Update error:", data.error || "Unknown error");
+        console.error("Update error:", job.error || job.message || "Unknown error");
       }
     } catch (err) {
       console.error("Update failed:", err);